@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from datetime import date
+from typing import Optional
+from config import settings
+from models.database import engine
+from services import profiling
+from api.dependencies import get_dedup_index, get_product_snapshot
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Vérifier le jeton d'administration (endpoints désactivés sans ADMIN_TOKEN)"""
+    if not settings.ADMIN_TOKEN or x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Accès administrateur refusé")
+
+
+@router.get("/profiles/", dependencies=[Depends(require_admin)])
+def list_profiles():
+    """Lister les profils de requêtes enregistrés"""
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str):
+    """Métadonnées et requêtes SQL d'un profil"""
+    path = profiling.profile_path(profile_id, '.json')
+    if not path:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return FileResponse(path, media_type="application/json")
+
+
+@router.get("/profiles/{profile_id}/download", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: str):
+    """Télécharger le profil cProfile (.prof, pour snakeviz)"""
+    path = profiling.profile_path(profile_id, '.prof')
+    if not path:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
+@router.get("/dedup", dependencies=[Depends(require_admin)])
+def dedup_report(dedup_index=Depends(get_dedup_index)):
+    """Taux de doublons détectés à l'ingestion depuis le démarrage"""
+    if dedup_index is None:
+        raise HTTPException(status_code=404, detail="Déduplication désactivée")
+    return dedup_index.report()
+
+
+@router.get("/product-snapshot", dependencies=[Depends(require_admin)])
+def product_snapshot_report(snapshot_store=Depends(get_product_snapshot)):
+    """Taille, version et temps de construction de l'instantané produits partagé"""
+    return snapshot_store.stats()
+
+
+@router.get("/export/{table}", dependencies=[Depends(require_admin)])
+def export_table(
+    table: str,
+    format: str = 'parquet',
+    start: date = None,
+    end: date = None,
+    category: str = None,
+    language: str = None,
+    chunk_size: int = 50_000
+):
+    """Exporter avis ou produits en Parquet / Arrow IPC, en flux"""
+    # pyarrow n'est chargé qu'au premier export
+    from services import export
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format inconnu: {format}")
+    if table == 'reviews':
+        query = export.reviews_query(start, end, category, language)
+        schema = export.REVIEW_SCHEMA
+    elif table == 'products':
+        query = export.products_query(category)
+        schema = export.PRODUCT_SCHEMA
+    else:
+        raise HTTPException(status_code=404, detail="Table non exportable")
+
+    filename = f"{table}.{export.EXTENSIONS[format]}"
+    return StreamingResponse(
+        export.stream_export(engine, query, schema, format, max(1, min(chunk_size, 200_000))),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,98 @@
+"""
+Fournisseurs de services pour les routes (construction au premier usage)
+
+Importer api.routes ne charge ni torch, ni transformers, ni scikit-learn,
+ni NLTK : chaque service est construit au premier appel de son
+fournisseur, une seule fois par processus, puis partagé. Les routes les
+reçoivent par Depends(...) ; un processus qui ne sert que des lectures
+(API_PROFILE=readonly) ne les construit jamais.
+"""
+
+import functools
+import threading
+
+from config import settings
+
+
+class LazyService:
+    """Instance unique construite au premier appel (thread-safe), utilisable avec Depends"""
+
+    def __init__(self, factory):
+        functools.update_wrapper(self, factory)
+        self.factory = factory
+        self.instance = None
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.instance = self.factory()
+                    self.loaded = True
+        return self.instance
+
+    def override(self, instance):
+        """Remplace l'instance (benchmarks, stubs)"""
+        with self._lock:
+            self.instance = instance
+            self.loaded = True
+
+
+@LazyService
+def get_preprocessor():
+    from services.preprocessor import TextPreprocessor
+    return TextPreprocessor()
+
+
+@LazyService
+def get_sentiment_analyzer():
+    # Avec le serveur d'inférence, le processus API ne charge pas les modèles
+    if settings.INFERENCE_SERVER_ENABLED:
+        from services.inference_server import InferenceClient
+        return InferenceClient()
+    from services.sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+
+@LazyService
+def get_scheduler():
+    if not settings.INFERENCE_SCHEDULER_ENABLED:
+        return None
+    from services.scheduler import InferenceScheduler
+    return InferenceScheduler(get_sentiment_analyzer()).start()
+
+
+@LazyService
+def get_product_snapshot():
+    from services.product_snapshot import ProductSnapshotStore
+    return ProductSnapshotStore()
+
+
+@LazyService
+def get_recommender():
+    from services.recommender import RecommendationEngine
+    # Modèle ALS entraîné en arrière-plan (ALS_ENABLED)
+    return RecommendationEngine(products=get_product_snapshot()).start_training()
+
+
+@LazyService
+def get_dedup_index():
+    if not settings.DEDUP_ENABLED:
+        return None
+    from services import dedup
+    return dedup.load_or_create()
+
+
+@LazyService
+def get_product_cache():
+    from services.product_cache import ProductCache
+    return ProductCache()
+
+
+@LazyService
+def get_live_feed():
+    if not settings.LIVE_FEED_ENABLED:
+        return None
+    from services.live_feed import LiveFeed
+    return LiveFeed()
@@ -0,0 +1,55 @@
+"""
+Réponses JSON rapides pour les endpoints de liste
+
+Les lignes sont sélectionnées colonne par colonne (tuples SQL, sans objets
+ORM ni validation Pydantic), sérialisées avec orjson puis compressées
+(brotli si disponible et accepté par le client, sinon gzip) au-delà de
+COMPRESSION_MIN_BYTES.
+"""
+
+import gzip
+from typing import Sequence
+
+import orjson
+from fastapi import Request, Response
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Niveaux choisis pour le débit : le JSON se compresse déjà ~6x à ces niveaux
+GZIP_LEVEL = 3
+BROTLI_QUALITY = 4
+
+
+def rows_to_dicts(columns: Sequence[str], rows) -> list:
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _accepted_encodings(request: Request) -> set:
+    header = request.headers.get('accept-encoding', '')
+    return {part.split(';')[0].strip().lower() for part in header.split(',') if part.strip()}
+
+
+def compress_body(request: Request, body: bytes):
+    """Retourne (contenu, en-têtes) selon Accept-Encoding et la taille du contenu"""
+    min_bytes = settings.COMPRESSION_MIN_BYTES
+    if min_bytes <= 0 or len(body) < min_bytes:
+        return body, {}
+
+    accepted = _accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=BROTLI_QUALITY), {'Content-Encoding': 'br', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), {'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+    return body, {'Vary': 'Accept-Encoding'}
+
+
+def fast_json_response(request: Request, columns: Sequence[str], rows) -> Response:
+    """Liste de lignes SQL → JSON (orjson) éventuellement compressé"""
+    body = orjson.dumps(rows_to_dicts(columns, rows))
+    body, headers = compress_body(request, body)
+    return Response(content=body, media_type='application/json', headers=headers)
@@ -1,35 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc  # IMPORTATION CORRIGÉE
+from sqlalchemy import select
+from datetime import date
 from typing import List
 from models.database import get_db, Product, Review, User
 from models.schemas import (
     ReviewCreate, ReviewResponse,
     ProductCreate, ProductResponse,
     SentimentAnalysisRequest, SentimentAnalysisResponse,
-    RecommendationResponse
+    RecommendationResponse, TrendPoint, SearchResponse
 )
-from services.preprocessor import TextPreprocessor
-from services.sentiment_analyzer import SentimentAnalyzer
-from services.recommender import RecommendationEngine
+from services.profiling import ProfiledRoute
+from services import rollups, search
+from services.product_cache import etag_matches, make_etag
+from services.scheduler import PRIORITIES, Overloaded
+from services.live_feed import dashboard_totals, dashboard_view
+from api.dependencies import (
+    get_dedup_index, get_live_feed, get_preprocessor, get_product_cache,
+    get_recommender, get_scheduler, get_sentiment_analyzer
+)
+from api.responses import fast_json_response
+from config import settings
+
+# Lectures seules : servies par tous les profils, sans code ML
+router = APIRouter(route_class=ProfiledRoute)
+# Écritures, analyse et recommandations : profil full uniquement (voir main.py)
+ml_router = APIRouter(route_class=ProfiledRoute)
+
+# Colonnes lues directement pour les listes (mêmes champs que les schémas de réponse)
+REVIEW_COLUMNS = list(ReviewResponse.model_fields)
+PRODUCT_COLUMNS = list(ProductResponse.model_fields)
+
 
-router = APIRouter()
+def request_priority(x_priority: str = Header(default='interactive')) -> str:
+    """Classe de priorité demandée (en-tête X-Priority : interactive ou bulk)"""
+    if x_priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Priorité inconnue: {x_priority}")
+    return x_priority
+
+
+def analyze_text(processed_text: str, language: str, raw_text: str, priority: str) -> dict:
+    """Analyse via l'ordonnanceur ; file pleine → 429 avec Retry-After"""
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return get_sentiment_analyzer().analyze(processed_text, language, raw_text=raw_text)
+    try:
+        return scheduler.analyze(processed_text, language, raw_text=raw_text, priority=priority)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Service d'analyse surchargé, réessayer plus tard",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
-# Initialiser les services
-preprocessor = TextPreprocessor()
-sentiment_analyzer = SentimentAnalyzer()
-recommender = RecommendationEngine()
 
+def find_duplicate(text: str):
+    """Avis canonique déjà analysé pour ce texte brut (quasi-doublon), sinon None"""
+    dedup_index = get_dedup_index()
+    if dedup_index is None or not text:
+        return None
+    return dedup_index.find(text)
 
-@router.post("/reviews/", response_model=ReviewResponse)
-def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
+
+def remember_canonical(text: str, result: dict, review_id: int = None, product_id: int = None, user_id: int = None):
+    # Les résultats dégradés ne doivent pas être recopiés sur les doublons
+    dedup_index = get_dedup_index()
+    if dedup_index is None or not text or result.get('degraded'):
+        return
+    dedup_index.add(text, {
+        'review_id': review_id,
+        'product_id': product_id,
+        'user_id': user_id,
+        'sentiment': result['sentiment'],
+        'sentiment_score': result['sentiment_score'],
+        'confidence': result['confidence'],
+    })
+
+
+@ml_router.post("/reviews/", response_model=ReviewResponse)
+def create_review(
+    review: ReviewCreate,
+    priority: str = Depends(request_priority),
+    db: Session = Depends(get_db),
+    preprocessor=Depends(get_preprocessor),
+    product_cache=Depends(get_product_cache),
+    live_feed=Depends(get_live_feed)
+):
     """Créer un nouvel avis et analyser son sentiment"""
     try:
         # Prétraiter le texte
         processed_text, language = preprocessor.preprocess(review.text)
         
-        # Analyser le sentiment
-        sentiment_result = sentiment_analyzer.analyze(processed_text, language)
+        # Quasi-doublon : sentiment de l'avis canonique, sans inférence
+        canonical = find_duplicate(review.text)
+        if canonical is not None:
+            # Seul l'auteur de l'avis canonique le récupère (jamais l'avis d'un autre utilisateur)
+            if (settings.DEDUP_MODE == 'collapse' and canonical['review_id']
+                    and canonical['product_id'] == review.product_id
+                    and review.user_id is not None and canonical.get('user_id') == review.user_id):
+                existing = db.get(Review, canonical['review_id'])
+                if existing is not None:
+                    return existing
+            sentiment_result = canonical
+        else:
+            # Analyser le sentiment
+            sentiment_result = analyze_text(processed_text, language, review.text, priority)
         
         # Créer l'avis
         db_review = Review(
@@ -41,15 +117,34 @@ def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
             sentiment=sentiment_result['sentiment'],
             sentiment_score=sentiment_result['sentiment_score'],
             confidence=sentiment_result['confidence'],
-            processed=True
+            # Résultat dégradé (lexique) : à recalculer avec rescore_reviews.py --only-unprocessed
+            processed=not sentiment_result.get('degraded', False),
+            duplicate_of=canonical['review_id'] if canonical is not None else None
         )
         
         db.add(db_review)
+        db.flush()
+        
+        # Index plein texte, dans la même transaction que l'avis
+        if settings.SEARCH_INDEX_ENABLED:
+            search.index_reviews(db, [(db_review.id, review.text)])
         
         # Mettre à jour les statistiques du produit
         product = db.query(Product).filter(Product.id == review.product_id).first()
+        
+        # Agrégats de tendance, dans la même transaction que l'avis
+        rollups.record_reviews(db, [{
+            'product_id': db_review.product_id,
+            'category': product.category if product else None,
+            'language': language,
+            'sentiment': db_review.sentiment,
+            'sentiment_score': db_review.sentiment_score,
+            'rating': db_review.rating,
+            'created_at': db_review.created_at,
+        }])
         if product:
             product.total_reviews += 1
+            product.version = Product.version + 1
             if sentiment_result['sentiment'] == 'Positif':
                 product.positive_reviews += 1
             elif sentiment_result['sentiment'] == 'Neutre':
@@ -69,9 +164,28 @@ def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
         
         db.commit()
         db.refresh(db_review)
+        if product:
+            product_cache.set_version(product.id, product.version)
+        if canonical is None:
+            remember_canonical(review.text, sentiment_result, db_review.id, db_review.product_id, db_review.user_id)
+        if live_feed is not None:
+            live_feed.publish_review({
+                'id': db_review.id,
+                'product_id': db_review.product_id,
+                'product_name': product.name if product else None,
+                'rating': db_review.rating,
+                'text': db_review.text[:280],
+                'language': db_review.language,
+                'sentiment': db_review.sentiment,
+                'sentiment_score': db_review.sentiment_score,
+                'created_at': db_review.created_at.isoformat() if db_review.created_at else None,
+            })
         
         return db_review
         
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création de l'avis: {str(e)}")
@@ -79,6 +193,7 @@ def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
 
 @router.get("/reviews/", response_model=List[ReviewResponse])
 def get_reviews(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     sentiment: str = None,
@@ -86,20 +201,25 @@ def get_reviews(
     db: Session = Depends(get_db)
 ):
     """Récupérer les avis avec filtres optionnels"""
-    query = db.query(Review)
+    table = Review.__table__
+    query = select(*(table.c[name] for name in REVIEW_COLUMNS))
     
     if sentiment:
-        query = query.filter(Review.sentiment == sentiment)
+        query = query.where(table.c.sentiment == sentiment)
     
     if product_id:
-        query = query.filter(Review.product_id == product_id)
+        query = query.where(table.c.product_id == product_id)
     
-    reviews = query.offset(skip).limit(limit).all()
-    return reviews
+    rows = db.execute(query.offset(skip).limit(limit)).all()
+    return fast_json_response(request, REVIEW_COLUMNS, rows)
 
 
-@router.post("/analyze-sentiment/", response_model=SentimentAnalysisResponse)
-def analyze_sentiment(request: SentimentAnalysisRequest):
+@ml_router.post("/analyze-sentiment/", response_model=SentimentAnalysisResponse)
+def analyze_sentiment(
+    request: SentimentAnalysisRequest,
+    priority: str = Depends(request_priority),
+    preprocessor=Depends(get_preprocessor)
+):
     """Analyser le sentiment d'un texte"""
     try:
         # Prétraiter le texte
@@ -109,22 +229,30 @@ def analyze_sentiment(request: SentimentAnalysisRequest):
         if request.language:
             language = request.language
         
-        # Analyser le sentiment
-        result = sentiment_analyzer.analyze(processed_text, language)
+        # Analyser le sentiment (ou reprendre celui d'un quasi-doublon connu) ;
+        # une analyse ponctuelle n'est pas un avis : rien n'est ajouté à review_dedup
+        result = find_duplicate(request.text)
+        if result is None:
+            result = analyze_text(processed_text, language, request.text, priority)
         
         return {
             "sentiment": result['sentiment'],
             "sentiment_score": result['sentiment_score'],
             "confidence": result['confidence'],
-            "language_detected": language
+            "language_detected": language,
+            "degraded": result.get('degraded', False),
+            "segments": result.get('segments')
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse: {str(e)}")
 
 
 @router.get("/products/", response_model=List[ProductResponse])
 def get_products(
+    request: Request,
     skip: int = 0,
     limit: int = 50,
     category: str = None,
@@ -132,43 +260,95 @@ def get_products(
     db: Session = Depends(get_db)
 ):
     """Récupérer les produits avec filtres"""
-    query = db.query(Product)
+    table = Product.__table__
+    query = select(*(table.c[name] for name in PRODUCT_COLUMNS))
     
     if category:
-        query = query.filter(Product.category == category)
+        query = query.where(table.c.category == category)
     
     if min_sentiment is not None:
-        query = query.filter(Product.sentiment_score >= min_sentiment)
+        query = query.where(table.c.sentiment_score >= min_sentiment)
     
-    products = query.order_by(Product.sentiment_score.desc()).offset(skip).limit(limit).all()
-    return products
+    rows = db.execute(query.order_by(table.c.sentiment_score.desc()).offset(skip).limit(limit)).all()
+    return fast_json_response(request, PRODUCT_COLUMNS, rows)
 
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Récupérer un produit par ID"""
+def get_product(
+    product_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    product_cache=Depends(get_product_cache)
+):
+    """Récupérer un produit par ID (ETag, 304 et cache par version)"""
+    table = Product.__table__
+    version = product_cache.current_version(product_id)
+    if version is None:
+        version = db.execute(select(table.c.version).where(table.c.id == product_id)).scalar()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Produit non trouvé")
+        product_cache.set_version(product_id, version)
+    
+    etag = make_etag(product_id, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    body = product_cache.get(product_id, version)
+    if body is None:
+        row = db.execute(
+            select(table.c.version, *(table.c[name] for name in PRODUCT_COLUMNS)).where(table.c.id == product_id)
+        ).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Produit non trouvé")
+        version, values = row[0], row[1:]
+        body = orjson.dumps(dict(zip(PRODUCT_COLUMNS, values)))
+        product_cache.put(product_id, version, body)
+        headers["ETag"] = make_etag(product_id, version)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@ml_router.get("/products/{product_id}/similar", response_model=List[RecommendationResponse])
+def get_similar_products(
+    product_id: int,
+    top_n: int = 10,
+    db: Session = Depends(get_db),
+    recommender=Depends(get_recommender)
+):
+    """Obtenir les produits similaires (nom et description)"""
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
-    return product
+    try:
+        return recommender.similar_products(db, product_id, top_n)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la recherche de produits similaires: {str(e)}")
 
 
-@router.post("/products/", response_model=ProductResponse)
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+@ml_router.post("/products/", response_model=ProductResponse)
+def create_product(product: ProductCreate, db: Session = Depends(get_db), recommender=Depends(get_recommender)):
     """Créer un nouveau produit"""
     try:
         db_product = Product(**product.dict())
         db.add(db_product)
         db.commit()
         db.refresh(db_product)
+        
+        # Indexer le nouveau produit pour la recherche de similarité
+        recommender.product_index.upsert(db_product.id, db_product.name, db_product.description)
         return db_product
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création du produit: {str(e)}")
 
 
-@router.get("/recommendations/collaborative/{user_id}", response_model=List[RecommendationResponse])
-def get_collaborative_recommendations(user_id: int, top_n: int = 10, db: Session = Depends(get_db)):
+@ml_router.get("/recommendations/collaborative/{user_id}", response_model=List[RecommendationResponse])
+def get_collaborative_recommendations(
+    user_id: int,
+    top_n: int = 10,
+    db: Session = Depends(get_db),
+    recommender=Depends(get_recommender)
+):
     """Obtenir des recommandations par filtrage collaboratif"""
     try:
         recommendations = recommender.collaborative_filtering(db, user_id, top_n)
@@ -177,8 +357,13 @@ def get_collaborative_recommendations(user_id: int, top_n: int = 10, db: Session
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération des recommandations: {str(e)}")
 
 
-@router.get("/recommendations/content/{user_id}", response_model=List[RecommendationResponse])
-def get_content_recommendations(user_id: int, top_n: int = 10, db: Session = Depends(get_db)):
+@ml_router.get("/recommendations/content/{user_id}", response_model=List[RecommendationResponse])
+def get_content_recommendations(
+    user_id: int,
+    top_n: int = 10,
+    db: Session = Depends(get_db),
+    recommender=Depends(get_recommender)
+):
     """Obtenir des recommandations basées sur le contenu"""
     try:
         recommendations = recommender.content_based_filtering(db, user_id, top_n)
@@ -187,8 +372,13 @@ def get_content_recommendations(user_id: int, top_n: int = 10, db: Session = Dep
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération des recommandations: {str(e)}")
 
 
-@router.get("/recommendations/hybrid/{user_id}", response_model=List[RecommendationResponse])
-def get_hybrid_recommendations(user_id: int, top_n: int = 10, db: Session = Depends(get_db)):
+@ml_router.get("/recommendations/hybrid/{user_id}", response_model=List[RecommendationResponse])
+def get_hybrid_recommendations(
+    user_id: int,
+    top_n: int = 10,
+    db: Session = Depends(get_db),
+    recommender=Depends(get_recommender)
+):
     """Obtenir des recommandations hybrides"""
     try:
         recommendations = recommender.hybrid_recommendation(db, user_id, top_n)
@@ -197,8 +387,28 @@ def get_hybrid_recommendations(user_id: int, top_n: int = 10, db: Session = Depe
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération des recommandations: {str(e)}")
 
 
-@router.get("/recommendations/trending/", response_model=List[RecommendationResponse])
-def get_trending_products(category: str = None, top_n: int = 10, db: Session = Depends(get_db)):
+@ml_router.get("/recommendations/latent/{user_id}", response_model=List[RecommendationResponse])
+def get_latent_recommendations(
+    user_id: int,
+    top_n: int = 10,
+    db: Session = Depends(get_db),
+    recommender=Depends(get_recommender)
+):
+    """Obtenir des recommandations par facteurs latents (ALS)"""
+    try:
+        recommendations = recommender.latent_factor_recommendation(db, user_id, top_n)
+        return recommendations
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la génération des recommandations: {str(e)}")
+
+
+@ml_router.get("/recommendations/trending/", response_model=List[RecommendationResponse])
+def get_trending_products(
+    category: str = None,
+    top_n: int = 10,
+    db: Session = Depends(get_db),
+    recommender=Depends(get_recommender)
+):
     """Obtenir les produits tendance basés sur le sentiment"""
     try:
         recommendations = recommender.sentiment_weighted_recommendation(db, category, top_n)
@@ -211,46 +421,59 @@ def get_trending_products(category: str = None, top_n: int = 10, db: Session = D
 def get_dashboard_stats(db: Session = Depends(get_db)):
     """Obtenir les statistiques pour le dashboard"""
     try:
-        total_reviews = db.query(Review).count()
-        total_products = db.query(Product).count()
-        
-        positive_reviews = db.query(Review).filter(Review.sentiment == 'Positif').count()
-        neutral_reviews = db.query(Review).filter(Review.sentiment == 'Neutre').count()
-        negative_reviews = db.query(Review).filter(Review.sentiment == 'Négatif').count()
-        
-        # Note moyenne globale
-        all_reviews = db.query(Review).all()
-        avg_rating = sum(r.rating for r in all_reviews) / len(all_reviews) if all_reviews else 0
-        
-        # Sentiment moyen
-        avg_sentiment = sum(r.sentiment_score for r in all_reviews) / len(all_reviews) if all_reviews else 0
-        
-        # CORRECTION : Utilisation correcte de func
-        top_categories = db.query(
-            Product.category,
-            func.count(Product.id).label('count')
-        ).group_by(Product.category).order_by(desc(func.count(Product.id))).limit(5).all()
-        
-        return {
-            "total_reviews": total_reviews,
-            "total_products": total_products,
-            "positive_reviews": positive_reviews,
-            "neutral_reviews": neutral_reviews,
-            "negative_reviews": negative_reviews,
-            "avg_rating": round(avg_rating, 2),
-            "avg_sentiment": round(avg_sentiment, 2),
-            "sentiment_distribution": {
-                "positive_percentage": round((positive_reviews / total_reviews * 100) if total_reviews > 0 else 0, 1),
-                "neutral_percentage": round((neutral_reviews / total_reviews * 100) if total_reviews > 0 else 0, 1),
-                "negative_percentage": round((negative_reviews / total_reviews * 100) if total_reviews > 0 else 0, 1)
-            },
-            "top_categories": [{"category": cat[0], "count": cat[1]} for cat in top_categories]
-        }
+        # Agrégats SQL, mêmes totaux que l'instantané du flux /stream/dashboard
+        return dashboard_view(dashboard_totals(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
 
+@router.get("/trends/products/{product_id}", response_model=List[TrendPoint])
+def get_product_trend(
+    product_id: int,
+    period: str = 'week',
+    language: str = None,
+    start: date = None,
+    end: date = None,
+    db: Session = Depends(get_db)
+):
+    """Évolution du sentiment d'un produit par jour ou par semaine"""
+    if period not in rollups.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Période inconnue: {period}")
+    return rollups.trend(db, period, product_id=product_id, language=language, start=start, end=end)
+
+
+@router.get("/trends/categories/{category}", response_model=List[TrendPoint])
+def get_category_trend(
+    category: str,
+    period: str = 'week',
+    language: str = None,
+    start: date = None,
+    end: date = None,
+    db: Session = Depends(get_db)
+):
+    """Évolution du sentiment d'une catégorie par jour ou par semaine"""
+    if period not in rollups.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Période inconnue: {period}")
+    return rollups.trend(db, period, category=category, language=language, start=start, end=end)
+
+
+@router.get("/search/reviews", response_model=SearchResponse)
+def search_reviews(
+    q: str,
+    sentiment: str = None,
+    language: str = None,
+    product_id: int = None,
+    skip: int = 0,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """Recherche plein texte dans les avis : résultats classés et répartition sentiment / langue"""
+    if not settings.SEARCH_INDEX_ENABLED or not search.supported(db):
+        raise HTTPException(status_code=501, detail="Recherche plein texte non disponible")
+    return search.search(db, q, REVIEW_COLUMNS, sentiment, language, product_id, skip, min(limit, 100))
+
+
 # Endpoint de santé pour tester la connexion
 @router.get("/health/")
 def health_check():
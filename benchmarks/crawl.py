@@ -0,0 +1,142 @@
+"""
+Scraping incrémental contre un serveur local simulé : premier passage puis repassage
+
+Usage :
+    python -m benchmarks.crawl --pages 200 --reviews-per-page 30 --changed 0.1
+    python -m benchmarks.crawl --no-validators
+
+Le serveur sert des pages produit au format attendu par EcommerceScraper et
+gère If-None-Match / If-Modified-Since (sauf --no-validators : le contenu
+est alors comparé par empreinte). Entre les deux passages, une fraction
+--changed des pages reçoit un nouvel avis. Le passage sans état (comportement
+d'origine) sert de référence : tout est retéléchargé, réanalysé et renvoyé.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Habillage d'une vraie page produit (menus, scripts...) : l'essentiel des octets
+PAGE_CHROME = '<nav>' + ''.join(f'<a href="/c/{i}">Catégorie {i}</a>' for i in range(300)) + '</nav>'
+
+
+class StubSite:
+    def __init__(self, pages: int, reviews_per_page: int, validators: bool):
+        from services.corpora import make_corpus
+
+        corpus = make_corpus(pages * (reviews_per_page + 5))
+        self.validators = validators
+        self.reviews = {
+            i: [(4.0 + (j % 2), corpus[i * reviews_per_page + j]) for j in range(reviews_per_page)]
+            for i in range(pages)
+        }
+        self.extra = iter(corpus[pages * reviews_per_page:])
+        self.modified = dict.fromkeys(self.reviews, time.time() - 3600)
+
+    def add_review(self, page: int):
+        self.reviews[page].append((3.0, next(self.extra)))
+        self.modified[page] = time.time()
+
+    def render(self, page: int) -> bytes:
+        items = ''.join(
+            f'<div class="review-item"><div class="rating" data-rating="{rating}"></div>'
+            f'<p class="review-text">{text}</p></div>'
+            for rating, text in self.reviews[page]
+        )
+        return (
+            f'<html><body>{PAGE_CHROME}<h1 class="product-title">Produit {page}</h1>'
+            f'<span class="price">{100 + page} DH</span><span class="category">Électronique</span>'
+            f'<div class="description">Description du produit {page}</div>{items}</body></html>'
+        ).encode('utf-8')
+
+
+def make_handler(site: StubSite):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = int(self.path.rsplit('/', 1)[-1])
+            body = site.render(page)
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            last_modified = formatdate(int(site.modified[page]), usegmt=True)
+
+            if site.validators and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if site.validators:
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def crawl(scraper, urls):
+    scraper.stats.clear()
+    start = time.perf_counter()
+    reviews = 0
+    for url in urls:
+        found = scraper.scrape_jumia_reviews(url)
+        # Ingestion simulée : avis enregistrés, donc marqués vus
+        scraper.commit_fingerprints(found)
+        reviews += len(found)
+    elapsed = time.perf_counter() - start
+    return reviews, elapsed, dict(scraper.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût d'un repassage de scraping")
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--reviews-per-page', type=int, default=30)
+    parser.add_argument('--changed', type=float, default=0.1, help="Part des pages modifiées avant le repassage")
+    parser.add_argument('--no-validators', action='store_true', help="Serveur sans ETag ni Last-Modified")
+    args = parser.parse_args()
+
+    from services.crawl_state import CrawlState
+    from services.scraper import EcommerceScraper
+
+    site = StubSite(args.pages, args.reviews_per_page, validators=not args.no_validators)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(site))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_port}/product/{i}' for i in range(args.pages)]
+
+    state = CrawlState(os.path.join(tempfile.mkdtemp(prefix='feelya-crawl-'), 'state.db'))
+    incremental = EcommerceScraper(state=state, delay=0)
+    baseline = EcommerceScraper(delay=0)
+
+    results = [('premier passage', crawl(incremental, urls))]
+    changed = round(args.pages * args.changed)
+    for page in range(changed):
+        site.add_review(page * args.pages // max(changed, 1))
+    results.append(('repassage incrémental', crawl(incremental, urls)))
+    results.append(('repassage sans état', crawl(baseline, urls)))
+
+    print(f"{args.pages} pages, validateurs HTTP : {'non' if args.no_validators else 'oui'}")
+    print(f"{'':<24}{'avis':>8}{'Ko reçus':>10}{'analysées':>11}{'304':>6}{'inchangées':>12}{'temps s':>9}")
+    for label, (reviews, elapsed, stats) in results:
+        print(
+            f"{label:<24}{reviews:>8}{stats.get('bytes', 0) / 1024:>10.0f}{stats.get('parsed', 0):>11}"
+            f"{stats.get('not_modified', 0):>6}{stats.get('unchanged', 0):>12}{elapsed:>9.2f}"
+        )
+    print("\n« avis » : avis renvoyés, donc à insérer et à analyser en aval.")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Outils de mesure : latences, débit, mémoire et comparaison à une baseline
+"""
+
+import json
+import platform
+import resource
+import sys
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class StubSentimentModel:
+    """Remplace le pipeline transformers : sortie déterministe, sans réseau"""
+
+    LABELS = ['1 star', '2 stars', '3 stars', '4 stars', '5 stars']
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        for text in texts:
+            h = zlib.crc32(text.encode('utf-8'))
+            results.append({'label': self.LABELS[h % 5], 'score': 0.5 + (h % 500) / 1000})
+        return results
+
+
+def make_stub_analyzer(**kwargs):
+    """SentimentAnalyzer dont les pipelines transformers sont remplacés par le stub"""
+    from services.sentiment_analyzer import SentimentAnalyzer
+
+    class StubbedSentimentAnalyzer(SentimentAnalyzer):
+        def _load_models(self):
+            stub = StubSentimentModel()
+            self.models = {'fr': stub, 'ar': stub, 'darija': stub}
+
+    return StubbedSentimentAnalyzer(**kwargs)
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (Mo)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en Ko sur Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def measure(fn: Callable, inputs: Iterable, warmup: int = 3, batch_size: int = 1) -> Dict:
+    """Exécute fn sur chaque entrée et agrège les latences
+
+    batch_size indique le nombre d'éléments traités par appel, pour que le
+    débit soit exprimé en éléments/seconde.
+    """
+    inputs = list(inputs)
+    for item in inputs[:warmup]:
+        fn(item)
+
+    latencies = np.empty(len(inputs), dtype=np.float64)
+    start = time.perf_counter()
+    for i, item in enumerate(inputs):
+        t0 = time.perf_counter()
+        fn(item)
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - start
+
+    if not len(inputs):
+        return {'calls': 0}
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        'calls': len(inputs),
+        'items': len(inputs) * batch_size,
+        'total_s': round(elapsed, 4),
+        'throughput_per_s': round(len(inputs) * batch_size / elapsed, 2) if elapsed > 0 else None,
+        'mean_ms': round(float(latencies.mean()) * 1000, 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def environment_info() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+    }
+
+
+def save_results(results: Dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """Compare les p50/p95 et le débit à la baseline
+
+    Un benchmark est marqué en régression si sa latence p50 ou p95 dépasse
+    la baseline de plus de `tolerance` (20 % par défaut).
+    """
+    comparison = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or not current.get('calls'):
+            continue
+
+        row = {'benchmark': name, 'regression': False}
+        for key in ('p50_ms', 'p95_ms', 'throughput_per_s'):
+            before, after = previous.get(key), current.get(key)
+            if not before or after is None:
+                continue
+            ratio = after / before
+            row[key] = {'baseline': before, 'current': after, 'ratio': round(ratio, 3)}
+            if key != 'throughput_per_s' and ratio > 1 + tolerance:
+                row['regression'] = True
+        comparison.append(row)
+    return comparison
+
+
+def format_table(results: Dict, comparison: Optional[List[Dict]] = None) -> str:
+    ratios = {row['benchmark']: row for row in comparison or []}
+    lines = [f"{'benchmark':<38}{'débit/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS Mo':>9}{'vs base':>10}"]
+    for name, r in results['benchmarks'].items():
+        if not r.get('calls'):
+            continue
+        row = ratios.get(name)
+        versus = ''
+        if row and 'p50_ms' in row:
+            versus = f"{row['p50_ms']['ratio']:.2f}x" + (' ⚠' if row['regression'] else '')
+        lines.append(
+            f"{name:<38}{r['throughput_per_s'] or 0:>12.1f}{r['p50_ms']:>10.3f}"
+            f"{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['peak_rss_mb']:>9.1f}{versus:>10}"
+        )
+    return '\n'.join(lines)
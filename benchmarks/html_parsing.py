@@ -0,0 +1,86 @@
+"""
+Débit d'analyse HTML (pages/s) par backend du scraper
+
+Usage :
+    python -m benchmarks.html_parsing --fixtures ./pages_jumia/
+    python -m benchmarks.html_parsing --pages 50 --reviews-per-page 40
+
+--fixtures : dossier de pages produit enregistrées (*.html). Sans ce
+dossier, des pages au format attendu sont générées (serveur simulé de
+benchmarks/crawl.py, habillage de page réaliste) puis enregistrées dans un
+dossier temporaire. Tous les backends doivent extraire les mêmes avis.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Scripts et styles en ligne : une page réelle en contient des dizaines de Ko
+PAGE_ASSETS = (
+    '<head><style>' + '.c{color:#333;margin:0 auto}' * 400 + '</style>'
+    '<script>' + 'window.dataLayer=window.dataLayer||[];' * 400 + '</script></head>'
+)
+
+
+def write_fixtures(directory: str, pages: int, reviews_per_page: int):
+    from benchmarks.crawl import StubSite
+
+    site = StubSite(pages, reviews_per_page, validators=False)
+    for page in range(pages):
+        html = site.render(page).replace(b'<html>', b'<html>' + PAGE_ASSETS.encode('utf-8'), 1)
+        with open(os.path.join(directory, f'product_{page}.html'), 'wb') as f:
+            f.write(html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pages/s par backend HTML")
+    parser.add_argument('--fixtures', default=None, help="Dossier de pages enregistrées (*.html)")
+    parser.add_argument('--site', default='jumia')
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--reviews-per-page', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from services.html_parsers import available_backends, get_parser, load_selectors
+
+    directory = args.fixtures
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix='feelya-pages-')
+        write_fixtures(directory, args.pages, args.reviews_per_page)
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    if not pages:
+        sys.exit(f"Aucune page *.html dans {directory}")
+
+    site = load_selectors()[args.site]
+    print(f"{len(pages)} pages ({sum(map(len, pages)) / len(pages) / 1024:.0f} Ko en moyenne), site {args.site}")
+    print(f"{'backend':<12}{'pages/s':>10}{'avis/page':>11}{'vs bs4-full':>13}")
+
+    reference, baseline = None, None
+    for backend in reversed(available_backends()):
+        html_parser = get_parser(backend)
+        extracted = [html_parser.reviews(page, site) for page in pages]
+        if reference is None:
+            reference = extracted
+        elif extracted != reference:
+            print(f"⚠️  {backend} : avis extraits différents de bs4-full")
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for page in pages:
+                html_parser.reviews(page, site)
+        rate = args.repeat * len(pages) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        reviews = sum(map(len, extracted)) / len(pages)
+        print(f"{backend:<12}{rate:>10.0f}{reviews:>11.1f}{rate / baseline:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Montée en charge du serveur d'inférence : débit et mémoire selon le nombre de workers
+
+Usage :
+    python -m benchmarks.inference_scaling --workers 1,2,4 --requests 2000
+    python -m benchmarks.inference_scaling --real-model --batch-size 8
+
+La mémoire est mesurée en PSS (Proportional Set Size, /proc/<pid>/smaps_rollup) :
+les pages partagées après le fork ne sont comptées qu'une fois, à l'inverse
+de la somme des RSS. Linux uniquement.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _memory_kb(pid: int, field: str) -> int:
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _run_server(socket_path, workers, threads, real_model):
+    from benchmarks.harness import make_stub_analyzer
+    from services.inference_server import InferenceServer
+    from services.sentiment_analyzer import SentimentAnalyzer
+
+    analyzer = SentimentAnalyzer(backend='bert') if real_model else make_stub_analyzer(backend='bert')
+    server = InferenceServer(socket_path, workers, threads, analyzer=analyzer)
+    server.serve_forever()
+
+
+def run(workers, args, batches):
+    from services.inference_server import InferenceClient
+
+    socket_path = os.path.join(tempfile.mkdtemp(), 'inference.sock')
+    process = get_context('fork').Process(
+        target=_run_server, args=(socket_path, workers, args.threads_per_worker, args.real_model)
+    )
+    process.start()
+    while not os.path.exists(socket_path) or len(_children(process.pid)) < workers:
+        time.sleep(0.05)
+
+    client = InferenceClient(socket_path)
+    texts, languages = batches[0]
+    client._request({'texts': texts, 'languages': languages})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(lambda b: client._request({'texts': b[0], 'languages': b[1]}), batches))
+    elapsed = time.perf_counter() - start
+
+    pids = [process.pid] + _children(process.pid)
+    pss = sum(_memory_kb(pid, 'Pss') for pid in pids) / 1024
+    rss = sum(_memory_kb(pid, 'Rss') for pid in pids) / 1024
+
+    process.terminate()
+    process.join()
+    return len(batches) * args.batch_size / elapsed, pss, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit et mémoire du serveur d'inférence")
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--real-model', action='store_true', help="Utiliser les vrais modèles transformers")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+    from services.corpora import make_corpus
+    from services.preprocessor import TextPreprocessor
+
+    preprocessor = TextPreprocessor()
+    prepared = [preprocessor.preprocess(t) for t in make_corpus(args.requests * args.batch_size)]
+    batches = []
+    for i in range(0, len(prepared), args.batch_size):
+        chunk = prepared[i:i + args.batch_size]
+        batches.append(([p for p, _ in chunk], [l for _, l in chunk]))
+
+    print(f"CPU disponibles : {os.cpu_count()}")
+    print(f"{'workers':>8}{'avis/s':>12}{'PSS Mo':>10}{'ΣRSS Mo':>10}")
+    for workers in [int(w) for w in args.workers.split(',')]:
+        throughput, pss, rss = run(workers, args, batches)
+        print(f"{workers:>8}{throughput:>12.0f}{pss:>10.1f}{rss:>10.1f}")
+
+    if not args.real_model:
+        print("\n⚠️  BERT est simulé (stub) : seuls le surcoût IPC et la mémoire de base sont mesurés.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Coût du flux dashboard (SSE) selon le nombre d'abonnés, comparé au polling
+
+Usage :
+    python -m benchmarks.live_feed --subscribers 100,1000,5000 --reviews 50000
+
+Polling : chaque dashboard recalcule les statistiques à chaque intervalle,
+soit N calculs SQL par tick. Flux : un seul tick (deltas + sérialisation)
+puis dépôt de la même trame dans N files. Une part --slow des abonnés lit
+plus lentement que le rythme des ticks : leur file déborde et ils sont
+resynchronisés par instantané sans ralentir les autres.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+async def run_feed(feed, subscribers: int, slow: float, seconds: float, rate: float):
+    delivered = [0] * subscribers
+
+    async def consume(index, delay):
+        async for _ in feed.stream():
+            delivered[index] += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    slow_count = int(subscribers * slow)
+    tasks = [
+        asyncio.create_task(consume(i, feed.tick * 3 if i < slow_count else 0))
+        for i in range(subscribers)
+    ]
+
+    tick_times = []
+    original_tick = feed._tick
+
+    def timed_tick():
+        start = time.perf_counter()
+        original_tick()
+        tick_times.append(time.perf_counter() - start)
+
+    feed._tick = timed_tick
+    feed.start()
+
+    stop = threading.Event()
+
+    def producer():
+        # Ingestion simulée : routes synchrones dans d'autres threads
+        i = 0
+        while not stop.is_set():
+            feed.publish_review({'id': i, 'sentiment': 'Positif', 'rating': 4.0, 'sentiment_score': 0.8, 'text': 'Très bon produit'})
+            i += 1
+            time.sleep(1 / rate)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    await asyncio.sleep(seconds)
+    stop.set()
+    feed.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    fast = delivered[slow_count:] or [0]
+    return tick_times, sum(fast) / len(fast)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flux dashboard : coût par tick selon les abonnés")
+    parser.add_argument('--subscribers', default='100,1000,5000')
+    parser.add_argument('--reviews', type=int, default=50_000, help="Taille de la base pour le coût du polling")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--tick', type=float, default=0.25)
+    parser.add_argument('--rate', type=float, default=200.0, help="Avis ingérés par seconde")
+    parser.add_argument('--slow', type=float, default=0.05, help="Part d'abonnés lents")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='feelya-feed-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from sqlalchemy.orm import sessionmaker
+
+    from benchmarks.harness import measure
+    from scripts.generate_synthetic_data import generate, make_engine
+    from services.live_feed import LiveFeed, dashboard_totals, feed_resyncs
+
+    engine = make_engine(os.environ['DATABASE_URL'])
+    generate(engine, 1000, 500, args.reviews, verbose=False)
+    db = sessionmaker(bind=engine)()
+    totals = dashboard_totals(db)
+    poll_ms = measure(lambda _: dashboard_totals(db), range(10))['p50_ms']
+    db.close()
+
+    print(f"Calcul des statistiques ({args.reviews} avis) : {poll_ms:.1f} ms par dashboard et par tick en polling")
+    print(f"{'abonnés':>8}{'polling ms/tick':>17}{'flux ms/tick':>14}{'ticks':>7}{'trames/abonné':>15}{'resync':>8}")
+    for subscribers in [int(s) for s in args.subscribers.split(',')]:
+        feed = LiveFeed(tick=args.tick, queue_size=4, refresh=0)
+        feed.totals = dict(totals)
+        resyncs = feed_resyncs.value()
+        tick_times, frames = asyncio.run(run_feed(feed, subscribers, args.slow, args.seconds, args.rate))
+        tick_ms = sum(tick_times) / max(len(tick_times), 1) * 1000
+        print(
+            f"{subscribers:>8}{poll_ms * subscribers:>17.0f}{tick_ms:>14.2f}{len(tick_times):>7}"
+            f"{frames:>15.1f}{feed_resyncs.value() - resyncs:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Avis longs : troncature à 512 caractères contre segments notés en un lot
+
+Usage :
+    python -m benchmarks.long_reviews --size 200
+    python -m benchmarks.long_reviews --size 200 --real-model --segment-chars 200,400
+
+Pour chaque avis long du corpus synthétique sont mesurés la latence, la
+part du texte vue par le modèle et l'accord entre les deux approches.
+Sans --real-model, BERT est remplacé par le stub déterministe : la latence
+reflète alors seulement le découpage et l'agrégation, et l'accord n'a pas
+de sens (étiquettes tirées d'un hachage du texte). Le gain réel vient de
+l'attention, quadratique en longueur, calculée sur des segments courts.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avis longs : troncature contre segments")
+    parser.add_argument('--size', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--segment-chars', default='200,400')
+    parser.add_argument('--aggregation', default='length', choices=['length', 'confidence'])
+    parser.add_argument('--real-model', action='store_true', help="Pipelines transformers au lieu du stub")
+    args = parser.parse_args()
+
+    from services.corpora import make_corpus
+    from benchmarks.harness import make_stub_analyzer, measure
+    from services.preprocessor import TextPreprocessor, split_segments
+    from services.sentiment_analyzer import SentimentAnalyzer
+
+    preprocessor = TextPreprocessor()
+    corpus = make_corpus(args.size, seed=args.seed, long_ratio=1.0)
+    processed, languages = preprocessor.preprocess_batch(corpus)
+    prepared = list(zip(corpus, processed, languages))
+    print(f"{len(corpus)} avis longs, {sum(map(len, corpus)) / len(corpus):.0f} caractères en moyenne")
+
+    def build(segment_chars):
+        kwargs = dict(backend='bert', segment_chars=segment_chars, aggregation=args.aggregation)
+        return SentimentAnalyzer(**kwargs) if args.real_model else make_stub_analyzer(**kwargs)
+
+    # Ancien comportement : une passe sur les 512 premiers caractères du texte prétraité
+    analyzer = build(None)
+
+    def truncated(item):
+        raw, text, language = item
+        model = analyzer.models.get(language, analyzer.models['fr'])
+        label = model(text[:512])[0]
+        return analyzer._convert_label_to_sentiment(label['label'], label['score'])[0]
+
+    reference = [truncated(item) for item in prepared]
+    timing = measure(truncated, prepared)
+    coverage = sum(min(len(text), 512) for _, text, _ in prepared) / sum(len(text) for _, text, _ in prepared)
+    print(f"{'mode':<16}{'p50 ms':>9}{'p95 ms':>9}{'texte vu':>10}{'segments':>10}{'accord':>9}")
+    print(f"{'tronqué 512':<16}{timing['p50_ms']:>9.2f}{timing['p95_ms']:>9.2f}{coverage:>10.0%}{1:>10.1f}{'-':>9}")
+
+    for segment_chars in [int(c) for c in args.segment_chars.split(',')]:
+        analyzer = build(segment_chars)
+        results = [analyzer.analyze(text, language, raw_text=raw) for raw, text, language in prepared]
+        timing = measure(lambda item: analyzer.analyze(item[1], item[2], raw_text=item[0]), prepared)
+        segments = sum(len(split_segments(raw, language, segment_chars)) for raw, _, language in prepared) / len(prepared)
+        agreement = sum(r['sentiment'] == ref for r, ref in zip(results, reference)) / len(prepared)
+        name = f"segments {segment_chars}"
+        print(f"{name:<16}{timing['p50_ms']:>9.2f}{timing['p95_ms']:>9.2f}{1:>10.0%}{segments:>10.1f}{agreement:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Instantané produits partagé : construction, empreinte mémoire et latence
+
+Usage :
+    python -m benchmarks.product_snapshot --products 50000
+    python -m benchmarks.product_snapshot --products 200000 --workers 1,2,4,8
+
+Mesure le temps de construction et la taille du fichier, la latence de la
+recommandation « tendances » avec une ligne ORM par produit (ancienne
+implémentation) contre les colonnes de l'instantané, puis la mémoire de N
+processus (comme N workers uvicorn) qui chargent l'instantané : projeté en
+mémoire (pages partagées) ou recopié dans chaque processus. La mémoire est
+mesurée en PSS (/proc/<pid>/smaps_rollup), qui répartit les pages
+partagées entre les processus qui les projettent. Linux uniquement.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.inference_scaling import _memory_kb
+
+
+def orm_trending(db, category=None, top_n=10):
+    """Ancienne implémentation : un objet ORM par produit et un score Python"""
+    from models.database import Product
+
+    query = db.query(Product).filter(Product.total_reviews >= 5)
+    if category:
+        query = query.filter(Product.category == category)
+    scored = [{
+        'product_id': p.id,
+        'score': (p.sentiment_score + 1) / 2 * 0.5 + min(p.total_reviews / 100, 1.0) * 0.3 + p.avg_rating / 5.0 * 0.2,
+    } for p in query.all()]
+    scored.sort(key=lambda x: x['score'], reverse=True)
+    return scored[:top_n]
+
+
+def _worker(path, mode, ready, done):
+    import numpy as np
+
+    from services.product_snapshot import ProductSnapshot
+
+    baseline = _memory_kb(os.getpid(), 'Pss')
+    snapshot = ProductSnapshot(path)
+    columns = list(snapshot.header['columns'])
+    if mode == 'copy':
+        # Chaque worker garde sa propre copie des colonnes
+        snapshot = {name: np.array(getattr(snapshot, name)) for name in columns}
+        checksum = sum(float(array.sum()) for array in snapshot.values())
+    else:
+        checksum = sum(float(getattr(snapshot, name).sum()) for name in columns)
+    ready.put((os.getpid(), baseline, checksum))
+    done.wait()
+
+
+def measure_workers(path, workers, mode):
+    """Surcoût PSS total (Mo) de l'instantané dans N processus"""
+    context = get_context('spawn')
+    ready, done = context.Queue(), context.Event()
+    processes = [context.Process(target=_worker, args=(path, mode, ready, done)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    started = [ready.get() for _ in processes]
+    # Lu une fois tous les processus chargés : les pages partagées sont réparties entre eux
+    overhead = sum(_memory_kb(pid, 'Pss') - baseline for pid, baseline, _ in started) / 1024
+    done.set()
+    for process in processes:
+        process.join()
+    return overhead
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantané produits partagé entre workers")
+    parser.add_argument('--products', type=int, default=50_000)
+    parser.add_argument('--reviews-per-product', type=int, default=10)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='feelya-snapshot-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    path = os.path.join(tmpdir, 'product_snapshot.bin')
+
+    from benchmarks.harness import measure
+    from models.database import SessionLocal, engine
+    from scripts.generate_synthetic_data import generate
+    from services.product_snapshot import ProductSnapshotStore
+    from services.recommender import RecommendationEngine
+
+    generate(engine, max(args.products // 10, 1), args.products, args.products * args.reviews_per_product,
+             seed=args.seed, verbose=False)
+
+    store = ProductSnapshotStore(path=path, refresh=3600)
+    snapshot = store.get()
+    build = store.last_build
+    print(f"{snapshot.size} produits, {len(snapshot.categories)} catégories")
+    print(f"Construction : {build['seconds'] * 1000:.0f} ms, fichier {build['bytes'] / 1024 / 1024:.2f} Mo "
+          f"({build['bytes'] / max(snapshot.size, 1):.0f} octets/produit)")
+
+    recommender = RecommendationEngine(products=store)
+    db = SessionLocal()
+    try:
+        categories = [None] + [c for c in snapshot.categories if c][:4]
+        calls = [categories[i % len(categories)] for i in range(args.calls)]
+        print(f"{'tendances':<16}{'p50 ms':>9}{'p95 ms':>9}")
+        for name, method in [('ORM', orm_trending), ('instantané', recommender.sentiment_weighted_recommendation)]:
+            timing = measure(lambda category: method(db, category, 10), calls)
+            print(f"{name:<16}{timing['p50_ms']:>9.2f}{timing['p95_ms']:>9.2f}")
+    finally:
+        db.close()
+
+    print(f"{'workers':<10}{'mmap Mo':>10}{'copie Mo':>10}")
+    for workers in [int(w) for w in args.workers.split(',')]:
+        shared = measure_workers(path, workers, 'mmap')
+        copied = measure_workers(path, workers, 'copy')
+        print(f"{workers:<10}{shared:>10.2f}{copied:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Recommandation : latence et qualité (hit@N) des méthodes existantes contre ALS
+
+Usage :
+    python -m benchmarks.recommenders --users 5000 --products 5000 --reviews-per-user 20
+    python -m benchmarks.recommenders --factors 32,64,128
+
+Le corpus synthétique de generate_synthetic_data ne relie pas utilisateurs
+et produits (tirages indépendants) : aucune méthode ne peut y généraliser.
+Ce benchmark plante donc des goûts : chaque utilisateur et chaque produit
+appartiennent à un groupe caché, l'utilisateur note surtout des produits
+de son groupe (bonnes notes, avis positifs) et quelques autres (mauvaises
+notes, avis négatifs). Pour un échantillon d'utilisateurs, un avis positif
+est retiré de la base ; hit@N = part des utilisateurs dont le produit
+retiré figure dans les N premières recommandations.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def plant_reviews(engine, n_users: int, n_products: int, per_user: int, groups: int, holdout_users: int, seed: int):
+    """Avis à goûts de groupe ; renvoie {utilisateur: produit retiré}"""
+    from sqlalchemy import bindparam, insert, update
+
+    from models.database import Product, Review
+
+    rng = np.random.default_rng(seed)
+    user_group = rng.integers(0, groups, size=n_users)
+    product_group = rng.integers(0, groups, size=n_products)
+    members = [np.flatnonzero(product_group == g) for g in range(groups)]
+    now = datetime.utcnow()
+
+    holdout = {}
+    eligible = set(rng.choice(n_users, size=min(holdout_users, n_users), replace=False).tolist())
+    rows = []
+    for user in range(n_users):
+        count = max(3, int(rng.poisson(per_user)))
+        liked = rng.choice(members[user_group[user]], size=min(int(count * 0.8), len(members[user_group[user]])), replace=False)
+        other = rng.choice(n_products, size=count - len(liked), replace=False)
+        if user in eligible and len(liked) > 1:
+            holdout[user + 1] = int(liked[-1]) + 1
+            liked = liked[:-1]
+        for product, good in [(p, True) for p in liked] + [(p, product_group[p] == user_group[user]) for p in other]:
+            rating = float(rng.uniform(4, 5) if good else rng.uniform(1, 3))
+            score = float(rng.uniform(0.4, 1.0) if good else rng.uniform(-1.0, 0.1))
+            rows.append({
+                'user_id': user + 1, 'product_id': int(product) + 1, 'rating': round(rating, 1),
+                'text': 'Très bon produit' if good else 'Déçu', 'language': 'fr',
+                'sentiment': 'Positif' if score > 0.3 else 'Négatif', 'sentiment_score': score,
+                'confidence': 0.9, 'processed': True, 'created_at': now,
+            })
+
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 50_000):
+            conn.execute(insert(Review), rows[start:start + 50_000])
+
+    # Agrégats produits : le filtrage par contenu ne retient que les produits bien notés
+    products = np.array([r['product_id'] for r in rows]) - 1
+    totals = np.bincount(products, minlength=n_products)
+    scores = np.bincount(products, weights=[r['sentiment_score'] for r in rows], minlength=n_products)
+    ratings = np.bincount(products, weights=[r['rating'] for r in rows], minlength=n_products)
+    table = Product.__table__
+    with engine.begin() as conn:
+        conn.execute(
+            update(table).where(table.c.id == bindparam('b_id')).values(
+                total_reviews=bindparam('b_total'),
+                sentiment_score=bindparam('b_score'),
+                avg_rating=bindparam('b_rating'),
+            ),
+            [{'b_id': int(i) + 1, 'b_total': int(totals[i]), 'b_score': float(scores[i] / totals[i]),
+              'b_rating': float(ratings[i] / totals[i])} for i in np.flatnonzero(totals)]
+        )
+    return holdout, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommandation : méthodes existantes contre ALS")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--reviews-per-user', type=int, default=15)
+    parser.add_argument('--groups', type=int, default=20, help="Groupes de goûts cachés")
+    parser.add_argument('--holdout', type=int, default=200, help="Utilisateurs évalués")
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--factors', default='64', help="Tailles de facteurs ALS, séparées par des virgules")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='feelya-reco-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ['ALS_MODEL_PATH'] = os.path.join(tmpdir, 'als_model.joblib')
+
+    from benchmarks.harness import measure
+    from models.database import SessionLocal, engine
+    from scripts.generate_synthetic_data import generate
+    from services.recommender import ImplicitALS, RecommendationEngine, load_interactions
+
+    generate(engine, args.users, args.products, 0, seed=args.seed, verbose=False)
+    holdout, n_reviews = plant_reviews(
+        engine, args.users, args.products, args.reviews_per_user, args.groups, args.holdout, args.seed
+    )
+    users = sorted(holdout)
+    print(f"{args.users} utilisateurs, {args.products} produits, {n_reviews} avis, {len(users)} utilisateurs évalués")
+
+    recommender = RecommendationEngine()
+    db = SessionLocal()
+    try:
+        interactions = load_interactions(db)
+        methods = {
+            'collaborative': recommender.collaborative_filtering,
+            'content': recommender.content_based_filtering,
+            'hybrid': recommender.hybrid_recommendation,
+        }
+        for factors in [int(f) for f in args.factors.split(',')]:
+            model = ImplicitALS(factors=factors).fit(*interactions)
+            print(f"ALS {factors} facteurs : entraînement {model.train_seconds:.2f}s, facteurs float32 {model.nbytes / 1024:.0f} Ko")
+            latent = RecommendationEngine()
+            latent.latent_model = model
+            methods[f'latent-{factors}'] = latent.latent_factor_recommendation
+
+        print(f"{'méthode':<16}{'p50 ms':>9}{'p95 ms':>9}{f'hit@{args.top_n}':>9}")
+        for name, method in methods.items():
+            found = {}
+
+            def recommend(user):
+                found[user] = holdout[user] in {rec['product_id'] for rec in method(db, user, args.top_n)}
+
+            # Une passe : latence mesurée sur les appels qui donnent le hit@N
+            timing = measure(recommend, users, warmup=0)
+            hits = sum(found.values())
+            print(f"{name:<16}{timing['p50_ms']:>9.2f}{timing['p95_ms']:>9.2f}{hits / len(users):>9.1%}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Suite de benchmarks FEELya (prétraitement, inférence, recommandation, API)
+
+Usage :
+    python -m benchmarks.run --scale small --output bench_results.json
+    python -m benchmarks.run --scale small --save-baseline
+    python -m benchmarks.run --scale small --baseline benchmarks/baseline.json
+
+Le modèle de sentiment est remplacé par un stub déterministe : la suite
+tourne hors ligne et mesure le code de FEELya, pas le forward BERT.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SCALES = {
+    'tiny': {'users': 50, 'products': 100, 'reviews': 1000, 'corpus': 300, 'calls': 50},
+    'small': {'users': 500, 'products': 1000, 'reviews': 20000, 'corpus': 2000, 'calls': 200},
+    'medium': {'users': 5000, 'products': 10000, 'reviews': 200000, 'corpus': 10000, 'calls': 500},
+    'large': {'users': 50000, 'products': 50000, 'reviews': 2000000, 'corpus': 50000, 'calls': 1000},
+}
+
+GROUPS = ['preprocess', 'analyze', 'recommend', 'api']
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks FEELya")
+    parser.add_argument('--scale', choices=SCALES.keys(), default='small')
+    parser.add_argument('--only', default=','.join(GROUPS), help="Groupes à exécuter, séparés par des virgules")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Fichier JSON de résultats")
+    parser.add_argument('--baseline', default=None, help="Baseline JSON à comparer")
+    parser.add_argument('--save-baseline', action='store_true', help="Enregistrer les résultats comme baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Régression tolérée sur p50/p95 (0.2 = +20%%)")
+    parser.add_argument('--database-url', default=None, help="Base à utiliser (par défaut : SQLite temporaire)")
+    return parser.parse_args()
+
+
+def setup_environment(args):
+    """Configure la base et le mode hors ligne AVANT d'importer l'application"""
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+        return None
+    tmpdir = tempfile.mkdtemp(prefix='feelya-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    return tmpdir
+
+
+def bench_preprocess(scale, seed, results):
+    from services.corpora import make_corpus
+    from benchmarks.harness import measure
+    from services.preprocessor import TextPreprocessor
+
+    preprocessor = TextPreprocessor()
+    corpus = make_corpus(scale['corpus'], seed=seed)
+    long_corpus = make_corpus(scale['calls'], seed=seed + 1, long_ratio=1.0)
+
+    results['preprocess.preprocess'] = measure(preprocessor.preprocess, corpus)
+    results['preprocess.preprocess_long'] = measure(preprocessor.preprocess, long_corpus)
+    # Sans le cache LRU : le corpus synthétique répète les mêmes textes
+    results['preprocess.detect_language'] = measure(preprocessor._detect_language, corpus)
+    results['preprocess.detect_language_long'] = measure(preprocessor._detect_language, long_corpus)
+    batches = [corpus[i:i + 256] for i in range(0, len(corpus), 256)]
+    results['preprocess.detect_languages_batch256'] = measure(preprocessor.detect_languages, batches, batch_size=256)
+
+
+def bench_analyze(scale, seed, results):
+    from services.corpora import make_corpus
+    from benchmarks.harness import make_stub_analyzer, measure
+    from services.preprocessor import TextPreprocessor
+
+    preprocessor = TextPreprocessor()
+    analyzer = make_stub_analyzer()
+    prepared = [preprocessor.preprocess(text) for text in make_corpus(scale['corpus'], seed=seed)]
+
+    results['analyze.analyze_stub'] = measure(lambda item: analyzer.analyze(*item), prepared)
+    results['analyze.simple_sentiment'] = measure(
+        lambda item: analyzer._simple_sentiment_analysis(*item), prepared
+    )
+    results['analyze.end_to_end_stub'] = measure(
+        lambda text: analyzer.analyze(*preprocessor.preprocess(text)),
+        make_corpus(scale['calls'], seed=seed + 2)
+    )
+
+
+def bench_recommend(scale, seed, results):
+    from benchmarks.harness import measure
+    from models.database import SessionLocal
+    from services.recommender import RecommendationEngine
+
+    rng = random.Random(seed)
+    engine = RecommendationEngine()
+    user_ids = [rng.randint(1, scale['users']) for _ in range(scale['calls'])]
+    product_ids = [rng.randint(1, scale['products']) for _ in range(scale['calls'])]
+    categories = [None] + [f"{c}" for c in ("Électronique", "Audio", "Mode")]
+
+    db = SessionLocal()
+    try:
+        engine.product_index.build(db)
+        results['recommend.collaborative'] = measure(lambda u: engine.collaborative_filtering(db, u), user_ids)
+        results['recommend.content'] = measure(lambda u: engine.content_based_filtering(db, u), user_ids)
+        results['recommend.hybrid'] = measure(lambda u: engine.hybrid_recommendation(db, u), user_ids)
+        results['recommend.trending'] = measure(
+            lambda c: engine.sentiment_weighted_recommendation(db, c),
+            [categories[i % len(categories)] for i in range(max(10, scale['calls'] // 10))]
+        )
+        results['recommend.similar_products'] = measure(lambda p: engine.similar_products(db, p), product_ids)
+    finally:
+        db.close()
+
+
+def bench_api(scale, seed, results):
+    from fastapi.testclient import TestClient
+    from services.corpora import make_corpus
+    from benchmarks.harness import make_stub_analyzer, measure
+    from api.dependencies import get_sentiment_analyzer
+    from main import app
+
+    # Avant tout appel : l'ordonnanceur est construit avec l'analyseur fourni
+    get_sentiment_analyzer.override(make_stub_analyzer())
+    client = TestClient(app)
+    rng = random.Random(seed)
+    calls = scale['calls']
+
+    def get(path):
+        response = client.get(path)
+        response.raise_for_status()
+
+    results['api.health'] = measure(get, ['/health'] * calls)
+    results['api.products_list'] = measure(get, [f"/api/v1/products/?limit=100&skip={rng.randint(0, 50)}" for _ in range(calls)])
+    results['api.product_detail'] = measure(get, [f"/api/v1/products/{rng.randint(1, scale['products'])}" for _ in range(calls)])
+    results['api.reviews_list'] = measure(get, [f"/api/v1/reviews/?limit=100&skip={rng.randint(0, 1000)}" for _ in range(calls)])
+    results['api.hybrid'] = measure(get, [f"/api/v1/recommendations/hybrid/{rng.randint(1, scale['users'])}" for _ in range(calls)])
+    results['api.trending'] = measure(get, ['/api/v1/recommendations/trending/'] * max(10, calls // 10))
+    results['api.dashboard'] = measure(get, ['/api/v1/stats/dashboard/'] * max(5, calls // 20))
+
+    def analyze(text):
+        client.post('/api/v1/analyze-sentiment/', json={'text': text}).raise_for_status()
+
+    results['api.analyze_sentiment'] = measure(analyze, make_corpus(calls, seed=seed + 3))
+
+
+def main():
+    args = parse_args()
+    tmpdir = setup_environment(args)
+    scale = SCALES[args.scale]
+    groups = [g.strip() for g in args.only.split(',') if g.strip()]
+
+    from benchmarks.harness import (
+        compare_to_baseline, environment_info, format_table,
+        load_results, save_results
+    )
+    from models.database import engine
+
+    if tmpdir:
+        print(f"🧪 Génération des données synthétiques ({args.scale})...")
+        from scripts.generate_synthetic_data import generate
+        generate(engine, scale['users'], scale['products'], scale['reviews'], seed=args.seed, verbose=False)
+
+    benchmarks = {}
+    runners = {
+        'preprocess': bench_preprocess,
+        'analyze': bench_analyze,
+        'recommend': bench_recommend,
+        'api': bench_api,
+    }
+    for group in groups:
+        print(f"⏱️  {group}...")
+        runners[group](scale, args.seed, benchmarks)
+
+    results = {
+        'meta': {
+            'scale': args.scale,
+            'dataset': scale,
+            'seed': args.seed,
+            'groups': groups,
+            'timestamp': datetime.utcnow().isoformat(),
+            'environment': environment_info(),
+        },
+        'benchmarks': benchmarks,
+    }
+
+    comparison = None
+    if args.baseline:
+        comparison = compare_to_baseline(results, load_results(args.baseline), args.tolerance)
+        results['comparison'] = comparison
+
+    print()
+    print(format_table(results, comparison))
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"\n📄 Résultats écrits dans {args.output}")
+    if args.save_baseline:
+        save_results(results, DEFAULT_BASELINE)
+        print(f"📌 Baseline enregistrée dans {DEFAULT_BASELINE}")
+
+    if comparison and any(row['regression'] for row in comparison):
+        regressions = [row['benchmark'] for row in comparison if row['regression']]
+        print(f"\n❌ Régressions détectées : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
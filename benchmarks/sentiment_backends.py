@@ -0,0 +1,103 @@
+"""
+Comparaison des backends de sentiment : précision et débit côte à côte
+
+Usage :
+    python -m benchmarks.sentiment_backends --size 5000
+    python -m benchmarks.sentiment_backends --labelled avis.csv --real-model
+
+Sans --real-model, BERT est remplacé par le stub déterministe : le débit
+du mode « tiered » reflète alors surtout la part d'avis escaladés.
+Le CSV étiqueté doit contenir les colonnes text, label (Positif / Neutre /
+Négatif) et optionnellement language.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def load_labelled_csv(path, preprocessor):
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            language = row.get('language') or preprocessor.detect_language(row['text'])
+            corpus.append((row['text'], language, row['label']))
+    return corpus
+
+
+def evaluate(analyzer, prepared):
+    """Retourne précision, débit et part d'appels BERT pour un backend"""
+    from services import metrics
+
+    before = metrics.sentiment_backend_calls.value('bert')
+    correct = 0
+    start = time.perf_counter()
+    for raw, processed, language, label in prepared:
+        result = analyzer.analyze(processed, language, raw_text=raw)
+        correct += result['sentiment'] == label
+    elapsed = time.perf_counter() - start
+    bert_calls = metrics.sentiment_backend_calls.value('bert') - before
+
+    return {
+        'accuracy': correct / len(prepared),
+        'reviews_per_s': len(prepared) / elapsed if elapsed > 0 else float('inf'),
+        'bert_share': bert_calls / len(prepared),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précision et débit par backend de sentiment")
+    parser.add_argument('--size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--labelled', default=None, help="CSV étiqueté (text,label[,language])")
+    parser.add_argument('--real-model', action='store_true', help="Utiliser les vrais modèles transformers")
+    parser.add_argument('--thresholds', default='0.4,0.6,0.8', help="Seuils de confiance testés en mode tiered")
+    args = parser.parse_args()
+
+    if not args.real_model:
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+    from services.corpora import make_labelled_corpus
+    from benchmarks.harness import make_stub_analyzer
+    from services import metrics
+    from services.preprocessor import TextPreprocessor
+    from services.sentiment_analyzer import SentimentAnalyzer
+
+    metrics.registry.enabled = True
+    preprocessor = TextPreprocessor()
+    if args.labelled:
+        corpus = load_labelled_csv(args.labelled, preprocessor)
+    else:
+        corpus = make_labelled_corpus(args.size, seed=args.seed)
+
+    prepared = []
+    for text, language, label in corpus:
+        processed, detected = preprocessor.preprocess(text)
+        prepared.append((text, processed, language or detected, label))
+
+    factory = SentimentAnalyzer if args.real_model else make_stub_analyzer
+    configurations = [('bert', None), ('lexicon', None)]
+    configurations += [('tiered', float(t)) for t in args.thresholds.split(',')]
+
+    # Une seule instance : les pipelines ne sont chargés qu'une fois
+    analyzer = factory(backend='bert')
+    default_threshold = analyzer.lexicon_threshold
+    print(f"{'backend':<22}{'précision':>11}{'avis/s':>12}{'part BERT':>11}")
+    for backend, threshold in configurations:
+        analyzer.backend = backend
+        analyzer.lexicon_threshold = default_threshold if threshold is None else threshold
+        result = evaluate(analyzer, prepared)
+        name = backend if threshold is None else f"{backend} (seuil {threshold})"
+        print(f"{name:<22}{result['accuracy']:>10.1%}{result['reviews_per_s']:>12.0f}{result['bert_share']:>10.1%}")
+
+    if not args.real_model:
+        print("\n⚠️  BERT est simulé (stub) : sa précision n'est pas significative.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Part de la sérialisation dans les endpoints de liste, avant / après le chemin rapide
+
+Usage :
+    python -m benchmarks.serialization --reviews 50000 --limits 100,500,2000
+
+« avant » reproduit le chemin FastAPI d'origine : objets ORM, validation
+from_attributes, dump JSON Pydantic puis json.dumps (JSONResponse).
+« après » est le chemin de api/responses.py : tuples SQL puis orjson.
+La compression gzip est mesurée à part.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de sérialisation des listes")
+    parser.add_argument('--reviews', type=int, default=50_000)
+    parser.add_argument('--limits', default='100,500,2000')
+    parser.add_argument('--calls', type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='feelya-serial-')
+    database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from typing import List
+
+    import orjson
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlalchemy.orm import sessionmaker
+
+    from api.responses import GZIP_LEVEL, rows_to_dicts
+    from benchmarks.harness import measure
+    from models.database import Review
+    from models.schemas import ReviewResponse
+    from scripts.generate_synthetic_data import generate, make_engine
+
+    engine = make_engine(database_url)
+    generate(engine, 1000, 500, args.reviews, verbose=False)
+    db = sessionmaker(bind=engine)()
+
+    adapter = TypeAdapter(List[ReviewResponse])
+    columns = list(ReviewResponse.model_fields)
+    table = Review.__table__
+
+    print(f"{'limit':>6}  {'chemin':<8}{'requête ms':>12}{'sérial. ms':>12}{'part sérial.':>14}{'octets':>10}{'gzip':>9}")
+    for limit in [int(l) for l in args.limits.split(',')]:
+        offsets = [(i * limit) % max(args.reviews - limit, 1) for i in range(args.calls)]
+
+        def orm_query(offset):
+            db.expunge_all()
+            return db.query(Review).offset(offset).limit(limit).all()
+
+        def orm_serialize(objects):
+            content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode='json')
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+        def tuple_query(offset):
+            return db.execute(select(*(table.c[n] for n in columns)).offset(offset).limit(limit)).all()
+
+        def fast_serialize(rows):
+            return orjson.dumps(rows_to_dicts(columns, rows))
+
+        before_rows = [orm_query(o) for o in offsets]
+        after_rows = [tuple_query(o) for o in offsets]
+        payload = fast_serialize(after_rows[0])
+        compressed = measure(lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL), [payload] * args.calls)
+
+        for name, query, serialize, prepared in (
+            ('avant', orm_query, orm_serialize, before_rows),
+            ('après', tuple_query, fast_serialize, after_rows),
+        ):
+            q = measure(query, offsets)['p50_ms']
+            s = measure(serialize, prepared)['p50_ms']
+            print(f"{limit:>6}  {name:<8}{q:>12.2f}{s:>12.2f}{s / (q + s):>13.0%}{len(payload):>10}"
+                  f"{len(gzip.compress(payload, GZIP_LEVEL)):>9}")
+        print(f"{'':>6}  gzip : {compressed['p50_ms']:.2f} ms par réponse")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Temps de démarrage et mémoire résidente par profil de processus
+
+Usage :
+    python -m benchmarks.startup
+    python -m benchmarks.startup --profiles readonly,full --repeat 5
+
+Chaque profil est lancé dans un processus neuf : import du module (main ou
+script CLI), puis pour l'API démarrage de l'application (événements
+startup, préchargement des modèles en profil full) et un GET /health.
+Sont relevés le temps d'import, le temps jusqu'à la première réponse, la
+mémoire résidente (VmRSS) et les modules lourds effectivement chargés.
+Hors ligne, les modèles transformers ne se téléchargent pas : torch et
+transformers sont importés mais les poids ne sont pas en mémoire.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ('torch', 'transformers', 'sklearn', 'nltk', 'pyarrow')
+
+# (module importé, application à démarrer, variables d'environnement)
+PROFILES = {
+    'readonly': ('main', True, {'API_PROFILE': 'readonly'}),
+    'full-lazy': ('main', True, {'API_PROFILE': 'full', 'API_PRELOAD': 'false'}),
+    'full': ('main', True, {'API_PROFILE': 'full', 'API_PRELOAD': 'true'}),
+    'build_search_index': ('scripts.build_search_index', False, {}),
+    'export_data': ('scripts.export_data', False, {}),
+    'rescore_reviews': ('scripts.rescore_reviews', False, {}),
+}
+
+CHILD = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+if sys.argv[2] == '1':
+    from fastapi.testclient import TestClient
+    with TestClient(module.app) as client:
+        client.get('/health').raise_for_status()
+ready = time.perf_counter()
+rss = None
+try:
+    with open('/proc/self/status') as f:
+        rss = next(int(line.split()[1]) / 1024 for line in f if line.startswith('VmRSS:'))
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+print(json.dumps({
+    'import_s': imported - start,
+    'ready_s': ready - start,
+    'rss_mb': rss,
+    'modules': [name for name in sys.argv[3].split(',') if name in sys.modules],
+}))
+"""
+
+
+def run_profile(name: str, database_url: str) -> dict:
+    target, app, extra = PROFILES[name]
+    env = dict(os.environ, DATABASE_URL=database_url, HF_HUB_OFFLINE='1', TRANSFORMERS_OFFLINE='1', **extra)
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, target, '1' if app else '0', ','.join(HEAVY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démarrage à froid : temps d'import et RSS par profil")
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='feelya-startup-')
+    database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    print(f"{'profil':<20}{'import s':>10}{'prêt s':>9}{'RSS Mo':>9}  modules lourds")
+    for name in args.profiles.split(','):
+        if name not in PROFILES:
+            sys.exit(f"Profil inconnu: {name}")
+        try:
+            runs = [run_profile(name, database_url) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<20}échec : {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        print(
+            f"{name:<20}{statistics.median(r['import_s'] for r in runs):>10.2f}"
+            f"{statistics.median(r['ready_s'] for r in runs):>9.2f}"
+            f"{statistics.median(r['rss_mb'] for r in runs):>9.0f}  {', '.join(runs[-1]['modules']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
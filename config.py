@@ -16,16 +16,94 @@ class Settings:
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     
+    # Profil de l'API : full (écriture et ML) | readonly (lectures seules, aucun code ML chargé)
+    API_PROFILE = os.getenv("API_PROFILE", "full")
+    API_PRELOAD = os.getenv("API_PRELOAD", "true").lower() in ("1", "true", "yes")  # full : modèles chargés au démarrage
+    
     # ML Models
     SENTIMENT_MODEL_FR = "camembert-base"
     SENTIMENT_MODEL_AR = "aubmindlab/bert-base-arabertv2"
+    SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "bert")  # bert | lexicon | tiered | student
+    LEXICON_CONFIDENCE_THRESHOLD = float(os.getenv("LEXICON_CONFIDENCE_THRESHOLD", "0.6"))
+    # Avis longs : découpés en segments (phrases) notés en un seul lot puis agrégés
+    SENTIMENT_SEGMENT_CHARS = int(os.getenv("SENTIMENT_SEGMENT_CHARS", "400"))  # au-delà, le texte est découpé
+    SENTIMENT_SEGMENT_AGGREGATION = os.getenv("SENTIMENT_SEGMENT_AGGREGATION", "length")  # length | confidence
+    SENTIMENT_KEEP_SEGMENTS = os.getenv("SENTIMENT_KEEP_SEGMENTS", "false").lower() in ("1", "true", "yes")
+    STUDENT_MODEL_DIR = os.getenv("STUDENT_MODEL_DIR", "./artifacts/student")
+    STUDENT_MODEL_PATH = os.getenv("STUDENT_MODEL_PATH", "")  # vide : dernière version
+    
+    # Serveur d'inférence multi-processus (désactivé : modèle chargé dans le processus API)
+    INFERENCE_SERVER_ENABLED = os.getenv("INFERENCE_SERVER_ENABLED", "false").lower() in ("1", "true", "yes")
+    INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "/tmp/feelya-inference.sock")
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+    INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", "1"))
+    
+    # Ordonnanceur d'inférence (priorités interactive / bulk, délestage, SLO)
+    INFERENCE_SCHEDULER_ENABLED = os.getenv("INFERENCE_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+    INFERENCE_SCHEDULER_WORKERS = int(os.getenv("INFERENCE_SCHEDULER_WORKERS", str(os.cpu_count() or 1)))  # défaut : un thread par CPU
+    INFERENCE_INTERACTIVE_QUEUE = int(os.getenv("INFERENCE_INTERACTIVE_QUEUE", "64"))
+    INFERENCE_BULK_QUEUE = int(os.getenv("INFERENCE_BULK_QUEUE", "1024"))
+    INFERENCE_SLO_MS = float(os.getenv("INFERENCE_SLO_MS", "500"))  # attente max avant repli sur le lexique
+    INFERENCE_BULK_SLO_MS = float(os.getenv("INFERENCE_BULK_SLO_MS", "0"))  # 0 : pas de repli pour les lots
+    INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+    
+    # Quasi-doublons (MinHash LSH) : réutilise le sentiment de l'avis canonique
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    DEDUP_MODE = os.getenv("DEDUP_MODE", "flag")  # flag : duplicate_of renseigné ; collapse : pas de nouvelle ligne
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # similarité de Jaccard minimale
+    DEDUP_SYNC_INTERVAL = float(os.getenv("DEDUP_SYNC_INTERVAL", "2"))  # secondes entre deux relectures de review_dedup
+    
+    # Recherche plein texte (FTS5 sur SQLite, tsvector sur PostgreSQL)
+    SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    # Flux temps réel du dashboard (SSE)
+    LIVE_FEED_ENABLED = os.getenv("LIVE_FEED_ENABLED", "true").lower() in ("1", "true", "yes")
+    LIVE_FEED_TICK = float(os.getenv("LIVE_FEED_TICK", "1.0"))  # secondes entre deux diffusions
+    LIVE_FEED_QUEUE = int(os.getenv("LIVE_FEED_QUEUE", "32"))  # événements en attente par abonné
+    LIVE_FEED_MAX_REVIEWS = int(os.getenv("LIVE_FEED_MAX_REVIEWS", "20"))  # avis diffusés par tick
+    LIVE_FEED_REFRESH = float(os.getenv("LIVE_FEED_REFRESH", "60"))  # recalcul SQL de l'instantané ; 0 : jamais
+    LIVE_FEED_HEARTBEAT = float(os.getenv("LIVE_FEED_HEARTBEAT", "15"))
     
     # Scraping
     SCRAPING_USER_AGENT = "FEELya-Bot/1.0"
     SCRAPING_DELAY = 2
+    SCRAPING_PARSER = os.getenv("SCRAPING_PARSER", "auto")  # auto, selectolax, lxml, bs4, bs4-full
+    SCRAPING_SELECTORS_PATH = os.getenv("SCRAPING_SELECTORS_PATH", "")  # JSON : sélecteurs CSS par site
+    CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", "./artifacts/crawl_state.db")  # ETag, empreintes de pages et d'avis
     
     # Recommandation
     MIN_REVIEWS_FOR_RECOMMENDATION = 5
     RECOMMENDATION_TOP_N = 10
+    HYBRID_COLLAB_WEIGHT = float(os.getenv("HYBRID_COLLAB_WEIGHT", "0.6"))
+    HYBRID_CONTENT_WEIGHT = float(os.getenv("HYBRID_CONTENT_WEIGHT", "0.4"))
+    HYBRID_MIN_SENTIMENT = float(os.getenv("HYBRID_MIN_SENTIMENT", "0"))  # sentiment moyen minimal des produits du collaboratif
+    RECOMMENDER_THREADS = int(os.getenv("RECOMMENDER_THREADS", "40"))  # comme le pool de threads des routes (anyio)
+    # Facteurs latents (ALS implicite, poids = note et sentiment du texte)
+    ALS_ENABLED = os.getenv("ALS_ENABLED", "true").lower() in ("1", "true", "yes")
+    ALS_FACTORS = int(os.getenv("ALS_FACTORS", "64"))
+    ALS_ITERATIONS = int(os.getenv("ALS_ITERATIONS", "10"))
+    ALS_REGULARIZATION = float(os.getenv("ALS_REGULARIZATION", "0.1"))
+    ALS_ALPHA = float(os.getenv("ALS_ALPHA", "20"))  # confiance = 1 + alpha * |signal|
+    ALS_CG_STEPS = int(os.getenv("ALS_CG_STEPS", "3"))  # pas de gradient conjugué par demi-itération
+    ALS_RETRAIN_INTERVAL = float(os.getenv("ALS_RETRAIN_INTERVAL", "3600"))  # secondes ; 0 : entraînement au démarrage seulement
+    ALS_MODEL_PATH = os.getenv("ALS_MODEL_PATH", "./artifacts/als_model.joblib")
+    
+    # Observabilité
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_DIR = os.getenv("PROFILING_DIR", "./profiles")
+    
+    # Réponses HTTP
+    ORJSON_RESPONSES = os.getenv("ORJSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))  # 0 : pas de compression
+    PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+    PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "2"))  # secondes avant revérification de la version
+    PRODUCT_SNAPSHOT_PATH = os.getenv("PRODUCT_SNAPSHOT_PATH", "./artifacts/product_snapshot.bin")
+    PRODUCT_SNAPSHOT_REFRESH = float(os.getenv("PRODUCT_SNAPSHOT_REFRESH", "5"))  # secondes avant revérification de la version
+    PRODUCT_INDEX_REFRESH = float(os.getenv("PRODUCT_INDEX_REFRESH", "60"))  # index TF-IDF des produits similaires
+    
+    # Endpoints d'administration (désactivés si vide)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
 settings = Settings()
@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   Database, Settings, Smile, ThumbsUp, BarChart3, Users, ShoppingCart, 
   Search, Star, TrendingUp, AlertCircle, CheckCircle, XCircle,
   RefreshCw, Download, Upload, Play, Activity, Zap, Globe
 } from 'lucide-react';
-import { apiService } from '../services/api';
+import { apiService, subscribeDashboard, applyDashboardDelta } from '../services/api';
 
 export default function FEELyaApp() {
   const [activeTab, setActiveTab] = useState('dashboard');
@@ -34,6 +34,30 @@ export default function FEELyaApp() {
     loadDashboardData();
   }, []);
 
+  // Mises à jour poussées par le serveur (pas de polling)
+  const lastSeq = useRef(0);
+  useEffect(() => {
+    const prependReviews = (incoming) => {
+      if (incoming.length) {
+        setReviews(prev => [...incoming.slice().reverse(), ...prev].slice(0, 100));
+      }
+    };
+    return subscribeDashboard({
+      onSnapshot: (snapshot) => {
+        lastSeq.current = snapshot.seq;
+        setStats(snapshot);
+      },
+      onTick: (tick) => {
+        // Delta déjà inclus dans l'instantané reçu
+        if (tick.seq <= lastSeq.current) return;
+        lastSeq.current = tick.seq;
+        setStats(prev => applyDashboardDelta(prev, tick.delta));
+        prependReviews(tick.reviews);
+      },
+      onReviews: (event) => prependReviews(event.reviews),
+    });
+  }, []);
+
   // Filtrer les avis selon la recherche et le sentiment
   useEffect(() => {
     let filtered = reviews;
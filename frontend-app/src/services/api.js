@@ -36,4 +36,32 @@ export const apiService = {
   getDashboardStats: () => api.get('/stats/dashboard/'),
 };
 
+// Flux temps réel du dashboard (SSE) : instantané puis deltas à chaque tick
+const STREAM_URL = API_BASE_URL.replace(/\/api\/v1\/?$/, '') + '/stream/dashboard';
+
+export const subscribeDashboard = ({ onSnapshot, onTick, onReviews }) => {
+  const source = new EventSource(STREAM_URL);
+  source.addEventListener('snapshot', (e) => onSnapshot(JSON.parse(e.data)));
+  source.addEventListener('tick', (e) => onTick(JSON.parse(e.data)));
+  source.addEventListener('reviews', (e) => onReviews && onReviews(JSON.parse(e.data)));
+  return () => source.close();
+};
+
+// Applique un delta (compteurs et sommes bruts) et recalcule moyennes et pourcentages
+export const applyDashboardDelta = (stats, delta) => {
+  const next = { ...stats };
+  ['total_reviews', 'positive_reviews', 'neutral_reviews', 'negative_reviews', 'rating_sum', 'sentiment_sum']
+    .forEach((key) => { next[key] = (next[key] || 0) + delta[key]; });
+  const total = next.total_reviews;
+  const percentage = (value) => (total > 0 ? Math.round((value / total) * 1000) / 10 : 0);
+  next.avg_rating = total > 0 ? Math.round((next.rating_sum / total) * 100) / 100 : 0;
+  next.avg_sentiment = total > 0 ? Math.round((next.sentiment_sum / total) * 100) / 100 : 0;
+  next.sentiment_distribution = {
+    positive_percentage: percentage(next.positive_reviews),
+    neutral_percentage: percentage(next.neutral_reviews),
+    negative_percentage: percentage(next.negative_reviews),
+  };
+  return next;
+};
+
 export default api;
\ No newline at end of file
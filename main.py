@@ -1,15 +1,26 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import router
-from models.database import Base, engine
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from api.routes import router, ml_router
+from api.dependencies import (
+    get_dedup_index, get_live_feed, get_preprocessor, get_recommender, get_scheduler, get_sentiment_analyzer
+)
+from api.admin import router as admin_router
+from models.database import engine, init_schema
+from services import metrics, profiling, search
+from config import settings
 
 # Créer les tables
-Base.metadata.create_all(bind=engine)
+init_schema(engine)
+if settings.SEARCH_INDEX_ENABLED:
+    search.init_index(engine)
 
 app = FastAPI(
     title="FEELya API",
     description="Système de Recommandation par Sentiment pour E-commerce Marocain",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse if settings.ORJSON_RESPONSES else JSONResponse
 )
 
 # Configuration CORS
@@ -21,8 +32,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inclure les routes
+# Métriques : durée par route (gabarit de chemin, pas l'URL brute)
+metrics.instrument_engine(engine)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not metrics.registry.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.http_request_duration.observe(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status_code),
+            value=time.perf_counter() - start
+        )
+
+# Profilage à la demande (en-tête X-Profile ou échantillonnage)
+profiling.instrument_engine(engine)
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    if not profiling.should_profile(request.headers):
+        return await call_next(request)
+    session = profiling.start_session(request.method, request.url.path)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # Profil enregistré même si l'endpoint lève une exception
+        try:
+            profile_id = profiling.save_session(session, status_code, time.perf_counter() - start)
+        finally:
+            profiling.end_session(session)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+# Inclure les routes (profil readonly : lectures seules, modèles jamais chargés)
 app.include_router(router, prefix="/api/v1", tags=["FEELya"])
+if settings.API_PROFILE == "full":
+    app.include_router(ml_router, prefix="/api/v1", tags=["FEELya"])
+app.include_router(admin_router, prefix="/admin", tags=["Administration"])
 
 
 @app.get("/")
@@ -34,6 +94,57 @@ def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Exposition des métriques au format texte Prometheus"""
+    if not metrics.registry.enabled:
+        raise HTTPException(status_code=404, detail="Métriques désactivées")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("startup")
+def preload_services():
+    # Premier avis sans latence de chargement ; API_PRELOAD=false : chargement au premier usage
+    if settings.API_PROFILE == "full" and settings.API_PRELOAD:
+        get_preprocessor()
+        get_sentiment_analyzer()
+        get_scheduler()
+        get_recommender()
+        get_dedup_index()
+
+
+@app.on_event("startup")
+async def start_live_feed():
+    live_feed = get_live_feed()
+    if live_feed is not None:
+        live_feed.start()
+
+
+@app.get("/stream/dashboard", include_in_schema=False)
+def stream_dashboard():
+    """Flux SSE du dashboard : instantané puis deltas et nouveaux avis à chaque tick"""
+    live_feed = get_live_feed()
+    if live_feed is None:
+        raise HTTPException(status_code=404, detail="Flux temps réel désactivé")
+    return StreamingResponse(
+        live_feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.on_event("shutdown")
+def stop_als_training():
+    if get_recommender.loaded:
+        get_recommender.instance.stop_training()
+
+
+@app.on_event("shutdown")
+def stop_live_feed():
+    if get_live_feed.loaded and get_live_feed.instance is not None:
+        get_live_feed.instance.stop()
+
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
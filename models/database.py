@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Float, Date, DateTime, Text, Boolean, LargeBinary, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -36,6 +36,8 @@ class Product(Base):
     positive_reviews = Column(Integer, default=0)
     neutral_reviews = Column(Integer, default=0)
     negative_reviews = Column(Integer, default=0)
+    # Incrémenté à chaque mise à jour des agrégats (ETag et cache des fiches produit)
+    version = Column(Integer, default=1, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -55,6 +57,8 @@ class Review(Base):
     sentiment_score = Column(Float)
     confidence = Column(Float)
     processed = Column(Boolean, default=False)
+    # Avis canonique dont celui-ci est un quasi-doublon (sentiment repris tel quel)
+    duplicate_of = Column(Integer, ForeignKey("reviews.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="reviews")
@@ -83,10 +87,75 @@ class Recommendation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class SentimentRollup(Base):
+    """Compteurs de sentiment par période (jour / semaine), produit et langue
+
+    product_id = 0 : agrégat de toute la catégorie (une courbe de catégorie
+    ne lit qu'une ligne par période et par langue).
+    """
+    __tablename__ = "sentiment_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String(10))  # day | week
+    bucket_start = Column(Date)
+    product_id = Column(Integer, default=0)
+    category = Column(String(100))
+    language = Column(String(10))
+    review_count = Column(Integer, default=0)
+    positive_reviews = Column(Integer, default=0)
+    neutral_reviews = Column(Integer, default=0)
+    negative_reviews = Column(Integer, default=0)
+    sentiment_sum = Column(Float, default=0.0)
+    rating_sum = Column(Float, default=0.0)
+    
+    __table_args__ = (
+        UniqueConstraint("period", "bucket_start", "product_id", "category", "language", name="uq_sentiment_rollup"),
+        Index("ix_rollup_product", "period", "product_id", "bucket_start"),
+        Index("ix_rollup_category", "period", "category", "product_id", "bucket_start"),
+    )
+
+
+class ReviewDedup(Base):
+    """Avis canoniques de l'index de quasi-doublons, partagés par tous les workers
+
+    Une ligne par avis canonique, écrite dès son ajout : chaque processus
+    relit les lignes plus récentes que la dernière vue.
+    """
+    __tablename__ = "review_dedup"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    text_key = Column(LargeBinary(16))  # empreinte du texte normalisé (doublons exacts)
+    signature = Column(LargeBinary)  # signature MinHash (uint32)
+    review_id = Column(Integer, nullable=True)
+    product_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    sentiment = Column(String(20))
+    sentiment_score = Column(Float)
+    confidence = Column(Float)
+
+
 # Database connection
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Colonnes ajoutées après coup : create_all ne modifie pas les tables existantes
+ADDED_COLUMNS = [
+    ("products", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ("reviews", "duplicate_of", "INTEGER REFERENCES reviews(id)"),
+]
+
+
+def init_schema(bind=None):
+    """Crée les tables manquantes puis ajoute les colonnes manquantes"""
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
 def get_db():
     db = SessionLocal()
     try:
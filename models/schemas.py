@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from typing import Dict, Optional, List
+from datetime import date, datetime
 
 class ReviewBase(BaseModel):
     rating: float
@@ -17,6 +17,7 @@ class ReviewResponse(ReviewBase):
     sentiment: Optional[str] = None
     sentiment_score: Optional[float] = None
     confidence: Optional[float] = None
+    duplicate_of: Optional[int] = None
     created_at: datetime
     
     class Config:
@@ -51,11 +52,19 @@ class SentimentAnalysisRequest(BaseModel):
     text: str
     language: Optional[str] = None
 
+class SegmentSentiment(BaseModel):
+    text: str
+    sentiment: str
+    sentiment_score: float
+    confidence: float
+
 class SentimentAnalysisResponse(BaseModel):
     sentiment: str
     sentiment_score: float
     confidence: float
     language_detected: str
+    degraded: bool = False
+    segments: Optional[List[SegmentSentiment]] = None  # avis longs, avec SENTIMENT_KEEP_SEGMENTS
 
 
 class RecommendationResponse(BaseModel):
@@ -65,3 +74,23 @@ class RecommendationResponse(BaseModel):
     reason: str
     sentiment_score: float
     total_reviews: int
+
+
+class TrendPoint(BaseModel):
+    bucket_start: date
+    review_count: int
+    positive_reviews: int
+    neutral_reviews: int
+    negative_reviews: int
+    avg_sentiment: float
+    avg_rating: float
+
+
+class SearchHit(ReviewResponse):
+    score: float
+
+
+class SearchResponse(BaseModel):
+    total: int
+    hits: List[SearchHit]
+    facets: Dict[str, Dict[str, int]]
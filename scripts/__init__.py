@@ -8,14 +8,14 @@ import os
 # Ajouter le répertoire parent au path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from models.database import Base, engine
+from models.database import engine, init_schema
 
 def init_database():
     """Créer toutes les tables"""
     print("🔧 Création des tables de la base de données...")
     
     try:
-        Base.metadata.create_all(bind=engine)
+        init_schema(engine)
         print("✅ Base de données initialisée avec succès!")
         print(f"📍 Fichier DB: {engine.url}")
     except Exception as e:
@@ -0,0 +1,40 @@
+"""
+Reconstruit la table sentiment_rollups à partir de tous les avis
+
+À lancer une fois après la mise en place des tendances, ou après un
+import massif qui ne passe pas par l'API (generate_synthetic_data.py).
+
+Exemple :
+    python scripts/backfill_rollups.py --database-url sqlite:///./load_test.db
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database import init_schema
+from services.rollups import backfill
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruction des agrégats de tendance")
+    parser.add_argument('--database-url', default=None, help="Par défaut : DATABASE_URL de la configuration")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from models.database import engine
+
+    init_schema(engine)
+    started = time.perf_counter()
+    rows = backfill(engine)
+    print(f"✅ {rows} lignes d'agrégats reconstruites en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Reconstruit l'index de recherche plein texte des avis
+
+Nécessaire une fois pour les avis existants, après un import qui ne passe
+pas par l'API, ou après un changement de normalisation.
+
+Exemple :
+    python scripts/build_search_index.py --database-url sqlite:///./load_test.db
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database import init_schema
+from services.search import rebuild, supported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruction de l'index de recherche")
+    parser.add_argument('--database-url', default=None, help="Par défaut : DATABASE_URL de la configuration")
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from models.database import engine
+
+    if not supported(engine):
+        print(f"❌ Recherche plein texte non disponible pour {engine.dialect.name}")
+        sys.exit(1)
+
+    init_schema(engine)
+    started = time.perf_counter()
+    rows = rebuild(engine, args.chunk_size)
+    print(f"✅ {rows} avis indexés en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
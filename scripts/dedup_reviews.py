@@ -0,0 +1,119 @@
+"""
+Détecte les quasi-doublons parmi les avis existants
+
+Les avis sont lus par blocs ordonnés par id (pagination par clé) et leur
+texte brut est comparé à l'index MinHash, comme à l'ingestion : le premier avis d'un
+groupe devient canonique, les suivants sont des doublons. Affiche le taux
+de doublons global et par langue, c'est-à-dire la part d'inférences que
+l'index aurait évitée.
+
+Exemple :
+    python scripts/dedup_reviews.py
+    python scripts/dedup_reviews.py --flag --save
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import bindparam, select, update
+
+from models.database import Review, init_schema
+from services.dedup import DuplicateIndex
+from services.preprocessor import TextPreprocessor
+
+
+def iter_chunks(engine, chunk_size: int):
+    """Blocs d'avis ordonnés par id, une requête courte par bloc"""
+    table = Review.__table__
+    last_id = 0
+    while True:
+        query = (
+            select(table.c.id, table.c.product_id, table.c.user_id, table.c.text, table.c.sentiment,
+                   table.c.sentiment_score, table.c.confidence)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        )
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def deduplicate(engine, index: DuplicateIndex, chunk_size: int = 5000, flag: bool = False, verbose: bool = True):
+    preprocessor = TextPreprocessor()
+    table = Review.__table__
+    stmt = update(table).where(table.c.id == bindparam('b_id')).values(duplicate_of=bindparam('b_canonical'))
+    totals, duplicates = Counter(), Counter()
+
+    for rows in iter_chunks(engine, chunk_size):
+        languages = preprocessor.detect_languages([row.text or '' for row in rows])
+        updates = []
+        for row, language in zip(rows, languages):
+            totals[language] += 1
+            text = row.text or ''
+            canonical = index.find(text)
+            if canonical is not None:
+                duplicates[language] += 1
+                updates.append({'b_id': row.id, 'b_canonical': canonical['review_id']})
+            else:
+                index.add(text, {
+                    'review_id': row.id,
+                    'product_id': row.product_id,
+                    'user_id': row.user_id,
+                    'sentiment': row.sentiment,
+                    'sentiment_score': row.sentiment_score,
+                    'confidence': row.confidence,
+                })
+        if flag and updates:
+            with engine.begin() as conn:
+                conn.execute(stmt, updates)
+        if verbose:
+            print(f"  {sum(totals.values())} avis analysés, {sum(duplicates.values())} doublons")
+    return totals, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection des quasi-doublons d'avis")
+    parser.add_argument('--database-url', default=None, help="Par défaut : DATABASE_URL de la configuration")
+    parser.add_argument('--threshold', type=float, default=None, help="Similarité minimale (défaut : DEDUP_THRESHOLD)")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--flag', action='store_true', help="Renseigner reviews.duplicate_of")
+    parser.add_argument('--save', action='store_true', help="Remplacer l'index partagé de l'API (table review_dedup)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from models.database import engine
+
+    init_schema(engine)
+    index = DuplicateIndex(threshold=args.threshold)
+    started = time.perf_counter()
+    totals, duplicates = deduplicate(engine, index, args.chunk_size, args.flag)
+    elapsed = time.perf_counter() - started
+
+    total, found = sum(totals.values()), sum(duplicates.values())
+    report = index.report()
+    print(f"\n✅ {total} avis en {elapsed:.1f}s, {report['indexed']} canoniques")
+    print(f"Doublons : {found} ({found / max(total, 1):.1%}) dont "
+          f"{report['exact_duplicates']} identiques, {report['near_duplicates']} quasi identiques")
+    print(f"Inférences évitées : {found}")
+    for language, count in totals.most_common():
+        print(f"  {language:>8} : {duplicates[language]}/{count} ({duplicates[language] / count:.1%})")
+
+    if args.save:
+        index.persist(engine)
+        print(f"Index enregistré : table review_dedup ({report['indexed']} avis canoniques)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Exporte avis ou produits en Parquet / Arrow IPC pour l'équipe data
+
+Exemples :
+    python scripts/export_data.py reviews --output avis.parquet --start 2024-01-01 --language fr
+    python scripts/export_data.py products --format arrow --output produits.arrows
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import export
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export analytique en colonnes")
+    parser.add_argument('table', choices=['reviews', 'products'])
+    parser.add_argument('--format', choices=export.FORMATS, default='parquet')
+    parser.add_argument('--output', default=None, help="Par défaut : <table>.<extension>")
+    parser.add_argument('--start', type=date.fromisoformat, default=None, help="Date minimale (AAAA-MM-JJ)")
+    parser.add_argument('--end', type=date.fromisoformat, default=None, help="Date maximale incluse")
+    parser.add_argument('--category', default=None)
+    parser.add_argument('--language', default=None, help="fr, ar ou darija (avis uniquement)")
+    parser.add_argument('--chunk-size', type=int, default=50_000, help="Lignes par row group / message")
+    parser.add_argument('--database-url', default=None, help="Par défaut : DATABASE_URL de la configuration")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from models.database import engine
+
+    if args.table == 'reviews':
+        query = export.reviews_query(args.start, args.end, args.category, args.language)
+        schema = export.REVIEW_SCHEMA
+    else:
+        query = export.products_query(args.category)
+        schema = export.PRODUCT_SCHEMA
+
+    output = args.output or f"{args.table}.{export.EXTENSIONS[args.format]}"
+    started = time.perf_counter()
+    rows = export.write_export(engine, query, schema, output, args.format, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(output) / (1024 * 1024)
+    print(f"✅ {rows} lignes exportées vers {output} ({size_mb:.1f} Mo, {elapsed:.1f}s, "
+          f"{rows / elapsed if elapsed > 0 else 0:,.0f} lignes/s)")
+
+
+if __name__ == "__main__":
+    main()
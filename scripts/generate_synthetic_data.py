@@ -0,0 +1,325 @@
+"""
+Générateur de données synthétiques à grande échelle (tests de charge)
+
+Contrairement à populate_database.py, aucun avis ne passe par BERT : les
+sentiments sont soit dérivés du gabarit de texte (mode "mock"), soit
+précalculés une seule fois par gabarit unique (mode "model"). Les lignes
+sont générées par blocs avec NumPy et insérées via insert() en executemany.
+
+Exemple :
+    python scripts/generate_synthetic_data.py --users 100000 --products 50000 \\
+        --reviews 10000000 --database-url sqlite:///./load_test.db
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import numpy as np
+from sqlalchemy import bindparam, create_engine, event, func, insert, select, update
+from sqlalchemy.engine import Engine
+
+from models.database import init_schema, User, Product, Review, UserPreference
+from services.rollups import backfill as backfill_rollups
+from services import search
+from services.corpora import (
+    CATEGORIES, LANGUAGES, PRODUCT_ADJECTIVES, PRODUCT_WORDS, SENTIMENTS,
+    make_review_text
+)
+from config import settings
+
+# Nombre de textes distincts par couple (langue, sentiment)
+TEXTS_PER_POOL = 64
+
+RATING_RANGES = {'Positif': (4.0, 5.0), 'Neutre': (2.5, 3.9), 'Négatif': (1.0, 2.4)}
+SCORE_RANGES = {'Positif': (0.5, 1.0), 'Neutre': (0.0, 0.0), 'Négatif': (-1.0, -0.5)}
+
+
+def power_law_weights(n: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    """Poids de type Zipf (rang^-exponent) attribués dans un ordre aléatoire"""
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def build_text_pools(seed: int, sentiment_mode: str):
+    """Prépare les textes par (langue, sentiment) et leurs scores précalculés"""
+    rng = random.Random(seed)
+    texts, labels, scores, confidences = [], [], [], []
+
+    analyzer = preprocessor = None
+    if sentiment_mode == 'model':
+        from services.preprocessor import TextPreprocessor
+        from services.sentiment_analyzer import SentimentAnalyzer
+        preprocessor = TextPreprocessor()
+        analyzer = SentimentAnalyzer()
+
+    for language in LANGUAGES:
+        for sentiment in SENTIMENTS:
+            for _ in range(TEXTS_PER_POOL):
+                text = make_review_text(rng, language, rng.randint(1, 3), sentiment=sentiment)
+                texts.append(text)
+                if analyzer is not None:
+                    # Une seule inférence par texte unique
+                    result = analyzer.analyze(*preprocessor.preprocess(text))
+                    labels.append(result['sentiment'])
+                    scores.append(result['sentiment_score'])
+                    confidences.append(result['confidence'])
+                else:
+                    labels.append(sentiment)
+                    scores.append(np.nan)
+                    confidences.append(np.nan)
+
+    return {
+        'texts': texts,
+        'labels': np.array([SENTIMENTS.index(label) for label in labels], dtype=np.int8),
+        'scores': np.array(scores, dtype=np.float64),
+        'confidences': np.array(confidences, dtype=np.float64),
+    }
+
+
+def make_engine(database_url: str) -> Engine:
+    engine = create_engine(database_url)
+    if engine.dialect.name == 'sqlite':
+        @event.listens_for(engine, "connect")
+        def _sqlite_bulk_pragmas(dbapi_connection, connection_record):
+            # Réglages non persistants, uniquement pour la durée du chargement
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+    return engine
+
+
+def generate(
+    engine: Engine,
+    n_users: int,
+    n_products: int,
+    n_reviews: int,
+    chunk_size: int = 100_000,
+    seed: int = 42,
+    language_mix=(0.6, 0.25, 0.15),
+    product_exponent: float = 1.1,
+    user_exponent: float = 0.8,
+    sentiment_mode: str = 'mock',
+    days: int = 365,
+    verbose: bool = True
+) -> dict:
+    """Génère utilisateurs, produits, préférences et avis en blocs"""
+    rng = np.random.default_rng(seed)
+    py_rng = random.Random(seed)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    init_schema(engine)
+    pools = build_text_pools(seed, sentiment_mode)
+    n_pool = len(pools['texts'])
+    pool_index = {
+        (li, si): np.flatnonzero((np.arange(n_pool) // TEXTS_PER_POOL) == li * len(SENTIMENTS) + si)
+        for li in range(len(LANGUAGES)) for si in range(len(SENTIMENTS))
+    }
+
+    with engine.begin() as conn:
+        user_offset = conn.execute(select(func.coalesce(func.max(User.id), 0))).scalar()
+        product_offset = conn.execute(select(func.coalesce(func.max(Product.id), 0))).scalar()
+
+    def log(message):
+        if verbose:
+            print(message)
+
+    # Utilisateurs et préférences
+    for start in range(0, n_users, chunk_size):
+        ids = range(user_offset + start + 1, user_offset + min(start + chunk_size, n_users) + 1)
+        with engine.begin() as conn:
+            conn.execute(insert(User), [
+                {'id': i, 'username': f"synth_user{i}", 'email': f"synth_user{i}@example.com",
+                 'hashed_password': "x", 'created_at': now}
+                for i in ids
+            ])
+            conn.execute(insert(UserPreference), [
+                {'user_id': i, 'category': category, 'preference_score': round(py_rng.uniform(0.1, 1.0), 3)}
+                for i in ids
+                for category in py_rng.sample(CATEGORIES, py_rng.randint(1, 3))
+            ])
+    log(f"   ✓ {n_users} utilisateurs")
+
+    # Produits : catégorie et « qualité » latente qui biaise le sentiment
+    product_category = rng.integers(0, len(CATEGORIES), size=n_products)
+    product_quality = rng.beta(5, 2, size=n_products)
+    for start in range(0, n_products, chunk_size):
+        stop = min(start + chunk_size, n_products)
+        with engine.begin() as conn:
+            conn.execute(insert(Product), [
+                {
+                    'id': product_offset + i + 1,
+                    'name': f"{py_rng.choice(PRODUCT_WORDS).capitalize()} {py_rng.choice(PRODUCT_ADJECTIVES)} {product_offset + i + 1}",
+                    'category': CATEGORIES[product_category[i]],
+                    'description': f"{py_rng.choice(PRODUCT_WORDS)} {py_rng.choice(PRODUCT_ADJECTIVES)} {py_rng.choice(PRODUCT_ADJECTIVES)}",
+                    'price': round(py_rng.uniform(50, 20000), 2),
+                    'platform': py_rng.choice(['jumia', 'hmizate']),
+                    'avg_rating': 0.0, 'total_reviews': 0, 'sentiment_score': 0.0,
+                    'positive_reviews': 0, 'neutral_reviews': 0, 'negative_reviews': 0,
+                    'created_at': now, 'updated_at': now
+                }
+                for i in range(start, stop)
+            ])
+    log(f"   ✓ {n_products} produits")
+
+    # Avis
+    product_weights = power_law_weights(n_products, product_exponent, rng)
+    user_weights = power_law_weights(n_users, user_exponent, rng) if n_users else None
+    mix = np.asarray(language_mix, dtype=np.float64)
+    mix = mix / mix.sum()
+
+    counts = np.zeros((n_products, 3), dtype=np.int64)
+    score_sums = np.zeros(n_products, dtype=np.float64)
+    rating_sums = np.zeros(n_products, dtype=np.float64)
+    rating_low = np.array([RATING_RANGES[s][0] for s in SENTIMENTS])
+    rating_high = np.array([RATING_RANGES[s][1] for s in SENTIMENTS])
+    score_low = np.array([SCORE_RANGES[s][0] for s in SENTIMENTS])
+    score_high = np.array([SCORE_RANGES[s][1] for s in SENTIMENTS])
+
+    written = 0
+    while written < n_reviews:
+        size = min(chunk_size, n_reviews - written)
+        products = rng.choice(n_products, size=size, p=product_weights)
+        users = rng.choice(n_users, size=size, p=user_weights) + user_offset + 1 if n_users else None
+        languages = rng.choice(len(LANGUAGES), size=size, p=mix)
+
+        # Positif avec la probabilité « qualité », sinon neutre / négatif
+        u = rng.random(size)
+        quality = product_quality[products]
+        sentiments = np.where(u < quality, 0, np.where(u < quality + (1 - quality) * 0.4, 1, 2))
+
+        text_ids = np.empty(size, dtype=np.int64)
+        for (li, si), candidates in pool_index.items():
+            mask = (languages == li) & (sentiments == si)
+            n = int(mask.sum())
+            if n:
+                text_ids[mask] = candidates[rng.integers(0, len(candidates), size=n)]
+
+        if sentiment_mode == 'model':
+            sentiments = pools['labels'][text_ids].astype(np.int64)
+            scores = pools['scores'][text_ids]
+            confidences = pools['confidences'][text_ids]
+        else:
+            scores = rng.uniform(score_low[sentiments], score_high[sentiments])
+            confidences = rng.uniform(0.5, 1.0, size=size)
+
+        ratings = np.round(rng.uniform(rating_low[sentiments], rating_high[sentiments]), 1)
+        ages = rng.uniform(0, days * 86400, size=size)
+        created = np.datetime64(now, 'us') - (ages * 1e6).astype('timedelta64[us]')
+
+        texts = pools['texts']
+        rows = [
+            {
+                'user_id': int(users[i]) if users is not None else None,
+                'product_id': int(products[i]) + product_offset + 1,
+                'rating': float(ratings[i]),
+                'text': texts[text_ids[i]],
+                'language': LANGUAGES[languages[i]],
+                'sentiment': SENTIMENTS[sentiments[i]],
+                'sentiment_score': float(scores[i]),
+                'confidence': float(confidences[i]),
+                'processed': True,
+                'created_at': created[i].item()
+            }
+            for i in range(size)
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Review), rows)
+
+        np.add.at(counts, (products, sentiments), 1)
+        score_sums += np.bincount(products, weights=scores, minlength=n_products)
+        rating_sums += np.bincount(products, weights=ratings, minlength=n_products)
+
+        written += size
+        elapsed = time.perf_counter() - started
+        log(f"   … {written}/{n_reviews} avis ({written / elapsed:,.0f} avis/s)")
+
+    # Agrégats produits en un seul executemany
+    totals = counts.sum(axis=1)
+    reviewed = np.flatnonzero(totals)
+    table = Product.__table__
+    stmt = update(table).where(table.c.id == bindparam('b_id')).values(
+        total_reviews=bindparam('b_total'),
+        positive_reviews=bindparam('b_pos'),
+        neutral_reviews=bindparam('b_neu'),
+        negative_reviews=bindparam('b_neg'),
+        sentiment_score=bindparam('b_score'),
+        avg_rating=bindparam('b_rating'),
+        version=table.c.version + 1,
+    )
+    for start in range(0, len(reviewed), chunk_size):
+        block = reviewed[start:start + chunk_size]
+        with engine.begin() as conn:
+            conn.execute(stmt, [
+                {
+                    'b_id': int(i) + product_offset + 1,
+                    'b_total': int(totals[i]),
+                    'b_pos': int(counts[i, 0]),
+                    'b_neu': int(counts[i, 1]),
+                    'b_neg': int(counts[i, 2]),
+                    'b_score': float(score_sums[i] / totals[i]),
+                    'b_rating': float(rating_sums[i] / totals[i]),
+                }
+                for i in block
+            ])
+
+    rollup_rows = backfill_rollups(engine)
+    if settings.SEARCH_INDEX_ENABLED:
+        search.rebuild(engine)
+
+    elapsed = time.perf_counter() - started
+    log(f"   ✓ {n_reviews} avis, agrégats de {len(reviewed)} produits, {rollup_rows} lignes de tendance ({elapsed:.1f}s)")
+    return {
+        'users': n_users,
+        'products': n_products,
+        'reviews': n_reviews,
+        'seconds': round(elapsed, 2),
+        'reviews_per_s': round(n_reviews / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques FEELya")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--reviews', type=int, default=100_000)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--language-mix', default='0.6,0.25,0.15', help="Proportions fr,ar,darija")
+    parser.add_argument('--product-exponent', type=float, default=1.1, help="Exposant de popularité (Zipf)")
+    parser.add_argument('--user-exponent', type=float, default=0.8, help="Exposant d'activité des utilisateurs")
+    parser.add_argument('--sentiment', choices=['mock', 'model'], default='mock',
+                        help="mock : dérivé du gabarit ; model : BERT une fois par texte unique")
+    parser.add_argument('--days', type=int, default=365, help="Étendue des dates d'avis")
+    parser.add_argument('--database-url', default=None, help="Par défaut : DATABASE_URL de la configuration")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        args.database_url = settings.DATABASE_URL
+
+    print(f"🚀 Génération : {args.users} utilisateurs, {args.products} produits, {args.reviews} avis")
+    stats = generate(
+        make_engine(args.database_url),
+        args.users, args.products, args.reviews,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        language_mix=tuple(float(x) for x in args.language_mix.split(',')),
+        product_exponent=args.product_exponent,
+        user_exponent=args.user_exponent,
+        sentiment_mode=args.sentiment,
+        days=args.days
+    )
+    print(f"\n✅ Terminé en {stats['seconds']}s ({stats['reviews_per_s']} avis/s)")
+
+
+if __name__ == "__main__":
+    main()
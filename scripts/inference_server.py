@@ -0,0 +1,39 @@
+"""
+Lance le serveur d'inférence multi-processus
+
+Exemple :
+    python scripts/inference_server.py --workers 4 --threads-per-worker 2
+    INFERENCE_SERVER_ENABLED=true uvicorn main:app --workers 4
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import settings
+from services.inference_server import InferenceServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur d'inférence de sentiment (pre-fork)")
+    parser.add_argument('--socket', default=settings.INFERENCE_SOCKET)
+    parser.add_argument('--workers', type=int, default=settings.INFERENCE_WORKERS)
+    parser.add_argument('--threads-per-worker', type=int, default=settings.INFERENCE_THREADS_PER_WORKER)
+    parser.add_argument('--backend', default=None, help="Backend de SentimentAnalyzer (défaut : SENTIMENT_BACKEND)")
+    parser.add_argument('--no-pin', action='store_true', help="Ne pas fixer l'affinité CPU des workers")
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        socket_path=args.socket,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        backend=args.backend,
+        pin_cpus=not args.no_pin
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Recalcule le sentiment de tous les avis existants (changement de modèle)
+
+Les avis sont lus par blocs ordonnés par id (pagination par clé :
+WHERE id > dernier_id LIMIT n), prétraités et notés dans un pool de
+processus, puis réécrits en executemany. Après chaque bloc écrit, le
+dernier id est enregistré dans un fichier de reprise : une exécution
+interrompue reprend avec --resume. Les agrégats produits et les agrégats
+de tendance sont recalculés à la fin. Le nombre de blocs en vol est
+borné : mémoire constante.
+
+Exemple :
+    python scripts/rescore_reviews.py --backend student --workers 4
+    python scripts/rescore_reviews.py --resume
+    python scripts/rescore_reviews.py --only-unprocessed
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import bindparam, case, func, or_, select, update
+
+from models.database import Product, Review
+from services import rollups
+
+DEFAULT_CHECKPOINT = 'rescore.checkpoint.json'
+
+# Services propres à chaque processus du pool
+_preprocessor = None
+_analyzer = None
+
+
+def _init_worker(backend):
+    global _preprocessor, _analyzer
+    from services.preprocessor import TextPreprocessor
+    from services.sentiment_analyzer import SentimentAnalyzer
+    _preprocessor = TextPreprocessor()
+    _analyzer = SentimentAnalyzer(backend=backend)
+
+
+def score_chunk(rows):
+    """Prétraite et note un bloc [(id, texte)] ; retourne les paramètres d'UPDATE"""
+    ids = [review_id for review_id, _ in rows]
+    raw_texts = [text or '' for _, text in rows]
+    processed, languages = _preprocessor.preprocess_batch(raw_texts)
+
+    results = _analyzer.analyze_batch(processed, languages, raw_texts)
+    return [
+        {
+            'b_id': review_id,
+            'b_language': language,
+            'b_sentiment': result['sentiment'],
+            'b_score': result['sentiment_score'],
+            'b_confidence': result['confidence'],
+            # Résultat de repli (modèle absent) : reste à recalculer
+            'b_processed': not result.get('degraded', False),
+        }
+        for review_id, language, result in zip(ids, languages, results)
+    ]
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    # Écriture atomique : un arrêt brutal ne laisse jamais un fichier tronqué
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def iter_chunks(engine, start_after: int, max_id: int, chunk_size: int, only_unprocessed: bool = False):
+    """Blocs [(id, texte)] ordonnés par id, une requête courte par bloc"""
+    table = Review.__table__
+    last_id = start_after
+    while True:
+        query = select(table.c.id, table.c.text).where(table.c.id > last_id, table.c.id <= max_id)
+        if only_unprocessed:
+            # Avis non notés ou notés en mode dégradé par l'ordonnanceur
+            query = query.where(or_(table.c.processed.is_(False), table.c.processed.is_(None)))
+        with engine.connect() as conn:
+            rows = conn.execute(query.order_by(table.c.id).limit(chunk_size)).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [tuple(row) for row in rows]
+
+
+def rebuild_product_aggregates(engine, chunk_size: int = 10_000) -> int:
+    """Recalcule compteurs, score moyen et note moyenne des produits en SQL"""
+    reviews = Review.__table__
+    aggregates = (
+        select(
+            reviews.c.product_id,
+            func.count(),
+            func.sum(case((reviews.c.sentiment == 'Positif', 1), else_=0)),
+            func.sum(case((reviews.c.sentiment == 'Neutre', 1), else_=0)),
+            func.sum(case((reviews.c.sentiment == 'Négatif', 1), else_=0)),
+            func.avg(reviews.c.sentiment_score),
+            func.avg(reviews.c.rating),
+        )
+        .where(reviews.c.product_id.isnot(None))
+        .group_by(reviews.c.product_id)
+    )
+    table = Product.__table__
+    stmt = update(table).where(table.c.id == bindparam('b_id')).values(
+        total_reviews=bindparam('b_total'),
+        positive_reviews=bindparam('b_pos'),
+        neutral_reviews=bindparam('b_neu'),
+        negative_reviews=bindparam('b_neg'),
+        sentiment_score=bindparam('b_score'),
+        avg_rating=bindparam('b_rating'),
+        version=table.c.version + 1,
+    )
+
+    with engine.connect() as conn:
+        rows = conn.execute(aggregates).all()
+
+    for start in range(0, len(rows), chunk_size):
+        with engine.begin() as conn:
+            conn.execute(stmt, [
+                {
+                    'b_id': product_id, 'b_total': total, 'b_pos': pos or 0,
+                    'b_neu': neu or 0, 'b_neg': neg or 0,
+                    'b_score': score or 0.0, 'b_rating': rating or 0.0,
+                }
+                for product_id, total, pos, neu, neg, score, rating in rows[start:start + chunk_size]
+            ])
+    return len(rows)
+
+
+def rescore(
+    engine,
+    backend: str = None,
+    workers: int = 2,
+    chunk_size: int = 1000,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    resume: bool = False,
+    only_unprocessed: bool = False,
+    verbose: bool = True
+) -> dict:
+    table = Review.__table__
+    stmt = update(table).where(table.c.id == bindparam('b_id')).values(
+        language=bindparam('b_language'),
+        sentiment=bindparam('b_sentiment'),
+        sentiment_score=bindparam('b_score'),
+        confidence=bindparam('b_confidence'),
+        processed=bindparam('b_processed'),
+    )
+
+    state = load_checkpoint(checkpoint_path) if resume else None
+    if state is None:
+        with engine.connect() as conn:
+            max_id = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+        # Les avis créés après le lancement sont déjà notés par le nouveau modèle
+        state = {
+            'backend': backend,
+            'only_unprocessed': only_unprocessed,
+            'max_id': max_id,
+            'last_id': 0,
+            'rescored': 0,
+            'started_at': datetime.utcnow().isoformat(),
+        }
+    elif verbose:
+        print(f"↩️  Reprise après l'avis {state['last_id']} ({state['rescored']} déjà traités)")
+    backend = state['backend']
+
+    def log(message):
+        if verbose:
+            print(message)
+
+    started = time.perf_counter()
+    done = 0
+
+    def write(results):
+        nonlocal done
+        with engine.begin() as conn:
+            conn.execute(stmt, results)
+        done += len(results)
+        state['last_id'] = results[-1]['b_id']
+        state['rescored'] += len(results)
+        save_checkpoint(checkpoint_path, state)
+        elapsed = time.perf_counter() - started
+        log(f"   … {state['rescored']} avis (id ≤ {state['last_id']}, {done / elapsed:,.0f} avis/s)")
+
+    chunks = iter_chunks(
+        engine, state['last_id'], state['max_id'], chunk_size, state.get('only_unprocessed', False)
+    )
+    if workers <= 0:
+        _init_worker(backend)
+        for rows in chunks:
+            write(score_chunk(rows))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(backend,)) as pool:
+            # File FIFO bornée : l'ordre d'écriture suit l'ordre des id, le checkpoint reste valide
+            pending = deque()
+            for rows in chunks:
+                pending.append(pool.submit(score_chunk, rows))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    rescore_seconds = time.perf_counter() - started
+    log("📊 Recalcul des agrégats produits...")
+    products = rebuild_product_aggregates(engine)
+    rollups.backfill(engine)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {
+        'rescored': done,
+        'products': products,
+        'seconds': round(time.perf_counter() - started, 2),
+        'reviews_per_s': round(done / rescore_seconds, 1) if rescore_seconds > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcul du sentiment de tous les avis")
+    parser.add_argument('--backend', default=None, help="Backend de SentimentAnalyzer (défaut : SENTIMENT_BACKEND)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="0 : dans le processus courant")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    parser.add_argument('--resume', action='store_true', help="Reprendre depuis le fichier de reprise")
+    parser.add_argument('--only-unprocessed', action='store_true',
+                        help="Seulement les avis non notés ou notés en mode dégradé")
+    parser.add_argument('--database-url', default=None, help="Par défaut : DATABASE_URL de la configuration")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from models.database import engine
+
+    stats = rescore(
+        engine,
+        backend=args.backend,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        only_unprocessed=args.only_unprocessed
+    )
+    print(f"\n✅ {stats['rescored']} avis recalculés, {stats['products']} produits mis à jour "
+          f"en {stats['seconds']}s ({stats['reviews_per_s']} avis/s)")
+
+
+if __name__ == "__main__":
+    main()
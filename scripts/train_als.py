@@ -0,0 +1,52 @@
+"""
+Entraîne le modèle de recommandation par facteurs latents (ALS) hors de l'API
+
+Le modèle est enregistré dans ALS_MODEL_PATH ; les processus API le
+chargent à la place de leur propre entraînement tant qu'il a moins de
+ALS_RETRAIN_INTERVAL secondes (à lancer par cron, par exemple).
+
+Exemples :
+    python scripts/train_als.py
+    python scripts/train_als.py --factors 128 --iterations 15 --alpha 40
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.database import SessionLocal
+from services.recommender import ImplicitALS, load_interactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement ALS (facteurs latents)")
+    parser.add_argument('--factors', type=int, default=None)
+    parser.add_argument('--iterations', type=int, default=None)
+    parser.add_argument('--regularization', type=float, default=None)
+    parser.add_argument('--alpha', type=float, default=None)
+    parser.add_argument('--output', default=None, help="Chemin du modèle (par défaut : ALS_MODEL_PATH)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        interactions = load_interactions(db)
+    finally:
+        db.close()
+    if interactions is None:
+        sys.exit("Aucun avis signé : rien à entraîner")
+    print(f"📥 {len(interactions[0])} avis chargés en {time.perf_counter() - start:.1f}s")
+
+    model = ImplicitALS(args.factors, args.iterations, args.regularization, args.alpha).fit(*interactions)
+    model.save(args.output)
+
+    print(f"✅ {len(model.user_ids)} utilisateurs x {len(model.item_ids)} produits, {model.factors} facteurs")
+    print(f"   ⏱️  Entraînement : {model.train_seconds:.1f}s ({model.iterations} itérations)")
+    print(f"   💾 Facteurs float32 : {model.nbytes / 1024 / 1024:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Entraîne le modèle élève distillé à partir des étiquettes de SentimentAnalyzer
+
+Exemples :
+    python scripts/train_student.py --source db --limit 200000
+    python scripts/train_student.py --source csv --csv avis.csv
+    python scripts/train_student.py --source synthetic --size 20000 --teacher-backend lexicon
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.preprocessor import TextPreprocessor
+from services.distillation import label_with_teacher, save_student, train_student
+
+
+def iter_db_texts(limit: int, chunk_size: int = 10000):
+    from models.database import SessionLocal, Review
+    db = SessionLocal()
+    try:
+        query = db.query(Review.text).filter(Review.text.isnot(None)).order_by(Review.id)
+        if limit:
+            query = query.limit(limit)
+        for (text,) in query.yield_per(chunk_size):
+            yield text
+    finally:
+        db.close()
+
+
+def iter_csv_texts(path: str, limit: int):
+    with open(path, encoding='utf-8') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if limit and i >= limit:
+                break
+            yield row['text']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distillation du modèle de sentiment")
+    parser.add_argument('--source', choices=['db', 'csv', 'synthetic'], default='db')
+    parser.add_argument('--csv', default=None, help="CSV avec une colonne text")
+    parser.add_argument('--size', type=int, default=20000, help="Taille du corpus synthétique")
+    parser.add_argument('--limit', type=int, default=0, help="Nombre maximal d'avis (0 : tous)")
+    parser.add_argument('--teacher-backend', default='bert', choices=['bert', 'tiered', 'lexicon'])
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--output-dir', default=None)
+    args = parser.parse_args()
+
+    if args.source == 'db':
+        texts = list(iter_db_texts(args.limit))
+    elif args.source == 'csv':
+        texts = list(iter_csv_texts(args.csv, args.limit))
+    else:
+        from services.corpora import make_corpus
+        texts = make_corpus(args.size)
+
+    print(f"🎓 Étiquetage de {len(texts)} avis par l'enseignant ({args.teacher_backend})...")
+    from services.sentiment_analyzer import SentimentAnalyzer
+    teacher = SentimentAnalyzer(backend=args.teacher_backend)
+    start = time.perf_counter()
+    processed, languages, labels = label_with_teacher(teacher, TextPreprocessor(), texts)
+    print(f"   ✓ {len(texts) / (time.perf_counter() - start):.0f} avis/s côté enseignant")
+
+    print("🧪 Entraînement de l'élève...")
+    student = train_student(processed, languages, labels, holdout=args.holdout)
+
+    # Débit de service mono-cœur, par lots
+    start = time.perf_counter()
+    for i in range(0, len(processed), 4096):
+        student.predict(processed[i:i + 4096], languages[i:i + 4096])
+    throughput = len(processed) / (time.perf_counter() - start)
+
+    path = save_student(student, args.output_dir, {
+        'teacher_backend': args.teacher_backend,
+        'source': args.source,
+        'batch_reviews_per_s': round(throughput, 1),
+    })
+
+    metadata = student.metadata
+    print(f"\n✅ Modèle v{metadata['version']} enregistré : {path}")
+    if metadata['teacher_agreement'] is not None:
+        print(f"   📊 Accord avec l'enseignant : {metadata['teacher_agreement']:.1%}")
+        for label, rate in metadata['agreement_per_class'].items():
+            print(f"      - {label}: {rate:.1%}")
+    print(f"   ⚡ Débit (lots de 4096) : {throughput:,.0f} avis/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Corpus et données synthétiques (FR / AR / Darija) : benchmarks, données de test, distillation
+"""
+
+import random
+from typing import List, Tuple
+
+# Débuts d'avis étiquetés par sentiment, puis détails neutres
+OPENINGS = {
+    'fr': {
+        'Positif': [
+            "Excellent produit", "Qualité au top", "Je recommande vivement",
+            "Bon rapport qualité-prix", "Livraison rapide, très satisfait", "Parfait"
+        ],
+        'Neutre': [
+            "Produit correct", "Rien d'exceptionnel", "Conforme à la description",
+            "Bien mais pourrait être amélioré"
+        ],
+        'Négatif': [
+            "Très déçu", "Service client médiocre", "Arrivé cassé",
+            "Produit défectueux", "Arnaque, à éviter"
+        ],
+    },
+    'ar': {
+        'Positif': ["منتج ممتاز", "رائع جدا", "جودة عالية", "أنصح به بشدة"],
+        'Neutre': ["منتج عادي", "مطابق للوصف", "لا بأس به"],
+        'Négatif': ["غير راضي عن الجودة", "المنتج وصل تالف", "خدمة العملاء سيئة", "خيبة أمل كبيرة"],
+    },
+    'darija': {
+        'Positif': ["المنتوج زوين بزاف", "دابا خدام مزيان", "السلعة ديال بصح", "كنصح بيه"],
+        'Neutre': ["واش كاين شي حد شراه", "عادي ماشي خايب", "الثمن غالي شوية"],
+        'Négatif': ["ماعجبنيش هاد المنتوج", "ماشي بحال التصويرة", "خايب بزاف"],
+    },
+}
+DETAILS = {
+    'fr': [
+        "la batterie tient toute la journée", "l'emballage était abîmé",
+        "le vendeur a répondu rapidement", "pas comme sur la photo",
+        "la taille correspond bien", "le prix est un peu élevé",
+        "fonctionne depuis un mois", "livré en deux jours à Casablanca"
+    ],
+    'ar': [
+        "التوصيل كان سريعا", "مطابق للوصف", "لا يعمل بشكل صحيح",
+        "التغليف جيد", "البطارية ضعيفة", "الحجم مناسب"
+    ],
+    'darija': [
+        "وصلني فنهار واحد", "البارح تقاضى ليا", "الخدمة ديالهم زوينة",
+        "فين نرجعو", "شوية ديال الصبر"
+    ],
+}
+SEPARATORS = {'fr': ', ', 'ar': '، ', 'darija': ' و '}
+
+LANGUAGES = ['fr', 'ar', 'darija']
+SENTIMENTS = ['Positif', 'Neutre', 'Négatif']
+
+CATEGORIES = [
+    "Électronique", "Informatique", "Électroménager", "Chaussures",
+    "Audio", "Photo", "Mode", "Maison", "Beauté", "Sport"
+]
+PRODUCT_WORDS = [
+    "smartphone", "laptop", "casque", "montre", "aspirateur", "cafetière",
+    "baskets", "appareil photo", "tablette", "enceinte", "parfum", "tapis"
+]
+PRODUCT_ADJECTIVES = [
+    "sans fil", "portable", "professionnel", "connecté", "compact",
+    "haute performance", "5G", "réduction de bruit", "automatique"
+]
+
+
+def make_review_text(rng: random.Random, language: str, n_details: int = 1, sentiment: str = None) -> str:
+    """Génère un avis synthétique dans la langue (et le sentiment) demandés"""
+    openings = OPENINGS[language]
+    sentiment = sentiment or rng.choice(SENTIMENTS)
+    parts = [rng.choice(openings[sentiment])] + [rng.choice(DETAILS[language]) for _ in range(n_details)]
+    return SEPARATORS[language].join(parts)
+
+
+def make_corpus(
+    size: int,
+    seed: int = 42,
+    language_mix=(0.6, 0.25, 0.15),
+    long_ratio: float = 0.1
+) -> List[str]:
+    """Corpus d'avis FR/AR/Darija avec une part d'avis longs"""
+    rng = random.Random(seed)
+    languages = rng.choices(LANGUAGES, weights=language_mix, k=size)
+    corpus = []
+    for language in languages:
+        n_details = rng.randint(20, 40) if rng.random() < long_ratio else rng.randint(1, 3)
+        corpus.append(make_review_text(rng, language, n_details))
+    return corpus
+
+
+def make_labelled_corpus(size: int, seed: int = 42, language_mix=(0.6, 0.25, 0.15)) -> List[Tuple[str, str, str]]:
+    """Avis synthétiques étiquetés : (texte, langue, sentiment attendu)"""
+    rng = random.Random(seed)
+    corpus = []
+    for language in rng.choices(LANGUAGES, weights=language_mix, k=size):
+        sentiment = rng.choices(SENTIMENTS, weights=(0.6, 0.25, 0.15))[0]
+        corpus.append((make_review_text(rng, language, rng.randint(0, 2), sentiment=sentiment), language, sentiment))
+    return corpus
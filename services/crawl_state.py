@@ -0,0 +1,111 @@
+"""
+État de crawl persistant (SQLite) pour le scraping incrémental
+
+Par URL et par usage (avis, fiche produit : une même page peut servir aux
+deux) : ETag et Last-Modified renvoyés par le site (requêtes
+conditionnelles If-None-Match / If-Modified-Since) et empreinte du contenu
+téléchargé, pour ignorer une page identique même sans validateurs HTTP.
+Par avis : une empreinte (produit, note, texte normalisé) ; un avis déjà vu
+n'est plus renvoyé, donc ni réinséré ni réanalysé.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import settings
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def review_fingerprint(product_url: str, rating, text: str) -> str:
+    """Empreinte stable d'un avis : insensible à la casse et aux espaces"""
+    normalized = re.sub(r'\s+', ' ', text or '').strip().lower()
+    key = f"{product_url}\x1f{float(rating or 0):.1f}\x1f{normalized}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path: str = None):
+        self.path = path or settings.CRAWL_STATE_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT, kind TEXT, etag TEXT, last_modified TEXT, "
+                "content_hash TEXT, fetched_at REAL, PRIMARY KEY (url, kind))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS review_fingerprints ("
+                "fingerprint TEXT PRIMARY KEY, url TEXT, first_seen REAL)"
+            )
+
+    def get_page(self, url: str, kind: str = 'page') -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, fetched_at FROM pages WHERE url = ? AND kind = ?",
+                (url, kind)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('etag', 'last_modified', 'content_hash', 'fetched_at'), row))
+
+    def conditional_headers(self, url: str, kind: str = 'page') -> Dict[str, str]:
+        """En-têtes If-None-Match / If-Modified-Since pour une URL déjà visitée"""
+        page = self.get_page(url, kind)
+        headers = {}
+        if page:
+            if page['etag']:
+                headers['If-None-Match'] = page['etag']
+            if page['last_modified']:
+                headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+    def save_page(self, url: str, etag: Optional[str], last_modified: Optional[str], digest: str, kind: str = 'page'):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, kind, etag, last_modified, content_hash, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, kind, etag, last_modified, digest, time.time())
+            )
+
+    def touch_page(self, url: str, kind: str = 'page'):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ? AND kind = ?", (time.time(), url, kind)
+            )
+
+    def unseen(self, fingerprints: Iterable[str]) -> set:
+        """Sous-ensemble des empreintes encore jamais enregistrées"""
+        fingerprints = list(dict.fromkeys(fingerprints))
+        seen = set()
+        with self._lock:
+            # Paquets sous la limite de paramètres SQLite
+            for start in range(0, len(fingerprints), 500):
+                chunk = fingerprints[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                seen.update(row[0] for row in self._conn.execute(
+                    f"SELECT fingerprint FROM review_fingerprints WHERE fingerprint IN ({placeholders})", chunk
+                ))
+        return set(fingerprints) - seen
+
+    def add_fingerprints(self, url: str, fingerprints: List[str]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO review_fingerprints (fingerprint, url, first_seen) VALUES (?, ?, ?)",
+                [(fingerprint, url, now) for fingerprint in fingerprints]
+            )
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,233 @@
+"""
+Détection de quasi-doublons d'avis par MinHash LSH
+
+Le texte brut de l'avis est normalisé comme pour la recherche
+(normalize_for_search : minuscules, ponctuation retirée, stopwords
+conservés) puis découpé en bigrammes de mots. Le texte prétraité ne
+convient pas : les stopwords NLTK français contiennent « pas », si bien
+que « bon » et « pas bon » y deviennent identiques. Sa signature MinHash
+(num_perm minima de hachages permutés) estime la similarité de Jaccard
+entre deux avis. L'index LSH range les signatures par bandes de `rows`
+valeurs : deux avis similaires partagent une bande avec une forte
+probabilité, seuls ces candidats sont vérifiés contre DEDUP_THRESHOLD.
+Les textes trop courts ne sont comparés qu'à l'identique.
+
+Les avis canoniques sont écrits un par un dans la table review_dedup dès
+leur ajout ; chaque worker relit les lignes écrites par les autres au plus
+toutes les DEDUP_SYNC_INTERVAL secondes. Rien n'est perdu à l'arrêt ou en
+cas de plantage, et aucun worker n'écrase les entrées des autres.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, insert, select
+
+from config import settings
+from models.database import ReviewDedup, engine as default_engine
+from services.metrics import record_cache
+from services.preprocessor import normalize_for_search
+
+SHINGLE_SIZE = 2
+MIN_TOKENS_FOR_NEAR = 4
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def _hash(value: str) -> int:
+    # Hash stable entre processus (contrairement à hash()), nécessaire pour la persistance
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def shingles(tokens: List[str]) -> set:
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+ENTRY_FIELDS = ('review_id', 'product_id', 'user_id', 'sentiment', 'sentiment_score', 'confidence')
+
+
+class DuplicateIndex:
+    def __init__(self, num_perm: int = 64, rows: int = 4, threshold: float = None, seed: int = 1, engine=None):
+        if num_perm % rows:
+            raise ValueError("num_perm doit être un multiple de rows")
+        self.num_perm = num_perm
+        self.rows = rows
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Permutations h -> (a*h + b) mod p ; a*h tient sur 64 bits car a, h < 2^32
+        self._a = rng.integers(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._clear()
+
+        # Table partagée (None : index en mémoire seulement, ex. scripts)
+        self.engine = engine
+        self._sync_lock = threading.Lock()
+        self._synced_at = 0.0
+
+    def _clear(self):
+        self.bands: List[Dict[bytes, List[int]]] = [{} for _ in range(self.num_perm // self.rows)]
+        self.exact: Dict[bytes, int] = {}
+        self.signatures = np.empty((0, self.num_perm), dtype=np.uint32)
+        self.size = 0
+        self.entries: List[Dict] = []
+        self.keys: List[bytes] = []
+        self._synced_id = 0
+        # Plus petit id de review_dedup connu : s'il a disparu, la table a été remplacée
+        self._first_id = None
+        self._own_rows = set()
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((_hash(s) for s in shingles(text.split())), dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def _text_key(text: str) -> bytes:
+        return hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=16).digest()
+
+    def _band_keys(self, signature: np.ndarray):
+        return [signature[i:i + self.rows].tobytes() for i in range(0, self.num_perm, self.rows)]
+
+    def find(self, text: str) -> Optional[Dict]:
+        """Entrée canonique d'un avis (texte brut) identique ou quasi identique, sinon None"""
+        text = normalize_for_search(text)
+        if not text:
+            # Avis sans mot (emojis seuls...) : rien de fiable à comparer
+            return None
+        if self.engine is not None and time.monotonic() - self._synced_at > settings.DEDUP_SYNC_INTERVAL:
+            self.sync()
+        key = self._text_key(text)
+        near = len(text.split()) >= MIN_TOKENS_FOR_NEAR
+        signature = self.signature(text) if near else None
+        with self._lock:
+            self.stats['checked'] += 1
+            match = self.exact.get(key)
+            if match is not None:
+                self.stats['exact'] += 1
+            elif near:
+                candidates = {c for band, k in zip(self.bands, self._band_keys(signature)) for c in band.get(k, ())}
+                if candidates:
+                    candidates = np.fromiter(candidates, dtype=np.int64)
+                    similarity = (self.signatures[candidates] == signature).mean(axis=1)
+                    best = int(similarity.argmax())
+                    if similarity[best] >= self.threshold:
+                        match = int(candidates[best])
+                        self.stats['near'] += 1
+            entry = self.entries[match] if match is not None else None
+        record_cache('dedup', entry is not None)
+        return entry
+
+    def add(self, text: str, entry: Dict) -> Optional[int]:
+        """Enregistre un avis canonique (texte brut ; sentiment, review_id...) ; retourne son indice"""
+        text = normalize_for_search(text)
+        if not text:
+            return None
+        key, signature = self._text_key(text), self.signature(text)
+        if self.engine is None:
+            return self._add(key, signature, entry)
+        # Ligne écrite tout de suite ; sync() ne la rechargera pas dans ce processus
+        with self._sync_lock:
+            with self.engine.begin() as conn:
+                row_id = conn.execute(
+                    insert(ReviewDedup.__table__).values(self._row(key, signature, entry))
+                ).inserted_primary_key[0]
+            self._own_rows.add(row_id)
+            if self._first_id is None:
+                self._first_id = row_id
+            return self._add(key, signature, entry)
+
+    @staticmethod
+    def _row(key: bytes, signature: np.ndarray, entry: Dict) -> Dict:
+        return {'text_key': key, 'signature': signature.tobytes(), **{f: entry.get(f) for f in ENTRY_FIELDS}}
+
+    def sync(self, chunk_size: int = 50_000) -> 'DuplicateIndex':
+        """Charge les avis canoniques écrits (par les autres workers) depuis le dernier appel"""
+        if self.engine is None:
+            return self
+        table = ReviewDedup.__table__
+        with self._sync_lock:
+            if self._first_id is not None:
+                with self.engine.connect() as conn:
+                    first_id = conn.execute(select(func.min(table.c.id))).scalar()
+                if first_id is None or first_id > self._first_id:
+                    # Table remplacée (persist) ou vidée : rechargement complet
+                    with self._lock:
+                        self._clear()
+            while True:
+                with self.engine.connect() as conn:
+                    rows = conn.execute(
+                        select(table).where(table.c.id > self._synced_id).order_by(table.c.id).limit(chunk_size)
+                    ).all()
+                for row in rows:
+                    if row.id in self._own_rows:
+                        self._own_rows.discard(row.id)
+                    else:
+                        signature = np.frombuffer(row.signature, dtype=np.uint32)
+                        self._add(row.text_key, signature, {f: getattr(row, f) for f in ENTRY_FIELDS})
+                    self._synced_id = row.id
+                    if self._first_id is None:
+                        self._first_id = row.id
+                if len(rows) < chunk_size:
+                    break
+            self._synced_at = time.monotonic()
+        return self
+
+    def _add(self, key: bytes, signature: np.ndarray, entry: Dict) -> int:
+        with self._lock:
+            index = self.size
+            if index == len(self.signatures):
+                # Capacité doublée : ajout amorti en O(1)
+                grown = np.empty((max(1024, 2 * index), self.num_perm), dtype=np.uint32)
+                grown[:index] = self.signatures[:index]
+                self.signatures = grown
+            self.signatures[index] = signature
+            self.size += 1
+            self.entries.append(entry)
+            self.keys.append(key)
+            self.exact.setdefault(key, index)
+            for band, band_key in zip(self.bands, self._band_keys(signature)):
+                band.setdefault(band_key, []).append(index)
+        return index
+
+    def report(self) -> Dict:
+        checked = self.stats['checked']
+        duplicates = self.stats['exact'] + self.stats['near']
+        return {
+            'indexed': self.size,
+            'checked': checked,
+            'exact_duplicates': self.stats['exact'],
+            'near_duplicates': self.stats['near'],
+            'duplicate_rate': duplicates / checked if checked else 0.0,
+        }
+
+    def persist(self, engine, chunk_size: int = 5000):
+        """Remplace le contenu de review_dedup par cet index (scripts/dedup_reviews.py --save)
+
+        Les nouvelles lignes sont insérées avant la suppression des anciennes : leurs
+        id suivent donc les précédents (même sans AUTOINCREMENT sur SQLite) et les
+        workers, qui ne relisent que les id supérieurs au dernier vu, les chargent.
+        """
+        table = ReviewDedup.__table__
+        with self._lock, engine.begin() as conn:
+            previous_max = conn.execute(select(func.max(table.c.id))).scalar()
+            for start in range(0, self.size, chunk_size):
+                conn.execute(insert(table), [
+                    self._row(self.keys[i], self.signatures[i], self.entries[i])
+                    for i in range(start, min(start + chunk_size, self.size))
+                ])
+            if previous_max is not None:
+                conn.execute(table.delete().where(table.c.id <= previous_max))
+
+
+def load_or_create(engine=None) -> DuplicateIndex:
+    """Index partagé : avis canoniques de review_dedup, puis ajouts écrits au fil de l'eau"""
+    return DuplicateIndex(engine=engine or default_engine).sync()
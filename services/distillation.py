@@ -0,0 +1,165 @@
+"""
+Distillation : modèle élève léger entraîné sur les étiquettes de SentimentAnalyzer
+
+L'élève est un HashingVectorizer (mots + bigrammes, sans vocabulaire à
+stocker) suivi d'une régression logistique. Il est sauvegardé comme
+artefact versionné (joblib + métadonnées JSON) et servi par le backend
+`student` de SentimentAnalyzer.
+"""
+
+import glob
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from config import settings
+
+CLASSES = ['Négatif', 'Neutre', 'Positif']
+ARTIFACT_PATTERN = re.compile(r'student-v(\d+)\.joblib$')
+
+
+def _with_language(texts: Sequence[str], languages: Sequence[str]) -> List[str]:
+    # La langue devient un token, le modèle apprend un biais par langue
+    return [f"__lang_{language}__ {text}" for text, language in zip(texts, languages)]
+
+
+class StudentModel:
+    def __init__(self, n_features: int = 2 ** 20, C: float = 4.0):
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm='l2',
+            token_pattern=r'(?u)\b\w+\b'
+        )
+        self.classifier = LogisticRegression(C=C, max_iter=1000)
+        self.metadata: Dict = {}
+
+    def fit(self, texts: Sequence[str], languages: Sequence[str], labels: Sequence[str]):
+        X = self.vectorizer.transform(_with_language(texts, languages))
+        self.classifier.fit(X, labels)
+        return self
+
+    def predict_proba(self, texts: Sequence[str], languages: Sequence[str]) -> np.ndarray:
+        """Probabilités par classe, colonnes dans l'ordre de CLASSES"""
+        X = self.vectorizer.transform(_with_language(texts, languages))
+        proba = self.classifier.predict_proba(X)
+        order = [list(self.classifier.classes_).index(c) if c in self.classifier.classes_ else None for c in CLASSES]
+        aligned = np.zeros((proba.shape[0], len(CLASSES)), dtype=np.float64)
+        for j, source in enumerate(order):
+            if source is not None:
+                aligned[:, j] = proba[:, source]
+        return aligned
+
+    def predict(self, texts: Sequence[str], languages: Sequence[str]) -> List[dict]:
+        if not len(texts):
+            return []
+        proba = self.predict_proba(texts, languages)
+        best = proba.argmax(axis=1)
+        scores = proba[:, 2] - proba[:, 0]
+        confidences = proba.max(axis=1)
+        return [
+            {
+                'sentiment': CLASSES[b],
+                'sentiment_score': 0.0 if b == 1 else float(s),
+                'confidence': float(c)
+            }
+            for b, s, c in zip(best, scores, confidences)
+        ]
+
+
+def label_with_teacher(teacher, preprocessor, texts: Iterable[str]) -> Tuple[List[str], List[str], List[str]]:
+    """Prétraite et étiquette un corpus avec le modèle enseignant"""
+    processed, languages, labels = [], [], []
+    for text in texts:
+        processed_text, language = preprocessor.preprocess(text)
+        result = teacher.analyze(processed_text, language, raw_text=text)
+        processed.append(processed_text)
+        languages.append(language)
+        labels.append(result['sentiment'])
+    return processed, languages, labels
+
+
+def train_student(
+    texts: Sequence[str],
+    languages: Sequence[str],
+    labels: Sequence[str],
+    holdout: float = 0.2,
+    seed: int = 42,
+    **model_kwargs
+) -> StudentModel:
+    """Entraîne l'élève et mesure son accord avec l'enseignant sur un jeu réservé"""
+    rng = np.random.default_rng(seed)
+    indices = rng.permutation(len(texts))
+    n_holdout = int(len(texts) * holdout)
+    test_idx, train_idx = indices[:n_holdout], indices[n_holdout:]
+
+    def take(values, idx):
+        return [values[i] for i in idx]
+
+    student = StudentModel(**model_kwargs)
+    start = time.perf_counter()
+    student.fit(take(texts, train_idx), take(languages, train_idx), take(labels, train_idx))
+    train_seconds = time.perf_counter() - start
+
+    agreement = None
+    per_class = {}
+    throughput = None
+    if n_holdout:
+        test_texts, test_languages = take(texts, test_idx), take(languages, test_idx)
+        test_labels = np.array(take(labels, test_idx))
+        start = time.perf_counter()
+        predicted = np.array([p['sentiment'] for p in student.predict(test_texts, test_languages)])
+        elapsed = time.perf_counter() - start
+        agreement = float((predicted == test_labels).mean())
+        throughput = n_holdout / elapsed if elapsed > 0 else None
+        for label in CLASSES:
+            mask = test_labels == label
+            if mask.any():
+                per_class[label] = float((predicted[mask] == label).mean())
+
+    student.metadata = {
+        'trained_at': datetime.utcnow().isoformat(),
+        'n_train': len(train_idx),
+        'n_holdout': n_holdout,
+        'teacher_agreement': agreement,
+        'agreement_per_class': per_class,
+        'label_distribution': {label: int(sum(1 for l in labels if l == label)) for label in CLASSES},
+        'train_seconds': round(train_seconds, 2),
+        'holdout_reviews_per_s': round(throughput, 1) if throughput else None,
+    }
+    return student
+
+
+def save_student(student: StudentModel, directory: str = None, extra_metadata: Dict = None) -> str:
+    """Sauvegarde l'élève sous student-v{N}.joblib (N incrémenté)"""
+    directory = directory or settings.STUDENT_MODEL_DIR
+    os.makedirs(directory, exist_ok=True)
+    versions = [int(m.group(1)) for m in map(ARTIFACT_PATTERN.search, os.listdir(directory)) if m]
+    version = max(versions, default=0) + 1
+
+    student.metadata.update(extra_metadata or {})
+    student.metadata['version'] = version
+    path = os.path.join(directory, f"student-v{version}.joblib")
+    joblib.dump(student, path)
+    with open(path.replace('.joblib', '.json'), 'w', encoding='utf-8') as f:
+        json.dump(student.metadata, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_student(path: Optional[str] = None) -> StudentModel:
+    """Charge un artefact précis ou, à défaut, la version la plus récente"""
+    if path is None:
+        candidates = glob.glob(os.path.join(settings.STUDENT_MODEL_DIR, 'student-v*.joblib'))
+        if not candidates:
+            raise FileNotFoundError(f"Aucun modèle élève dans {settings.STUDENT_MODEL_DIR}")
+        path = max(candidates, key=lambda p: int(ARTIFACT_PATTERN.search(p).group(1)))
+    return joblib.load(path)
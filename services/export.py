@@ -0,0 +1,176 @@
+"""
+Export analytique en colonnes (Parquet / Arrow IPC)
+
+Les lignes sont lues en flux depuis SQL (stream_results + partitions) et
+converties bloc par bloc en RecordBatch Arrow, sans objets ORM : chaque
+bloc devient un row group Parquet ou un message Arrow, la mémoire reste
+bornée par la taille d'un bloc.
+"""
+
+from datetime import date, datetime, time
+from typing import Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+from models.database import Product, Review
+
+FORMATS = ('parquet', 'arrow')
+MEDIA_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrows'}
+
+REVIEW_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('product_id', pa.int64()),
+    ('product_name', pa.string()),
+    ('category', pa.dictionary(pa.int32(), pa.string())),
+    ('user_id', pa.int64()),
+    ('rating', pa.float64()),
+    ('text', pa.string()),
+    ('language', pa.dictionary(pa.int32(), pa.string())),
+    ('sentiment', pa.dictionary(pa.int32(), pa.string())),
+    ('sentiment_score', pa.float64()),
+    ('confidence', pa.float64()),
+    ('created_at', pa.timestamp('us')),
+])
+
+PRODUCT_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('category', pa.dictionary(pa.int32(), pa.string())),
+    ('platform', pa.dictionary(pa.int32(), pa.string())),
+    ('price', pa.float64()),
+    ('avg_rating', pa.float64()),
+    ('total_reviews', pa.int64()),
+    ('sentiment_score', pa.float64()),
+    ('positive_reviews', pa.int64()),
+    ('neutral_reviews', pa.int64()),
+    ('negative_reviews', pa.int64()),
+    ('created_at', pa.timestamp('us')),
+])
+
+
+def _as_datetime(value, end: bool = False) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.max if end else time.min)
+
+
+def reviews_query(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category: Optional[str] = None,
+    language: Optional[str] = None
+):
+    reviews, products = Review.__table__, Product.__table__
+    query = (
+        select(
+            reviews.c.id, reviews.c.product_id, products.c.name, products.c.category,
+            reviews.c.user_id, reviews.c.rating,
+            reviews.c.text,
+            reviews.c.language, reviews.c.sentiment, reviews.c.sentiment_score,
+            reviews.c.confidence, reviews.c.created_at
+        )
+        .select_from(reviews.outerjoin(products, reviews.c.product_id == products.c.id))
+        .order_by(reviews.c.id)
+    )
+    if start is not None:
+        query = query.where(reviews.c.created_at >= _as_datetime(start))
+    if end is not None:
+        query = query.where(reviews.c.created_at <= _as_datetime(end, end=True))
+    if category:
+        query = query.where(products.c.category == category)
+    if language:
+        query = query.where(reviews.c.language == language)
+    return query
+
+
+def products_query(category: Optional[str] = None):
+    products = Product.__table__
+    query = select(*(products.c[name] for name in PRODUCT_SCHEMA.names)).order_by(products.c.id)
+    if category:
+        query = query.where(products.c.category == category)
+    return query
+
+
+def iter_record_batches(engine, query, schema: pa.Schema, chunk_size: int = 50_000) -> Iterator[pa.RecordBatch]:
+    """Convertit un résultat SQL lu en flux en RecordBatch de chunk_size lignes"""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            arrays = [
+                pa.array(values, type=field.type.value_type).dictionary_encode()
+                if pa.types.is_dictionary(field.type) else pa.array(values, type=field.type)
+                for values, field in zip(columns, schema)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Fichier en écriture seule dont le contenu est récupéré au fil de l'eau"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _open_writer(sink, schema: pa.Schema, fmt: str):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(sink, schema, compression='zstd')
+    if fmt == 'arrow':
+        return pa.ipc.new_stream(sink, schema)
+    raise ValueError(f"Format inconnu: {fmt}")
+
+
+def write_export(engine, query, schema: pa.Schema, sink, fmt: str = 'parquet', chunk_size: int = 50_000) -> int:
+    """Écrit l'export dans un fichier (chemin ou objet fichier) ; retourne le nombre de lignes"""
+    rows = 0
+    writer = _open_writer(sink, schema, fmt)
+    try:
+        for batch in iter_record_batches(engine, query, schema, chunk_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+def stream_export(engine, query, schema: pa.Schema, fmt: str = 'parquet', chunk_size: int = 50_000) -> Iterator[bytes]:
+    """Générateur d'octets pour StreamingResponse : un bloc SQL → un morceau de réponse"""
+    sink = _ChunkSink()
+    writer = _open_writer(pa.PythonFile(sink, mode='w'), schema, fmt)
+    try:
+        for batch in iter_record_batches(engine, query, schema, chunk_size):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,214 @@
+"""
+Backends d'analyse HTML pour le scraper et sélecteurs CSS par site
+
+Trois backends, choisis par SCRAPING_PARSER (auto : le plus rapide installé) :
+- selectolax : parseur C (Lexbor), sélecteurs CSS natifs ;
+- lxml : libxml2, sélecteurs CSS compilés une fois en XPath (cssselect) ;
+- bs4 : BeautifulSoup avec SoupStrainer, seuls les conteneurs utiles sont
+  construits en arbre (parseur lxml si disponible).
+'bs4-full' reproduit l'ancien comportement (arbre complet, html.parser)
+pour comparaison.
+
+Les sélecteurs d'un site (conteneur d'avis, note, texte, champs produit)
+sont dans SITE_SELECTORS ; SCRAPING_SELECTORS_PATH (JSON) permet d'en
+ajouter ou d'en remplacer sans toucher au code.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import settings
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    lxml = None
+    CSSSelector = None
+
+SITE_SELECTORS = {
+    'jumia': {
+        'review': 'div.review-item',
+        'rating': 'div.rating',
+        'rating_attr': 'data-rating',
+        'text': 'p.review-text',
+        'product': {
+            'name': 'h1.product-title',
+            'price': 'span.price',
+            'description': 'div.description',
+            'category': 'span.category',
+        },
+    },
+}
+
+
+def load_selectors(path: str = None) -> Dict[str, Dict]:
+    """Sélecteurs par défaut, complétés par le fichier JSON de configuration"""
+    selectors = dict(SITE_SELECTORS)
+    path = path or settings.SCRAPING_SELECTORS_PATH
+    if path and os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                selectors.update(json.load(f))
+        except Exception as e:
+            print(f"Erreur lors du chargement des sélecteurs: {e}")
+    return selectors
+
+
+def _text(value: Optional[str]) -> str:
+    return value.strip() if value else ''
+
+
+class SelectolaxParser:
+    name = 'selectolax'
+
+    def reviews(self, content: bytes, site: Dict) -> List[Tuple[Optional[str], str]]:
+        """[(note brute, texte)] des conteneurs d'avis complets"""
+        results = []
+        for node in LexborHTMLParser(content).css(site['review']):
+            rating = node.css_first(site['rating'])
+            text = node.css_first(site['text'])
+            if rating is not None and text is not None:
+                results.append((rating.attributes.get(site['rating_attr']), _text(text.text())))
+        return results
+
+    def product(self, content: bytes, site: Dict) -> Dict[str, str]:
+        tree = LexborHTMLParser(content)
+        fields = {}
+        for field, selector in site['product'].items():
+            node = tree.css_first(selector)
+            fields[field] = _text(node.text()) if node is not None else ''
+        return fields
+
+
+_lxml_parser = None
+
+
+def _lxml_tree(content: bytes):
+    # Sans encodage explicite, libxml2 lit les octets en latin-1 (pages sans <meta charset>)
+    global _lxml_parser
+    if _lxml_parser is None:
+        _lxml_parser = lxml.html.HTMLParser(encoding='utf-8')
+    return lxml.html.fromstring(content, parser=_lxml_parser)
+
+
+@lru_cache(maxsize=256)
+def _css(selector: str):
+    # Compilation CSS → XPath coûteuse : une seule fois par sélecteur
+    return CSSSelector(selector)
+
+
+class LxmlParser:
+    name = 'lxml'
+
+    @staticmethod
+    def _first(element, selector: str):
+        found = _css(selector)(element)
+        return found[0] if found else None
+
+    def reviews(self, content: bytes, site: Dict) -> List[Tuple[Optional[str], str]]:
+        results = []
+        for element in _css(site['review'])(_lxml_tree(content)):
+            rating = self._first(element, site['rating'])
+            text = self._first(element, site['text'])
+            if rating is not None and text is not None:
+                results.append((rating.get(site['rating_attr']), _text(text.text_content())))
+        return results
+
+    def product(self, content: bytes, site: Dict) -> Dict[str, str]:
+        tree = _lxml_tree(content)
+        fields = {}
+        for field, selector in site['product'].items():
+            element = self._first(tree, selector)
+            fields[field] = _text(element.text_content()) if element is not None else ''
+        return fields
+
+
+_SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[\w-]+)?(?:\.(?P<cls>[\w-]+))?$')
+
+
+@lru_cache(maxsize=256)
+def _strainer(selectors: Tuple[str, ...]) -> Optional[SoupStrainer]:
+    """SoupStrainer équivalent à des sélecteurs simples (balise.classe) ; None sinon"""
+    rules = []
+    for selector in selectors:
+        match = _SIMPLE_SELECTOR.match(selector.strip())
+        if not match or not any(match.groups()):
+            return None
+        rules.append((match['tag'], match['cls']))
+
+    def wanted(tag, attrs):
+        classes = (attrs or {}).get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        return any((name is None or name == tag) and (cls is None or cls in classes) for name, cls in rules)
+
+    return SoupStrainer(wanted)
+
+
+class SoupParser:
+    """BeautifulSoup limité aux conteneurs utiles (strained=False : arbre complet)"""
+
+    def __init__(self, strained: bool = True, features: str = None):
+        self.strained = strained
+        self.features = features or ('lxml' if lxml is not None and strained else 'html.parser')
+        self.name = 'bs4' if strained else 'bs4-full'
+
+    def _soup(self, content: bytes, selectors: Tuple[str, ...]):
+        strainer = _strainer(selectors) if self.strained else None
+        return BeautifulSoup(content, self.features, parse_only=strainer)
+
+    def reviews(self, content: bytes, site: Dict) -> List[Tuple[Optional[str], str]]:
+        results = []
+        for element in self._soup(content, (site['review'],)).select(site['review']):
+            rating = element.select_one(site['rating'])
+            text = element.select_one(site['text'])
+            if rating is not None and text is not None:
+                results.append((rating.get(site['rating_attr']), _text(text.text)))
+        return results
+
+    def product(self, content: bytes, site: Dict) -> Dict[str, str]:
+        soup = self._soup(content, tuple(site['product'].values()))
+        fields = {}
+        for field, selector in site['product'].items():
+            element = soup.select_one(selector)
+            fields[field] = _text(element.text) if element is not None else ''
+        return fields
+
+
+BACKENDS = ('selectolax', 'lxml', 'bs4', 'bs4-full')
+
+
+def available_backends() -> List[str]:
+    available = []
+    if LexborHTMLParser is not None:
+        available.append('selectolax')
+    if CSSSelector is not None:
+        available.append('lxml')
+    return available + ['bs4', 'bs4-full']
+
+
+def get_parser(backend: str = None):
+    """Backend demandé ('auto' : selectolax, puis lxml, puis bs4)"""
+    backend = backend or settings.SCRAPING_PARSER
+    if backend == 'auto':
+        backend = available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend HTML inconnu: {backend}")
+    if backend not in available_backends():
+        raise ValueError(f"Backend HTML non installé: {backend}")
+    if backend == 'selectolax':
+        return SelectolaxParser()
+    if backend == 'lxml':
+        return LxmlParser()
+    return SoupParser(strained=backend == 'bs4')
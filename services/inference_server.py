@@ -0,0 +1,245 @@
+"""
+Serveur d'inférence multi-processus sur socket Unix
+
+Le processus parent charge SentimentAnalyzer une seule fois, place les
+poids torch en mémoire partagée puis crée N workers par fork : les pages
+des poids sont partagées (copy-on-write jamais déclenché sur les tenseurs)
+au lieu d'être dupliquées par worker. Chaque worker fixe son nombre de
+threads torch et, si possible, son affinité CPU.
+
+Les workers acceptent les connexions sur la même socket d'écoute (modèle
+pre-fork) : le noyau répartit les connexions. Une connexion = une requête.
+Trame : longueur sur 4 octets (big-endian) puis JSON UTF-8.
+"""
+
+import gc
+import json
+import os
+import signal
+import socket
+import struct
+import time
+from typing import List, Optional, Sequence
+
+from config import settings
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE = 64 * 1024 * 1024
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connexion fermée pendant la lecture")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(conn: socket.socket, payload: dict):
+    data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    conn.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_message(conn: socket.socket) -> dict:
+    (size,) = HEADER.unpack(_recv_exact(conn, HEADER.size))
+    if size > MAX_MESSAGE:
+        raise ValueError(f"Message trop volumineux ({size} octets)")
+    return json.loads(_recv_exact(conn, size).decode('utf-8'))
+
+
+def _share_model_memory(analyzer):
+    """Déplace les poids des pipelines en mémoire partagée avant le fork"""
+    for pipe in {id(m): m for m in analyzer.models.values() if m is not None}.values():
+        model = getattr(pipe, 'model', None)
+        if model is not None and hasattr(model, 'share_memory'):
+            model.share_memory()
+            model.eval()
+
+
+class InferenceServer:
+    def __init__(
+        self,
+        socket_path: str = None,
+        workers: int = None,
+        threads_per_worker: int = None,
+        backend: str = None,
+        pin_cpus: bool = True,
+        analyzer=None,
+        recv_timeout: float = None
+    ):
+        self.socket_path = socket_path or settings.INFERENCE_SOCKET
+        self.workers = workers or settings.INFERENCE_WORKERS
+        self.threads_per_worker = threads_per_worker or settings.INFERENCE_THREADS_PER_WORKER
+        self.backend = backend
+        self.pin_cpus = pin_cpus
+        self.analyzer = analyzer
+        # Un client connecté qui n'envoie rien ne doit pas bloquer le worker
+        self.recv_timeout = settings.INFERENCE_TIMEOUT if recv_timeout is None else recv_timeout
+        self.listener = None
+        self.children = {}
+        self.loaded = False
+        self.running = True
+
+    def load(self):
+        """Charge le modèle dans le parent (une seule fois pour tous les workers)"""
+        # Les tokenizers Rust et OpenMP ne doivent pas avoir démarré de threads avant le fork
+        os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+        if self.analyzer is None:
+            from services.sentiment_analyzer import SentimentAnalyzer
+            self.analyzer = SentimentAnalyzer(backend=self.backend)
+        _share_model_memory(self.analyzer)
+        # Les objets chargés ne seront plus parcourus par le GC : moins de pages copiées
+        gc.collect()
+        gc.freeze()
+        self.loaded = True
+
+    def bind(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        self.listener.listen(1024)
+
+    def _cpus_for(self, index: int) -> Optional[set]:
+        if not self.pin_cpus or not hasattr(os, 'sched_getaffinity'):
+            return None
+        available = sorted(os.sched_getaffinity(0))
+        start = index * self.threads_per_worker
+        if start + self.threads_per_worker > len(available):
+            return None
+        return set(available[start:start + self.threads_per_worker])
+
+    def _worker_loop(self, index: int):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        cpus = self._cpus_for(index)
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+        try:
+            import torch
+            torch.set_num_threads(self.threads_per_worker)
+        except Exception:
+            pass
+
+        analyzer = self.analyzer
+        while True:
+            conn, _ = self.listener.accept()
+            try:
+                conn.settimeout(self.recv_timeout)
+                request = recv_message(conn)
+                results = analyzer.analyze_batch(
+                    request['texts'],
+                    request.get('languages') or ['fr'] * len(request['texts']),
+                    request.get('raw_texts')
+                )
+                send_message(conn, {'results': results, 'worker': index})
+            except Exception as e:
+                try:
+                    send_message(conn, {'error': str(e)})
+                except Exception:
+                    pass
+            finally:
+                conn.close()
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self._worker_loop(index)
+            finally:
+                os._exit(0)
+        self.children[pid] = index
+
+    def _stop(self, *_):
+        self.running = False
+
+    def serve_forever(self):
+        if not self.loaded:
+            self.load()
+        self.bind()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.workers):
+            self._spawn(index)
+        print(f"🚀 Serveur d'inférence : {self.workers} workers × {self.threads_per_worker} threads sur {self.socket_path}")
+
+        try:
+            while self.running:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    pid = 0
+                if pid and pid in self.children and self.running:
+                    index = self.children.pop(pid)
+                    print(f"⚠️  Worker {index} (pid {pid}) arrêté, redémarrage")
+                    self._spawn(index)
+                time.sleep(0.2)
+        finally:
+            for pid in list(self.children):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            for pid in list(self.children):
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+            self.listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class InferenceClient:
+    """Client du serveur d'inférence, compatible avec l'interface de SentimentAnalyzer"""
+
+    def __init__(self, socket_path: str = None, timeout: float = 30.0):
+        from services.lexicon import LexiconSentimentEngine
+        self.socket_path = socket_path or settings.INFERENCE_SOCKET
+        self.timeout = timeout
+        self.lexicon = LexiconSentimentEngine()
+
+    def _request(self, payload: dict) -> dict:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(self.timeout)
+        try:
+            conn.connect(self.socket_path)
+            send_message(conn, payload)
+            response = recv_message(conn)
+        finally:
+            conn.close()
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def analyze_batch(
+        self,
+        texts: Sequence[str],
+        languages: Sequence[str],
+        raw_texts: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        try:
+            return self._request({
+                'texts': list(texts),
+                'languages': list(languages),
+                'raw_texts': list(raw_texts) if raw_texts else None
+            })['results']
+        except Exception as e:
+            print(f"Erreur du serveur d'inférence: {e}")
+            raw_texts = raw_texts or texts
+            results = [self._simple_sentiment_analysis(r or t, l) for t, l, r in zip(texts, languages, raw_texts)]
+            # Repli sur le lexique : à recalculer (rescore_reviews.py --only-unprocessed), jamais canonique
+            for result in results:
+                result['degraded'] = True
+            return results
+
+    def analyze(self, text: str, language: str = 'fr', raw_text: str = None) -> dict:
+        return self.analyze_batch([text], [language], [raw_text] if raw_text else None)[0]
+
+    def _simple_sentiment_analysis(self, text: str, language: str) -> dict:
+        return self.lexicon.analyze(text, language)
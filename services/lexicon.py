@@ -0,0 +1,228 @@
+"""
+Moteur de sentiment par lexique (FR / AR / Darija)
+
+Les lexiques sont compilés une seule fois en dictionnaires de n-grammes
+(jusqu'à MAX_PHRASE_LEN mots) : l'analyse est une passe unique sur les
+tokens avec recherche par dictionnaire, sans balayage de sous-chaînes.
+La négation inverse la polarité des termes qui suivent dans une fenêtre
+de quelques tokens, arrêtée par la ponctuation et les conjonctions (et,
+mais...) ; les formes darija « ما...ش » sont reconnues
+directement sur le token.
+"""
+
+import math
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+MAX_PHRASE_LEN = 3
+NEGATION_WINDOW = 3
+
+# Poids > 0 : positif, < 0 : négatif
+FRENCH_LEXICON = {
+    # positif
+    'excellent': 2.0, 'excellente': 2.0, 'super': 1.5, 'génial': 2.0, 'géniale': 2.0,
+    'parfait': 2.0, 'parfaite': 2.0, 'top': 1.5, 'bien': 1.0, 'bon': 1.0, 'bonne': 1.0,
+    'satisfait': 1.5, 'satisfaite': 1.5, 'recommande': 1.5, 'incroyable': 1.5,
+    'magnifique': 2.0, 'rapide': 1.0, 'conforme': 0.5, 'efficace': 1.0, 'solide': 1.0,
+    'pratique': 1.0, 'content': 1.5, 'contente': 1.5, 'ravi': 2.0, 'ravie': 2.0,
+    'merveilleux': 2.0, 'impeccable': 2.0, 'fiable': 1.0, 'confortable': 1.0,
+    'agréable': 1.0, 'qualité': 0.5, 'bravo': 1.5, 'adore': 2.0, "j'adore": 2.0,
+    'top qualité': 2.0, 'bon rapport qualité prix': 2.0,
+    'rapport qualité prix': 1.0, 'au top': 2.0, 'je recommande': 2.0, 'livraison rapide': 1.5,
+    # négatif
+    'mauvais': -1.5, 'mauvaise': -1.5, 'nul': -2.0, 'nulle': -2.0, 'décevant': -1.5,
+    'décevante': -1.5, 'horrible': -2.0, 'arnaque': -2.5, 'médiocre': -1.5,
+    'cassé': -2.0, 'cassée': -2.0, 'défectueux': -2.0, 'défectueuse': -2.0,
+    'déçu': -2.0, 'déçue': -2.0, 'déception': -2.0, 'endommagé': -2.0, 'endommagée': -2.0,
+    'lent': -1.0, 'lente': -1.0, 'cher': -0.5, 'fragile': -1.0, 'panne': -1.5,
+    'retard': -1.0, 'remboursement': -0.5, 'problème': -1.0, 'éviter': -1.5,
+    'à éviter': -2.5, 'pire': -2.0, 'catastrophe': -2.5, 'inutile': -1.5,
+    'trop cher': -1.5, 'en panne': -2.0, 'service client médiocre': -2.0, 'fonctionne': 0.5,
+}
+
+ARABIC_LEXICON = {
+    # positif
+    'ممتاز': 2.0, 'ممتازة': 2.0, 'رائع': 2.0, 'رائعة': 2.0, 'جيد': 1.0, 'جيدة': 1.0,
+    'جميل': 1.5, 'جميلة': 1.5, 'أنصح': 1.5, 'انصح': 1.5, 'راضي': 1.5, 'راض': 1.5,
+    'سريع': 1.0, 'سريعة': 1.0, 'مطابق': 0.5, 'ممتع': 1.0, 'عالية': 0.5, 'مريح': 1.0,
+    'شكرا': 1.0, 'أفضل': 1.5, 'افضل': 1.5, 'مذهل': 2.0, 'رائعه': 2.0, 'احسن': 1.5,
+    'جودة عالية': 2.0, 'أنصح به': 2.0, 'انصح به': 2.0, 'توصيل سريع': 1.5,
+    # négatif
+    'سيء': -2.0, 'سيئ': -2.0, 'سيئة': -2.0, 'سيئه': -2.0, 'خيبة': -2.0, 'تالف': -2.0,
+    'تالفة': -2.0, 'مكسور': -2.0, 'رديء': -2.0, 'ردي': -2.0, 'مرتفع': -0.5, 'غالي': -1.0,
+    'ضعيف': -1.5, 'ضعيفة': -1.5, 'بطيء': -1.0, 'احتيال': -2.5, 'نصب': -2.5, 'مشكلة': -1.0,
+    'خيبة أمل': -2.5, 'يعمل': 0.5,
+}
+
+DARIJA_LEXICON = {
+    # positif
+    'زوين': 1.5, 'زوينة': 1.5, 'مزيان': 1.5, 'مزيانة': 1.5, 'واعر': 2.0, 'واعرة': 2.0,
+    'نقي': 1.0, 'بصح': 0.5, 'كنصح': 1.5, 'عجبني': 1.5, 'عجبتني': 1.5, 'خدام': 1.0,
+    'خدامة': 1.0, 'ناضي': 2.0, 'ناضية': 2.0, 'هايل': 2.0, 'هايلة': 2.0, 'مزيان بزاف': 2.0,
+    'زوين بزاف': 2.0,
+    # négatif
+    'خايب': -2.0, 'خايبة': -2.0, 'مقود': -2.0, 'مقودة': -2.0, 'شفارة': -2.5, 'شفار': -2.5,
+    'غالي': -1.0, 'خاسر': -1.5, 'خاسرة': -1.5, 'مخربق': -2.0, 'حشومة': -1.5,
+    'خايب بزاف': -2.5,
+}
+
+NEGATIONS = {
+    'fr': {'ne', "n'", 'pas', 'jamais', 'aucun', 'aucune', 'sans', 'ni', 'guère', 'nullement'},
+    'ar': {'لا', 'ما', 'ليس', 'ليست', 'لم', 'لن', 'غير', 'بدون'},
+    'darija': {'ما', 'ماشي', 'مشي', 'ماكاين', 'ماكاينش', 'لا', 'بلا', 'غير'},
+}
+
+INTENSIFIERS = {
+    'fr': {'très': 1.5, 'trop': 1.3, 'vraiment': 1.4, 'extrêmement': 1.8, 'tellement': 1.5},
+    'ar': {'جدا': 1.5, 'جداً': 1.5, 'كثيرا': 1.4, 'للغاية': 1.8},
+    'darija': {'بزاف': 1.5, 'بالزاف': 1.5, 'نيت': 1.3},
+}
+
+# Proclitiques arabes retirés quand le token n'est pas trouvé tel quel
+ARABIC_PREFIXES = ('وال', 'بال', 'فال', 'كال', 'لل', 'ال', 'و', 'ف', 'ب')
+ARABIC_DIACRITICS = re.compile(r'[ً-ْـ]')
+TOKEN_PATTERN = re.compile(r"[a-zà-ÿ]+'|[\w\u064B-\u0652\u0640]+|[.,;:!?؟،؛]")
+# Ponctuation de fin de proposition : arrête la portée d'une négation
+CLAUSE_BREAKS = frozenset('.,;:!?؟،؛')
+# Conjonctions qui ouvrent une nouvelle proposition (« pas cher et bon »)
+CLAUSE_CONJUNCTIONS = {
+    'fr': frozenset({'et', 'mais', 'car', 'puis', 'pourtant', 'cependant'}),
+    'ar': frozenset({'لكن', 'ولكن', 'بل', 'ثم'}),
+    'darija': frozenset({'ولكن', 'لكن', 'ولاكن', 'ولاكين', 'وصافي'}),
+}
+
+
+class LexiconSentimentEngine:
+    """Analyse de sentiment par lexique pondéré, compilée à l'initialisation"""
+
+    def __init__(self, extra_lexicons: Dict[str, Dict[str, float]] = None):
+        self.lexicons = {
+            'fr': dict(FRENCH_LEXICON),
+            'ar': dict(ARABIC_LEXICON),
+            # Le darija mélange arabe standard et termes dialectaux
+            'darija': {**ARABIC_LEXICON, **DARIJA_LEXICON},
+        }
+        for language, entries in (extra_lexicons or {}).items():
+            self.lexicons.setdefault(language, {}).update(entries)
+
+        # Clés normalisées, regroupées par longueur de phrase
+        self._phrases = {
+            language: {self._normalize_phrase(term, language): weight for term, weight in lexicon.items()}
+            for language, lexicon in self.lexicons.items()
+        }
+        self._max_len = {
+            language: max((len(term.split()) for term in phrases), default=1)
+            for language, phrases in self._phrases.items()
+        }
+
+    @staticmethod
+    def _normalize_arabic(token: str) -> str:
+        token = ARABIC_DIACRITICS.sub('', token)
+        return token.replace('أ', 'ا').replace('إ', 'ا').replace('آ', 'ا').replace('ى', 'ي').replace('ة', 'ه')
+
+    def _normalize_phrase(self, phrase: str, language: str) -> str:
+        return ' '.join(self._normalize_token(t, language) for t in self.tokenize(phrase, language))
+
+    def _normalize_token(self, token: str, language: str) -> str:
+        if language in ('ar', 'darija'):
+            return self._normalize_arabic(token)
+        return token
+
+    def tokenize(self, text: str, language: str) -> List[str]:
+        if language == 'fr':
+            text = unicodedata.normalize('NFC', text.lower()).replace('’', "'")
+        return TOKEN_PATTERN.findall(text)
+
+    def _lookup(self, token: str, language: str) -> float:
+        phrases = self._phrases[language]
+        weight = phrases.get(token)
+        if weight is not None or language == 'fr':
+            return weight or 0.0
+        for prefix in ARABIC_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                weight = phrases.get(token[len(prefix):])
+                if weight is not None:
+                    return weight
+        return 0.0
+
+    def score(self, text: str, language: str = 'fr') -> Tuple[float, float, int]:
+        """Retourne (somme positive, somme négative, nombre de termes trouvés)"""
+        if language not in self._phrases:
+            language = 'fr'
+        negations = NEGATIONS.get(language, set())
+        conjunctions = CLAUSE_CONJUNCTIONS.get(language, frozenset())
+        intensifiers = INTENSIFIERS.get(language, {})
+        phrases = self._phrases[language]
+        max_len = self._max_len[language]
+
+        tokens = [self._normalize_token(t, language) for t in self.tokenize(text, language)]
+        positive = negative = 0.0
+        hits = 0
+        negate_until = -1
+        boost = 1.0
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+
+            if token in CLAUSE_BREAKS or token in conjunctions:
+                negate_until = -1
+                boost = 1.0
+                i += 1
+                continue
+
+            # Phrase la plus longue d'abord, avant négations et intensifieurs (« trop cher »)
+            weight, length = 0.0, 1
+            for size in range(min(max_len, n - i), 1, -1):
+                phrase_weight = phrases.get(' '.join(tokens[i:i + size]))
+                if phrase_weight is not None:
+                    weight, length = phrase_weight, size
+                    break
+            else:
+                if token in negations:
+                    negate_until = i + NEGATION_WINDOW
+                    i += 1
+                    continue
+                if token in intensifiers:
+                    boost = intensifiers[token]
+                    i += 1
+                    continue
+                weight = self._lookup(token, language)
+                # Négation darija collée : ما + verbe + ش (ex. ماعجبنيش)
+                if not weight and language == 'darija' and len(token) > 4 and token.startswith('ما') and token.endswith('ش'):
+                    weight = -self._lookup(token[2:-1], language)
+
+            if weight:
+                if i <= negate_until:
+                    weight = -weight * 0.8
+                weight *= boost
+                if weight > 0:
+                    positive += weight
+                else:
+                    negative -= weight
+                hits += 1
+            boost = 1.0
+            i += length
+
+        return positive, negative, hits
+
+    def analyze(self, text: str, language: str = 'fr') -> dict:
+        positive, negative, hits = self.score(text, language)
+        total = positive + negative
+        if hits == 0 or total == 0:
+            return {'sentiment': 'Neutre', 'sentiment_score': 0.0, 'confidence': 0.3}
+
+        polarity = (positive - negative) / total
+        # Confiance : netteté de la polarité × quantité d'indices
+        confidence = abs(polarity) * (1 - math.exp(-total / 2))
+        score = max(-1.0, min(1.0, polarity * (1 - math.exp(-total))))
+
+        if polarity > 0.2:
+            sentiment = 'Positif'
+        elif polarity < -0.2:
+            sentiment = 'Négatif'
+        else:
+            sentiment = 'Neutre'
+            score = 0.0
+        return {'sentiment': sentiment, 'sentiment_score': score, 'confidence': round(confidence, 4)}
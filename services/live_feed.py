@@ -0,0 +1,245 @@
+"""
+Flux temps réel du dashboard (Server-Sent Events)
+
+Un seul producteur par processus : les avis ingérés sont accumulés entre
+deux ticks (LIVE_FEED_TICK), puis un unique événement est construit et
+sérialisé une fois — deltas des compteurs et derniers avis notés — et
+déposé tel quel dans la file bornée de chaque abonné. Le coût par tick ne
+dépend donc pas du nombre de dashboards ouverts, hors copie de la référence.
+
+Un client trop lent dont la file déborde ne bloque personne : ses événements
+en attente sont jetés et remplacés par un instantané complet (snapshot), à
+partir duquel il reprend les deltas. L'instantané est tenu à jour en
+mémoire et recalculé en SQL toutes les LIVE_FEED_REFRESH secondes (avis
+ingérés par d'autres processus).
+"""
+
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+from sqlalchemy import case, desc, func, select
+
+from config import settings
+from models.database import Product, Review, SessionLocal
+from services.metrics import Counter, Gauge, registry
+
+DELTA_FIELDS = ('total_reviews', 'positive_reviews', 'neutral_reviews', 'negative_reviews', 'rating_sum', 'sentiment_sum')
+SENTIMENT_FIELDS = {'Positif': 'positive_reviews', 'Neutre': 'neutral_reviews', 'Négatif': 'negative_reviews'}
+HEARTBEAT = b': ping\n\n'
+
+feed_events = registry.register(Counter(
+    'feelya_live_feed_events_total', "Événements du flux dashboard, par type", ('event',)
+))
+feed_resyncs = registry.register(Counter(
+    'feelya_live_feed_resyncs_total', "Abonnés en retard resynchronisés par un instantané"
+))
+
+
+def dashboard_totals(db) -> Dict:
+    """Totaux bruts du dashboard, agrégés en SQL (sans charger les avis)"""
+    reviews = Review.__table__
+    row = db.execute(select(
+        func.count(),
+        *(func.coalesce(func.sum(case((reviews.c.sentiment == sentiment, 1), else_=0)), 0)
+          for sentiment in SENTIMENT_FIELDS),
+        func.coalesce(func.sum(reviews.c.rating), 0.0),
+        func.coalesce(func.sum(reviews.c.sentiment_score), 0.0),
+    )).one()
+    totals = dict(zip(DELTA_FIELDS, row))
+
+    top_categories = db.execute(
+        select(Product.category, func.count(Product.id))
+        .group_by(Product.category)
+        .order_by(desc(func.count(Product.id)))
+        .limit(5)
+    ).all()
+    totals['total_products'] = db.execute(select(func.count(Product.id))).scalar()
+    totals['top_categories'] = [{"category": category, "count": count} for category, count in top_categories]
+    return totals
+
+
+def dashboard_view(totals: Dict) -> Dict:
+    """Réponse de /stats/dashboard/ à partir des totaux bruts"""
+    total = totals['total_reviews']
+
+    def percentage(value):
+        return round((value / total * 100) if total > 0 else 0, 1)
+
+    return {
+        "total_reviews": total,
+        "total_products": totals['total_products'],
+        "positive_reviews": totals['positive_reviews'],
+        "neutral_reviews": totals['neutral_reviews'],
+        "negative_reviews": totals['negative_reviews'],
+        "avg_rating": round(totals['rating_sum'] / total, 2) if total else 0,
+        "avg_sentiment": round(totals['sentiment_sum'] / total, 2) if total else 0,
+        "sentiment_distribution": {
+            "positive_percentage": percentage(totals['positive_reviews']),
+            "neutral_percentage": percentage(totals['neutral_reviews']),
+            "negative_percentage": percentage(totals['negative_reviews'])
+        },
+        "top_categories": totals['top_categories']
+    }
+
+
+def format_event(event: str, data, event_id: Optional[int] = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode('utf-8') + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+class LiveFeed:
+    def __init__(
+        self,
+        tick: float = None,
+        queue_size: int = None,
+        max_reviews: int = None,
+        refresh: float = None,
+        heartbeat: float = None
+    ):
+        self.tick = tick or settings.LIVE_FEED_TICK
+        self.queue_size = queue_size or settings.LIVE_FEED_QUEUE
+        self.max_reviews = max_reviews or settings.LIVE_FEED_MAX_REVIEWS
+        self.refresh = settings.LIVE_FEED_REFRESH if refresh is None else refresh
+        self.heartbeat = heartbeat or settings.LIVE_FEED_HEARTBEAT
+
+        self.seq = 0
+        self.totals: Optional[Dict] = None
+        self.subscribers = set()
+        # Alimenté par les threads des routes synchrones, vidé par le tick
+        self._lock = threading.Lock()
+        self._pending_delta = dict.fromkeys(DELTA_FIELDS, 0)
+        self._pending_reviews: List[Dict] = []
+        self._snapshot_frame: Optional[bytes] = None
+        self._refreshed_at = 0.0
+        self._task = None
+
+        registry.register(Gauge(
+            'feelya_live_feed_subscribers', "Dashboards abonnés au flux",
+            callback=lambda: {(): len(self.subscribers)}
+        ))
+
+    def start(self):
+        """À appeler depuis la boucle asyncio du serveur (événement startup)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish_review(self, review: Dict):
+        """Avis noté et validé en base ; appelable depuis n'importe quel thread"""
+        with self._lock:
+            delta = self._pending_delta
+            delta['total_reviews'] += 1
+            field = SENTIMENT_FIELDS.get(review.get('sentiment'))
+            if field:
+                delta[field] += 1
+            delta['rating_sum'] += review.get('rating') or 0.0
+            delta['sentiment_sum'] += review.get('sentiment_score') or 0.0
+            self._pending_reviews.append(review)
+            # Seuls les plus récents seront diffusés
+            if len(self._pending_reviews) > 2 * self.max_reviews:
+                del self._pending_reviews[:-self.max_reviews]
+
+    def _take_pending(self):
+        with self._lock:
+            delta, reviews = self._pending_delta, self._pending_reviews
+            self._pending_delta = dict.fromkeys(DELTA_FIELDS, 0)
+            self._pending_reviews = []
+        return delta, reviews
+
+    def snapshot_frame(self) -> bytes:
+        # Sérialisé une fois par changement, partagé par tous les abonnés
+        if self._snapshot_frame is None:
+            data = dict(dashboard_view(self.totals), seq=self.seq, **{name: self.totals[name] for name in DELTA_FIELDS})
+            self._snapshot_frame = format_event('snapshot', data, self.seq)
+        return self._snapshot_frame
+
+    async def _load_totals(self):
+        def compute():
+            db = SessionLocal()
+            try:
+                return dashboard_totals(db)
+            finally:
+                db.close()
+        return await asyncio.to_thread(compute)
+
+    async def _run(self):
+        while True:
+            try:
+                if self.totals is None or (self.refresh > 0 and time.monotonic() - self._refreshed_at > self.refresh):
+                    await self._refresh()
+                else:
+                    self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Erreur du flux dashboard: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def _refresh(self):
+        """Recalcul SQL : les avis en attente sont déjà comptés en base"""
+        self.totals = await self._load_totals()
+        # Après la lecture : un avis publié pendant le calcul n'est pas compté deux fois
+        _, reviews = self._take_pending()
+        self._refreshed_at = time.monotonic()
+        self.seq += 1
+        self._snapshot_frame = None
+        frame = self.snapshot_frame()
+        if reviews:
+            self._broadcast(format_event('reviews', {'seq': self.seq, 'reviews': reviews[-self.max_reviews:]}))
+        self._broadcast(frame)
+        if registry.enabled:
+            feed_events.inc('snapshot')
+
+    def _tick(self):
+        delta, reviews = self._take_pending()
+        if not delta['total_reviews']:
+            return
+        for name in DELTA_FIELDS:
+            self.totals[name] += delta[name]
+        self.seq += 1
+        self._snapshot_frame = None
+        self._broadcast(format_event('tick', {
+            'seq': self.seq,
+            'delta': delta,
+            'reviews': reviews[-self.max_reviews:],
+            'dropped_reviews': max(0, delta['total_reviews'] - self.max_reviews),
+        }, self.seq))
+        if registry.enabled:
+            feed_events.inc('tick')
+
+    def _broadcast(self, frame: bytes):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Client lent : ses deltas en retard sont remplacés par un instantané
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_frame())
+                if registry.enabled:
+                    feed_resyncs.inc()
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Générateur SSE d'un abonné : instantané puis deltas, avec battements de cœur"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        try:
+            while self.totals is None:
+                await asyncio.sleep(self.tick)
+            # Les deltas déjà en file avec seq <= celui de l'instantané sont ignorés par le client
+            yield b"retry: 5000\n" + self.snapshot_frame()
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self.subscribers.discard(queue)
@@ -0,0 +1,259 @@
+"""
+Métriques au format d'exposition Prometheus (sans dépendance externe)
+
+Compteurs, jauges et histogrammes étiquetés, rendus en texte par `render()`
+pour l'endpoint /metrics. Quand METRICS_ENABLED est désactivé, `timed`
+et les helpers d'observation ne font qu'un test de booléen.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config import settings
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def collect(self):
+        lines = self.header()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Jauge ; une fonction peut fournir les valeurs au moment du scrape"""
+    kind = 'gauge'
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[Tuple, float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+        self._callback = callback
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self):
+        lines = self.header()
+        values = dict(self._values)
+        if self._callback is not None:
+            try:
+                values.update(self._callback())
+            except Exception:
+                pass
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compteurs par bucket (+Inf inclus), somme]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, *labels, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def collect(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1])) for labels, s in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric):
+        """Enregistre une métrique ; une métrique de même nom est remplacée
+
+        Une jauge à callback enregistrée par instance (ordonnanceur, flux
+        dashboard) ne doit apparaître qu'une fois à l'exposition et ne pas
+        retenir les instances précédentes : la dernière instance créée l'emporte.
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+
+http_request_duration = registry.register(Histogram(
+    'feelya_http_request_duration_seconds', "Durée des requêtes HTTP par route",
+    ('method', 'route', 'status')
+))
+stage_duration = registry.register(Histogram(
+    'feelya_stage_duration_seconds', "Durée des étapes internes (prétraitement, inférence, recommandation)",
+    ('stage',)
+))
+db_query_duration = registry.register(Histogram(
+    'feelya_db_query_duration_seconds', "Durée des requêtes SQL",
+    ('statement',)
+))
+batch_size = registry.register(Histogram(
+    'feelya_batch_size', "Taille des lots traités par étape",
+    ('stage',), buckets=SIZE_BUCKETS
+))
+sentiment_backend_calls = registry.register(Counter(
+    'feelya_sentiment_backend_total', "Analyses servies par backend (lexique / BERT / élève)",
+    ('backend',)
+))
+cache_requests = registry.register(Counter(
+    'feelya_cache_requests_total', "Accès aux caches (hit / miss)",
+    ('cache', 'result')
+))
+
+
+def timed(stage: str):
+    """Décorateur : enregistre la durée d'un appel dans feelya_stage_duration_seconds"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stage_duration.observe(stage, value=time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage_timer(stage: str):
+    if not registry.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.observe(stage, value=time.perf_counter() - start)
+
+
+def observe_batch(stage: str, size: int):
+    if registry.enabled:
+        batch_size.observe(stage, value=size)
+
+
+def record_sentiment_backend(backend: str, count: int = 1):
+    if registry.enabled:
+        sentiment_backend_calls.inc(backend, amount=count)
+
+
+def record_cache(cache: str, hit: bool):
+    if registry.enabled:
+        cache_requests.inc(cache, 'hit' if hit else 'miss')
+
+
+def instrument_engine(engine):
+    """Chronomètre les requêtes SQL et expose l'état du pool de connexions"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if registry.enabled:
+            conn.info.setdefault('feelya_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('feelya_query_start')
+        if registry.enabled and starts:
+            verb = statement.lstrip().split(' ', 1)[0].upper()
+            db_query_duration.observe(verb, value=time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get('feelya_query_start') if context.connection else None
+        if starts:
+            starts.pop()
+
+    def pool_stats():
+        pool = engine.pool
+        stats = {}
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if callable(method):
+                stats[(name,)] = method()
+        return stats
+
+    registry.register(Gauge(
+        'feelya_db_pool_connections', "État du pool de connexions SQLAlchemy",
+        ('state',), callback=pool_stats
+    ))
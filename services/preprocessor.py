@@ -1,17 +1,159 @@
 import re
 import string
 import unicodedata
-from typing import Tuple
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+import numpy as np
+from services.metrics import timed
+
+# NLTK (et ses téléchargements) n'est chargé qu'à la construction d'un
+# TextPreprocessor : normalize_for_search et la détection de langue s'en passent
+_word_tokenize = None
+
+# Classes de caractères du plan multilingue de base : bit 1 = \w, bit 2 = bloc arabe
+WORD_CLASS = 1
+ARABIC_CLASS = 2
+_char_classes = None
+
+# Normalisation arabe pour la recherche : diacritiques et tatweel supprimés,
+# variantes d'alef, de ya et de ta marbouta unifiées
+ARABIC_SEARCH_MAP = str.maketrans(
+    {**dict.fromkeys(map(chr, [*range(0x064B, 0x0653), 0x0670, 0x0640]), None),
+     'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ة': 'ه'}
+)
+
+
+EMOJI_PATTERN = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE)
+
+
+def _load_nltk():
+    """Télécharge les ressources NLTK nécessaires (une fois par processus)"""
+    global _word_tokenize
+    if _word_tokenize is None:
+        import nltk
+        from nltk.tokenize import word_tokenize
+        nltk.download('punkt', quiet=True)
+        nltk.download('stopwords', quiet=True)
+        _word_tokenize = word_tokenize
+    return _word_tokenize
+
+
+def normalize_for_search(text: str) -> str:
+    """Forme indexée (et recherchée) d'un texte, identique pour toutes les langues
+
+    Même nettoyage que clean_text (URLs, emails, mentions, emojis) mais
+    sans retirer l'alphabet latin du darija ni les stopwords : les
+    documents et les requêtes passent par la même fonction.
+    """
+    text = re.sub(r'http\S+|www\S+|https\S+|\S+@\S+|@\w+', ' ', text)
+    text = EMOJI_PATTERN.sub('', text).lower().translate(ARABIC_SEARCH_MAP)
+    return re.sub(r'[\W_]+', ' ', text).strip()
+
+
+# Découpage des avis longs : fins de phrase, puis séparateurs de propositions
+# pour les phrases trop longues (ponctuation arabe ؟ ؛ ، ۔ pour ar / darija)
+SENTENCE_ENDINGS = {'fr': '.!?…', 'ar': '.!?…؟۔'}
+CLAUSE_SEPARATORS = {'fr': ',;:', 'ar': ',;:،؛'}
+
+
+@lru_cache(maxsize=8)
+def _boundary_patterns(language: str) -> Tuple[re.Pattern, re.Pattern]:
+    key = 'fr' if language == 'fr' else 'ar'
+    if language == 'darija':
+        # Le darija s'écrit aussi en alphabet latin
+        endings = ''.join(dict.fromkeys(SENTENCE_ENDINGS['fr'] + SENTENCE_ENDINGS['ar']))
+        clauses = ''.join(dict.fromkeys(CLAUSE_SEPARATORS['fr'] + CLAUSE_SEPARATORS['ar']))
+    else:
+        endings, clauses = SENTENCE_ENDINGS[key], CLAUSE_SEPARATORS[key]
+    # Ponctuation suivie d'un espace (pas « 3.5 » ni « 1,5 »), ou saut de ligne
+    sentences = re.compile(rf'(?<=[{re.escape(endings)}])\s+|\s*[\r\n]+\s*')
+    clauses = re.compile(rf'(?<=[{re.escape(clauses)}])\s+')
+    return sentences, clauses
+
+
+def _split_long(piece: str, pattern: re.Pattern, max_chars: int) -> List[str]:
+    """Coupe un morceau trop long sur pattern, puis sur les espaces"""
+    if len(piece) <= max_chars:
+        return [piece]
+    parts = pattern.split(piece) if pattern is not None else []
+    if len(parts) <= 1:
+        # Aucun séparateur : fenêtres de mots
+        parts, current = [], ''
+        for word in piece.split():
+            if current and len(current) + 1 + len(word) > max_chars:
+                parts.append(current)
+                current = ''
+            while len(word) > max_chars:
+                parts.append(word[:max_chars])
+                word = word[max_chars:]
+            current = f"{current} {word}" if current else word
+        return parts + ([current] if current else [])
+    return [chunk for part in parts for chunk in _split_long(part, None, max_chars)]
+
+
+def split_segments(text: str, language: str = 'fr', max_chars: int = 400) -> List[str]:
+    """Découpe un avis en segments d'au plus max_chars caractères
+
+    Les phrases sont détectées sur la ponctuation de la langue ; les
+    phrases consécutives sont regroupées tant que le segment ne dépasse pas
+    max_chars, une phrase plus longue est coupée sur ses virgules, puis sur
+    les espaces. Aucun caractère du texte n'est perdu (hors espaces).
+    """
+    sentences, clauses = _boundary_patterns(language)
+    pieces = [
+        chunk
+        for sentence in sentences.split(text.strip()) if sentence.strip()
+        for chunk in _split_long(sentence.strip(), clauses, max_chars)
+    ]
+    segments, current = [], ''
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            segments.append(current)
+            current = ''
+        current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _get_char_classes() -> np.ndarray:
+    """Table de 65 536 classes, construite une seule fois au premier appel"""
+    global _char_classes
+    if _char_classes is None:
+        table = np.zeros(0x10000, dtype=np.uint8)
+        for code in range(0x10000):
+            char = chr(code)
+            if char.isalnum() or char == '_':
+                table[code] = WORD_CLASS
+        table[0x0600:0x0700] |= ARABIC_CLASS
+        _char_classes = table
+    return _char_classes
+
+
+def count_char_classes(text: str) -> Tuple[int, int]:
+    """(caractères arabes, caractères de mot) en un seul passage"""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    counts = np.bincount(_get_char_classes()[np.minimum(codes, 0xFFFF)], minlength=4)
+    arabic = int(counts[ARABIC_CLASS] + counts[ARABIC_CLASS | WORD_CLASS])
+    words = int(counts[WORD_CLASS] + counts[ARABIC_CLASS | WORD_CLASS])
+    # Hors plan de base (rare) : emojis exclus, lettres rares comptées
+    astral = codes > 0xFFFF
+    if astral.any():
+        words += sum(1 for code in codes[astral] if chr(code).isalnum())
+    return arabic, words
 
-# Télécharger les ressources NLTK nécessaires
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
 
 class TextPreprocessor:
     def __init__(self):
+        self.word_tokenize = _load_nltk()
+        from nltk.corpus import stopwords
         self.french_stopwords = set(stopwords.words('french'))
         self.arabic_stopwords = set(stopwords.words('arabic'))
         
@@ -20,13 +162,13 @@ class TextPreprocessor:
             'واش', 'كيف', 'علاش', 'فين', 'شنو', 'منين', 'فوقاش',
             'بزاف', 'شوية', 'دابا', 'غدا', 'البارح', 'ديال'
         }
+        # Tous les marqueurs darija dans une seule expression : un seul parcours du texte
+        self.darija_pattern = re.compile('|'.join(
+            re.escape(word) for word in sorted(self.darija_stopwords, key=len, reverse=True)
+        ))
+        self._detect_cached = lru_cache(maxsize=4096)(self._detect_language)
     
-    def detect_language(self, text: str) -> str:
-        """Détecte la langue du texte"""
-        # Compter les caractères arabes
-        arabic_chars = len(re.findall(r'[\u0600-\u06FF]', text))
-        total_chars = len(re.findall(r'\w', text))
-        
+    def _classify(self, text: str, arabic_chars: int, total_chars: int) -> str:
         if total_chars == 0:
             return 'unknown'
         
@@ -34,11 +176,42 @@ class TextPreprocessor:
         
         if arabic_ratio > 0.5:
             # Vérifier si c'est du darija (présence de mots spécifiques)
-            if any(word in text for word in self.darija_stopwords):
+            if self.darija_pattern.search(text):
                 return 'darija'
             return 'ar'
         return 'fr'
     
+    def _detect_language(self, text: str) -> str:
+        return self._classify(text, *count_char_classes(text))
+    
+    def detect_language(self, text: str) -> str:
+        """Détecte la langue du texte"""
+        return self._detect_cached(text)
+    
+    def detect_languages(self, texts: Sequence[str]) -> List[str]:
+        """Détection par lot : un seul encodage et un seul passage NumPy pour tous les textes"""
+        texts = list(texts)
+        if not texts:
+            return []
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+        classes = _get_char_classes()[np.minimum(codes, 0xFFFF)]
+        
+        # Sommes par texte via les bornes cumulées
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        arabic = np.cumsum(np.concatenate(([0], (classes & ARABIC_CLASS) > 0)))[bounds]
+        words = np.cumsum(np.concatenate(([0], (classes & WORD_CLASS) > 0)))[bounds]
+        arabic, words = np.diff(arabic), np.diff(words)
+        
+        astral = np.flatnonzero(codes > 0xFFFF)
+        if len(astral):
+            owners = np.searchsorted(bounds, astral, side='right') - 1
+            for position, owner in zip(astral, owners):
+                if chr(codes[position]).isalnum():
+                    words[owner] += 1
+        
+        return [self._classify(t, int(a), int(w)) for t, a, w in zip(texts, arabic, words)]
+    
     def clean_text(self, text: str, language: str = 'fr') -> str:
         """Nettoie le texte"""
         # Convertir en minuscules (seulement pour le français)
@@ -70,19 +243,11 @@ class TextPreprocessor:
     
     def remove_emojis(self, text: str) -> str:
         """Supprime les emojis"""
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags
-            u"\U00002702-\U000027B0"
-            u"\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE)
-        return emoji_pattern.sub(r'', text)
+        return EMOJI_PATTERN.sub(r'', text)
     
     def remove_stopwords(self, text: str, language: str = 'fr') -> str:
         """Supprime les stopwords"""
-        words = word_tokenize(text)
+        words = self.word_tokenize(text)
         
         if language == 'fr':
             stopwords_set = self.french_stopwords
@@ -94,6 +259,11 @@ class TextPreprocessor:
         filtered_words = [word for word in words if word not in stopwords_set]
         return ' '.join(filtered_words)
     
+    def normalize_for_search(self, text: str) -> str:
+        """Forme indexée (et recherchée) d'un texte, voir normalize_for_search"""
+        return normalize_for_search(text)
+    
+    @timed('preprocess')
     def preprocess(self, text: str) -> Tuple[str, str]:
         """Pipeline complet de prétraitement"""
         # Détection de la langue
@@ -106,4 +276,13 @@ class TextPreprocessor:
         processed_text = self.remove_stopwords(cleaned_text, language)
         
         return processed_text, language
+    
+    def preprocess_batch(self, texts: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Prétraitement d'une liste de textes, langues détectées en un seul lot"""
+        languages = self.detect_languages(texts)
+        processed = [
+            self.remove_stopwords(self.clean_text(text, language), language)
+            for text, language in zip(texts, languages)
+        ]
+        return processed, languages
 
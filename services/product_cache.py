@@ -0,0 +1,82 @@
+"""
+Cache en mémoire des fiches produit, indexé par (product_id, version)
+
+Product.version est incrémenté à chaque mise à jour des agrégats. Le cache
+garde la dernière version connue de chaque produit : les écritures de ce
+processus la mettent à jour immédiatement, celles des autres processus
+(autres workers, scripts) sont vues après au plus PRODUCT_CACHE_TTL
+secondes, par une lecture de la seule colonne version.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import settings
+from services.metrics import record_cache
+
+
+def make_etag(product_id: int, version: int) -> str:
+    return f'"p{product_id}-v{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible (RFC 7232) avec une liste d'ETags ou *"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ProductCache:
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.max_size = max_size or settings.PRODUCT_CACHE_SIZE
+        self.ttl = settings.PRODUCT_CACHE_TTL if ttl is None else ttl
+        self._bodies: OrderedDict = OrderedDict()
+        # Dernière version connue par produit, bornée comme les fiches (LRU)
+        self._versions: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def current_version(self, product_id: int) -> Optional[int]:
+        """Dernière version connue si elle a été vérifiée il y a moins de ttl secondes"""
+        with self._lock:
+            entry = self._versions.get(product_id)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                return None
+            self._versions.move_to_end(product_id)
+        return entry[0]
+
+    def _remember_version(self, product_id: int, version: int):
+        self._versions[product_id] = (version, time.monotonic())
+        self._versions.move_to_end(product_id)
+        while len(self._versions) > self.max_size:
+            self._versions.popitem(last=False)
+
+    def set_version(self, product_id: int, version: int):
+        with self._lock:
+            self._remember_version(product_id, version)
+
+    def get(self, product_id: int, version: int) -> Optional[bytes]:
+        with self._lock:
+            body = self._bodies.get((product_id, version))
+            if body is not None:
+                self._bodies.move_to_end((product_id, version))
+        record_cache('product', body is not None)
+        return body
+
+    def put(self, product_id: int, version: int, body: bytes):
+        with self._lock:
+            self._bodies[(product_id, version)] = body
+            self._bodies.move_to_end((product_id, version))
+            while len(self._bodies) > self.max_size:
+                self._bodies.popitem(last=False)
+            self._remember_version(product_id, version)
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+            self._versions.clear()
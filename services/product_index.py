@@ -0,0 +1,178 @@
+import threading
+import time
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import List, Tuple, Optional
+from sqlalchemy.orm import Session
+from config import settings
+from models.database import Product
+from services.metrics import record_cache
+from services.product_snapshot import data_version
+
+
+class ProductIndex:
+    """Index vectoriel des produits (TF-IDF sur nom + description)
+
+    Les vecteurs sont stockés dans une matrice float32 contiguë, normalisés
+    L2, de sorte que la similarité cosinus se réduit à un produit scalaire.
+    La recherche top-K est exacte (produit matrice-vecteur + argpartition).
+
+    La version des données produits (comme l'instantané produits) est revue
+    au plus toutes les PRODUCT_INDEX_REFRESH secondes : si elle a changé
+    (produits créés par un autre worker ou un script), l'index est reconstruit
+    en arrière-plan pendant que l'ancien reste servi.
+    """
+
+    def __init__(self, max_features: int = 1000, refresh: float = None):
+        self.max_features = max_features
+        self.refresh = settings.PRODUCT_INDEX_REFRESH if refresh is None else refresh
+        self.vectorizer = TfidfVectorizer(max_features=max_features)
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.product_ids = np.zeros(0, dtype=np.int64)
+        self.id_to_row = {}
+        self.size = 0
+        self.fitted = False
+        self.data_version = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _product_text(name: Optional[str], description: Optional[str]) -> str:
+        return f"{name or ''} {description or ''}".strip()
+
+    def _encode(self, texts: List[str], vectorizer: TfidfVectorizer = None) -> np.ndarray:
+        """Vectorise et normalise des textes avec le vocabulaire courant (ou celui donné)"""
+        vectors = (vectorizer or self.vectorizer).transform(texts).toarray().astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def build(self, db: Session):
+        """(Re)construit l'index complet à partir de la table products"""
+        version = data_version(db)
+        rows = db.query(Product.id, Product.name, Product.description).order_by(Product.id).all()
+
+        # Vocabulaire et matrice construits à part : les recherches continuent sur l'ancien index
+        vectorizer = TfidfVectorizer(max_features=self.max_features)
+        texts = [self._product_text(name, description) for _, name, description in rows]
+        matrix = None
+        if rows and any(texts):
+            try:
+                vectorizer.fit(texts)
+                matrix = np.ascontiguousarray(self._encode(texts, vectorizer))
+            except ValueError:
+                # Vocabulaire vide (textes sans mots exploitables)
+                pass
+
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.data_version = version
+            self._checked_at = time.monotonic()
+            if matrix is None:
+                self.matrix = np.zeros((0, 0), dtype=np.float32)
+                self.product_ids = np.zeros(0, dtype=np.int64)
+                self.id_to_row = {}
+                self.size = 0
+                self.fitted = False
+                return
+            self.matrix = matrix
+            self.product_ids = np.array([product_id for product_id, _, _ in rows], dtype=np.int64)
+            self.id_to_row = {int(product_id): row for row, product_id in enumerate(self.product_ids)}
+            self.size = len(rows)
+            self.fitted = True
+
+    def ensure_built(self, db: Session):
+        """Construit l'index au premier usage, puis le reconstruit si les produits ont changé"""
+        record_cache('product_index', self.fitted)
+        if not self.fitted:
+            self.build(db)
+        elif time.monotonic() - self._checked_at > self.refresh and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(
+                target=self._background_check, args=(db.get_bind(),), name="product-index", daemon=True
+            ).start()
+
+    def _background_check(self, bind):
+        session = Session(bind=bind)
+        try:
+            self._checked_at = time.monotonic()
+            if data_version(session) != self.data_version:
+                self.build(session)
+        except Exception as e:
+            print(f"Erreur lors de la reconstruction de l'index produits: {e}")
+        finally:
+            session.close()
+            self._refreshing = False
+
+    def ensure_product(self, db: Session, product_id: int) -> bool:
+        """Ajoute un produit absent de l'index (créé ailleurs depuis la construction) ; False s'il n'existe pas"""
+        if product_id in self.id_to_row:
+            return True
+        row = db.query(Product.name, Product.description).filter(Product.id == product_id).first()
+        if row is None:
+            return False
+        self.upsert(product_id, row.name, row.description)
+        return True
+
+    def _grow(self, min_capacity: int):
+        """Agrandit la matrice par doublement pour amortir les ajouts"""
+        capacity = max(min_capacity, 2 * self.matrix.shape[0], 16)
+        matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        product_ids = np.zeros(capacity, dtype=np.int64)
+        product_ids[:self.size] = self.product_ids[:self.size]
+        self.matrix = matrix
+        self.product_ids = product_ids
+
+    def upsert(self, product_id: int, name: Optional[str], description: Optional[str]):
+        """Ajoute ou met à jour un produit sans réentraîner le vocabulaire"""
+        with self._lock:
+            if not self.fitted:
+                # L'index sera construit au prochain ensure_built
+                return
+
+            vector = self._encode([self._product_text(name, description)])[0]
+            row = self.id_to_row.get(product_id)
+            if row is None:
+                if self.size >= self.matrix.shape[0]:
+                    self._grow(self.size + 1)
+                row = self.size
+                self.product_ids[row] = product_id
+                self.id_to_row[product_id] = row
+                self.size += 1
+            self.matrix[row] = vector
+
+    def search(self, vector: np.ndarray, top_n: int = 10, exclude: Optional[set] = None) -> List[Tuple[int, float]]:
+        """Top-K exact par similarité cosinus"""
+        with self._lock:
+            if self.size == 0:
+                return []
+
+            scores = self.matrix[:self.size] @ vector
+            product_ids = self.product_ids[:self.size]
+
+            if exclude:
+                mask = np.isin(product_ids, np.fromiter(exclude, dtype=np.int64))
+                scores = np.where(mask, -np.inf, scores)
+
+            k = min(top_n, self.size)
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            return [
+                (int(product_ids[i]), float(scores[i]))
+                for i in top
+                if np.isfinite(scores[i])
+            ]
+
+    def similar_to(self, product_id: int, top_n: int = 10) -> List[Tuple[int, float]]:
+        """Produits les plus proches d'un produit indexé"""
+        with self._lock:
+            row = self.id_to_row.get(product_id)
+            if row is None:
+                return []
+            vector = self.matrix[row].copy()
+        return self.search(vector, top_n, exclude={product_id})
@@ -0,0 +1,271 @@
+"""
+Instantané en colonnes des produits, partagé par tous les workers (mmap)
+
+Les champs lus par les recommandations (id, nom, catégorie, sentiment,
+note, nombre d'avis) sont stockés en tableaux NumPy contigus dans un seul
+fichier : catégories encodées par dictionnaire (codes int16), noms en un
+bloc UTF-8 et un tableau d'offsets. Chaque worker projette le fichier en
+mémoire (mmap en lecture seule) : les pages sont partagées par le cache du
+système, sans copie par processus, et les filtres et scores se calculent
+sur les tableaux sans aller-retour en base.
+
+La version des données est (nombre de produits, somme des Product.version),
+relue au plus toutes les PRODUCT_SNAPSHOT_REFRESH secondes. Quand elle a
+changé, un seul processus (verrou fcntl sur un fichier voisin) reconstruit
+l'instantané dans un fichier temporaire puis le publie par renommage
+atomique ; les autres continuent de lire l'ancien puis projettent le
+nouveau dès qu'ils voient le changement d'inode.
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from config import settings
+from models.database import Product, engine
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b'FEELYAPS'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Colonne -> type stocké ; category contient les codes du dictionnaire
+COLUMNS = {
+    'id': np.int64,
+    'category': np.int16,
+    'sentiment_score': np.float32,
+    'avg_rating': np.float32,
+    'total_reviews': np.int32,
+    'positive_reviews': np.int32,
+    'neutral_reviews': np.int32,
+    'negative_reviews': np.int32,
+}
+
+
+def data_version(executor) -> Tuple[int, int]:
+    """(nombre de produits, somme des versions) : change à chaque ajout ou mise à jour d'agrégats"""
+    table = Product.__table__
+    count, versions = executor.execute(
+        select(func.count(), func.coalesce(func.sum(table.c.version), 0))
+    ).one()
+    return int(count), int(versions)
+
+
+def build_columns(executor) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """Lit la table products une fois et la met en colonnes"""
+    table = Product.__table__
+    rows = executor.execute(
+        select(
+            table.c.id, table.c.category, table.c.sentiment_score, table.c.avg_rating, table.c.total_reviews,
+            table.c.positive_reviews, table.c.neutral_reviews, table.c.negative_reviews, table.c.name
+        ).order_by(table.c.id)
+    ).all()
+
+    categories: Dict[Optional[str], int] = {}
+    columns = {name: np.zeros(len(rows), dtype=dtype) for name, dtype in COLUMNS.items()}
+    names = []
+    for i, row in enumerate(rows):
+        columns['id'][i] = row[0]
+        columns['category'][i] = categories.setdefault(row[1], len(categories))
+        columns['sentiment_score'][i] = row[2] or 0.0
+        columns['avg_rating'][i] = row[3] or 0.0
+        columns['total_reviews'][i] = row[4] or 0
+        columns['positive_reviews'][i] = row[5] or 0
+        columns['neutral_reviews'][i] = row[6] or 0
+        columns['negative_reviews'][i] = row[7] or 0
+        names.append((row[8] or '').encode('utf-8'))
+    if len(categories) > np.iinfo(np.int16).max:
+        raise ValueError(f"Trop de catégories pour l'instantané: {len(categories)}")
+
+    columns['name_offsets'] = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in names], out=columns['name_offsets'][1:])
+    columns['name_bytes'] = np.frombuffer(b''.join(names), dtype=np.uint8)
+    return columns, list(categories)
+
+
+def write_snapshot(path: str, columns: Dict[str, np.ndarray], categories: List[str], meta: Dict) -> int:
+    """Écrit l'instantané dans un fichier temporaire puis le publie atomiquement ; renvoie sa taille"""
+    layout, offset = {}, 0
+    for name, array in columns.items():
+        layout[name] = {'dtype': array.dtype.str, 'offset': offset, 'count': int(array.size)}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        'format': FORMAT_VERSION, 'categories': categories, 'columns': layout, **meta
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+        for name, array in columns.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return data_start + offset
+
+
+class ProductSnapshot:
+    """Vue en lecture seule sur un fichier d'instantané projeté en mémoire"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Instantané produits invalide: {path}")
+        size = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 8], 'little')
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._map[start:start + size].decode('utf-8'))
+        data_start = -(-(start + size) // ALIGNMENT) * ALIGNMENT
+
+        # Vues sans copie sur les pages partagées
+        for name, spec in self.header['columns'].items():
+            setattr(self, name, np.frombuffer(
+                self._map, dtype=np.dtype(spec['dtype']), count=spec['count'], offset=data_start + spec['offset']
+            ))
+        self.categories: List[str] = self.header['categories']
+        self._category_codes = {category: code for code, category in enumerate(self.categories)}
+        self.size = len(self.id)
+        self.nbytes = len(self._map)
+
+    @property
+    def data_version(self) -> Tuple[int, int]:
+        return tuple(self.header['data_version'])
+
+    def category_code(self, category: Optional[str]) -> int:
+        """Code de la catégorie, -1 si absente de l'instantané"""
+        return self._category_codes.get(category, -1)
+
+    def rows(self, product_ids) -> np.ndarray:
+        """Lignes des produits demandés (-1 pour les produits inconnus)"""
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        if self.size == 0:
+            return np.full(len(product_ids), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.id, product_ids), self.size - 1)
+        return np.where(self.id[rows] == product_ids, rows, -1)
+
+    def name(self, row: int) -> str:
+        return bytes(self.name_bytes[self.name_offsets[row]:self.name_offsets[row + 1]]).decode('utf-8')
+
+    def recommendation(self, row: int, score: float, reason: str) -> Dict:
+        """Entrée au format RecommendationResponse"""
+        return {
+            'product_id': int(self.id[row]),
+            'product_name': self.name(row),
+            'score': float(score),
+            'reason': reason,
+            'sentiment_score': float(self.sentiment_score[row]),
+            'total_reviews': int(self.total_reviews[row])
+        }
+
+
+class ProductSnapshotStore:
+    """Instantané courant de ce processus, rafraîchi en arrière-plan par un écrivain unique"""
+
+    def __init__(self, path: str = None, refresh: float = None, db_engine=None):
+        self.path = path or settings.PRODUCT_SNAPSHOT_PATH
+        self.refresh = settings.PRODUCT_SNAPSHOT_REFRESH if refresh is None else refresh
+        self.engine = db_engine or engine
+        self._snapshot: Optional[ProductSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.builds = 0
+        self.last_build = None
+
+    def get(self) -> ProductSnapshot:
+        """Instantané à jour à PRODUCT_SNAPSHOT_REFRESH secondes près"""
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._check(wait=True)
+        elif time.monotonic() - self._checked_at > self.refresh and not self._refreshing:
+            # Les requêtes continuent sur l'instantané courant pendant la vérification
+            self._refreshing = True
+            threading.Thread(target=self._background_check, name="product-snapshot", daemon=True).start()
+        return self._snapshot
+
+    def _background_check(self):
+        try:
+            with self._lock:
+                self._check(wait=False)
+        except Exception as e:
+            print(f"Erreur lors du rafraîchissement de l'instantané produits: {e}")
+        finally:
+            self._refreshing = False
+
+    def _load_published(self) -> bool:
+        """Projette le fichier publié s'il a changé (autre écrivain) ; True si chargé"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        if self._snapshot is None or self._snapshot.inode != inode:
+            try:
+                self._snapshot = ProductSnapshot(self.path)
+            except (ValueError, OSError) as e:
+                print(f"Erreur lors du chargement de l'instantané produits: {e}")
+                return False
+        return True
+
+    def _check(self, wait: bool):
+        self._checked_at = time.monotonic()
+        self._load_published()
+        with self.engine.connect() as conn:
+            version = data_version(conn)
+        if self._snapshot is not None and self._snapshot.data_version == version:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_file = open(f"{self.path}.lock", 'a+')
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if wait or self._snapshot is None else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    # Un autre processus reconstruit : l'ancien instantané reste servi
+                    return
+            # Publié pendant l'attente du verrou ?
+            if self._load_published() and self._snapshot.data_version == version:
+                return
+            self._build(version)
+        finally:
+            lock_file.close()
+
+    def _build(self, version: Tuple[int, int]):
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            columns, categories = build_columns(conn)
+        build_seconds = time.perf_counter() - started
+        nbytes = write_snapshot(self.path, columns, categories, {
+            'data_version': list(version),
+            'built_at': time.time(),
+            'build_seconds': round(build_seconds, 4),
+        })
+        self._load_published()
+        self.builds += 1
+        self.last_build = {'seconds': build_seconds, 'bytes': nbytes, 'products': len(columns['id'])}
+
+    def stats(self) -> Dict:
+        snapshot = self.get()
+        return {
+            'path': self.path,
+            'products': snapshot.size,
+            'categories': len(snapshot.categories),
+            'bytes': snapshot.nbytes,
+            'data_version': list(snapshot.data_version),
+            'built_at': snapshot.header['built_at'],
+            'build_seconds': snapshot.header['build_seconds'],
+            'builds_in_process': self.builds,
+        }
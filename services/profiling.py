@@ -0,0 +1,223 @@
+"""
+Profilage à la demande des requêtes (cProfile + journal SQL)
+
+Une requête est profilée si PROFILING_ENABLED est actif et qu'elle porte
+l'en-tête `X-Profile: 1`, ou si elle est tirée au sort selon
+PROFILING_SAMPLE_RATE. Le profil (.prof, lisible par snakeviz ou
+`python -m pstats`) et un résumé JSON des requêtes SQL sont enregistrés
+dans PROFILING_DIR.
+"""
+
+import contextvars
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi.routing import APIRoute
+
+from config import settings
+
+logger = logging.getLogger("feelya.profiling")
+
+_current_session: contextvars.ContextVar = contextvars.ContextVar("feelya_profile_session", default=None)
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9A-Za-z_\-]+$')
+_IN_LIST_PATTERN = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+
+class ProfileSession:
+    """Profils cProfile (un par thread) et requêtes SQL d'une requête HTTP"""
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.profiles: List[cProfile.Profile] = []
+        self.sql: List[tuple] = []
+        self._lock = threading.Lock()
+        self.token = None
+
+    def add_profile(self, profile: cProfile.Profile):
+        with self._lock:
+            self.profiles.append(profile)
+
+    def add_query(self, statement: str, duration: float):
+        with self._lock:
+            self.sql.append((statement, duration))
+
+    def sql_summary(self) -> List[Dict]:
+        """Requêtes regroupées par forme normalisée, les plus répétées d'abord"""
+        counts = Counter()
+        durations = Counter()
+        for statement, duration in self.sql:
+            key = _IN_LIST_PATTERN.sub('(?...)', ' '.join(statement.split()))
+            counts[key] += 1
+            durations[key] += duration
+        return [
+            {'statement': key, 'count': count, 'total_ms': round(durations[key] * 1000, 3)}
+            for key, count in counts.most_common()
+        ]
+
+
+def should_profile(headers) -> bool:
+    if not settings.PROFILING_ENABLED:
+        return False
+    if headers.get('x-profile', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def start_session(method: str, path: str) -> ProfileSession:
+    session = ProfileSession(method, path)
+    session.token = _current_session.set(session)
+    return session
+
+
+def end_session(session: ProfileSession):
+    """Détache la session du contexte courant (les requêtes SQL suivantes ne sont plus relevées)"""
+    _current_session.reset(session.token)
+
+
+def current_session() -> Optional[ProfileSession]:
+    return _current_session.get()
+
+
+@contextmanager
+def thread_profile():
+    """Profile le bloc dans le thread courant si une session est active
+
+    cProfile ne suit que le thread qui l'active : chaque thread participant
+    à la requête (endpoint synchrone, sous-recommandeurs) a son propre
+    profil, fusionnés à l'enregistrement.
+    """
+    session = _current_session.get()
+    if session is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        session.add_profile(profile)
+
+
+def _profiled_call(call):
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            with thread_profile():
+                return await call(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        with thread_profile():
+            return call(*args, **kwargs)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route dont l'endpoint s'exécute sous cProfile quand une session est active"""
+
+    def get_route_handler(self):
+        if not getattr(self.dependant.call, '_feelya_profiled', False):
+            self.dependant.call = _profiled_call(self.dependant.call)
+            self.dependant.call._feelya_profiled = True
+        return super().get_route_handler()
+
+
+def save_session(session: ProfileSession, status_code: int, duration: float) -> Optional[str]:
+    """Écrit le profil fusionné et ses métadonnées, retourne l'identifiant"""
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILING_DIR, session.id)
+
+    has_profile = bool(session.profiles)
+    if has_profile:
+        stats = pstats.Stats(session.profiles[0])
+        for profile in session.profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(base + '.prof')
+
+    sql = session.sql_summary()
+    metadata = {
+        'id': session.id,
+        'method': session.method,
+        'path': session.path,
+        'status_code': status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'created_at': datetime.utcnow().isoformat(),
+        'threads_profiled': len(session.profiles),
+        'has_profile': has_profile,
+        'sql_queries': len(session.sql),
+        'sql_total_ms': round(sum(d for _, d in session.sql) * 1000, 3),
+        'sql': sql,
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    logger.warning(
+        "Profil %s : %s %s en %.1f ms, %d requêtes SQL",
+        session.id, session.method, session.path, duration * 1000, len(session.sql)
+    )
+    for entry in sql[:10]:
+        logger.warning("  %4d× %8.2f ms  %s", entry['count'], entry['total_ms'], entry['statement'][:200])
+    return session.id
+
+
+def list_profiles() -> List[Dict]:
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(settings.PROFILING_DIR), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(settings.PROFILING_DIR, name), encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata.pop('sql', None)
+        profiles.append(metadata)
+    return profiles
+
+
+def profile_path(profile_id: str, extension: str) -> Optional[str]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, profile_id + extension)
+    return path if os.path.isfile(path) else None
+
+
+def instrument_engine(engine):
+    """Enregistre chaque requête SQL dans la session de profilage active"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_session.get() is not None:
+            conn.info.setdefault('feelya_profile_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        session = _current_session.get()
+        starts = conn.info.get('feelya_profile_start')
+        if session is not None and starts:
+            session.add_query(statement, time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get('feelya_profile_start') if context.connection else None
+        if starts:
+            starts.pop()
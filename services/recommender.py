@@ -1,15 +1,369 @@
+import os
+import tempfile
+import threading
+import time
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-from typing import List, Dict
+import contextvars
+import joblib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Sequence
+from scipy import sparse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from models.database import Product, Review, User, UserPreference
+from config import settings
+from models.database import Review, User, UserPreference, SessionLocal
+from services.product_index import ProductIndex
+from services.product_snapshot import ProductSnapshotStore
+from services.metrics import timed, observe_batch
+from services.profiling import thread_profile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def normalize_scores(scores: np.ndarray) -> np.ndarray:
+    """Mise à l'échelle des scores d'une source vers [0, 1] par son maximum (s / max)
+
+    Un min-max ramènerait le moins bon candidat de chaque source à 0 et le
+    meilleur à 1 quelles que soient les valeurs : des notes de 4.0 à 4.5
+    deviendraient un écart de 0 à 1 et écraseraient l'autre source. Les
+    scores négatifs sont ramenés à 0.
+    """
+    if scores.size == 0:
+        return scores
+    high = scores.max()
+    if high <= 0:
+        return np.zeros_like(scores)
+    return np.clip(scores, 0, None) / high
+
+
+def fuse_recommendations(
+    sources: Sequence[List[Dict]],
+    weights: Sequence[float],
+    top_n: int,
+    reason: str
+) -> List[Dict]:
+    """Fusion vectorisée de plusieurs listes de recommandations
+
+    Chaque source est normalisée séparément (les notes 1-5 du collaboratif et
+    les scores de sentiment [-1, 1] du contenu ne sont pas comparables), puis
+    les scores pondérés sont sommés par produit et les top N sélectionnés
+    avec argpartition. Les dictionnaires d'entrée ne sont pas modifiés.
+    """
+    all_recs = [rec for recs in sources for rec in recs]
+    if not all_recs or top_n <= 0:
+        return []
+
+    ids = np.fromiter((rec['product_id'] for rec in all_recs), dtype=np.int64, count=len(all_recs))
+    weighted = np.concatenate([
+        weight * normalize_scores(np.fromiter((rec['score'] for rec in recs), dtype=np.float64, count=len(recs)))
+        for recs, weight in zip(sources, weights)
+    ])
+
+    # Regrouper par produit : first_index pointe vers la première occurrence
+    unique_ids, first_index, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    fused = np.bincount(inverse, weights=weighted, minlength=unique_ids.size)
+
+    k = min(top_n, unique_ids.size)
+    top = np.argpartition(-fused, k - 1)[:k]
+    top = top[np.argsort(-fused[top], kind='stable')]
+
+    return [
+        {**all_recs[first_index[i]], 'score': float(fused[i]), 'reason': reason}
+        for i in top
+    ]
+
+
+def interaction_signal(ratings: np.ndarray, sentiments: np.ndarray) -> np.ndarray:
+    """Signal d'un avis dans [-1, 1] : note (3 = neutre) et sentiment du texte à parts égales"""
+    ratings = np.nan_to_num(np.asarray(ratings, dtype=np.float64), nan=3.0)
+    sentiments = np.nan_to_num(np.asarray(sentiments, dtype=np.float64))
+    return (np.clip((ratings - 3.0) / 2.0, -1, 1) + np.clip(sentiments, -1, 1)) / 2
+
+
+class ImplicitALS:
+    """Factorisation matricielle implicite par moindres carrés alternés
+
+    Chaque couple (utilisateur, produit) noté porte une préférence
+    p = 1 si le signal cumulé de ses avis est positif, 0 sinon, et une
+    confiance c = 1 + alpha * |signal| : un avis 5 étoiles enthousiaste
+    pèse plus qu'un 4 étoiles tiède, un avis négatif pousse activement le
+    produit hors des recommandations. Les couples non observés ont p = 0,
+    c = 1 (Hu, Koren et Volinsky, 2008).
+
+    Les facteurs sont stockés en float32 ; servir un utilisateur coûte un
+    produit matrice-vecteur sur les facteurs produits et un argpartition.
+    """
+
+    def __init__(
+        self,
+        factors: int = None,
+        iterations: int = None,
+        regularization: float = None,
+        alpha: float = None,
+        seed: int = 42
+    ):
+        self.factors = factors or settings.ALS_FACTORS
+        self.iterations = iterations or settings.ALS_ITERATIONS
+        self.regularization = settings.ALS_REGULARIZATION if regularization is None else regularization
+        self.alpha = settings.ALS_ALPHA if alpha is None else alpha
+        self.seed = seed
+        self.cg_steps = settings.ALS_CG_STEPS
+        self.batch_entries = 1 << 18
+        self.user_ids = np.zeros(0, dtype=np.int64)
+        self.item_ids = np.zeros(0, dtype=np.int64)
+        self.user_factors = np.zeros((0, self.factors), dtype=np.float32)
+        self.item_factors = np.zeros((0, self.factors), dtype=np.float32)
+        # Produits déjà notés, par ligne utilisateur (exclus des recommandations)
+        self.user_items = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.trained_at = None
+        self.train_seconds = 0.0
+
+    def _solve(self, matrix: sparse.csr_matrix, fixed: np.ndarray, current: np.ndarray) -> np.ndarray:
+        """Facteurs de chaque ligne de matrix, les facteurs de l'autre côté étant fixés
+
+        Les systèmes (YᵀY + Yᵀ(Cu - I)Y + λI) xu = Yᵀ Cu p(u) sont résolus
+        pour toutes les lignes à la fois par quelques pas de gradient
+        conjugué, repartant des facteurs de l'itération précédente (Takács
+        et al., 2011) : un pas coûte un produit dense par YᵀY et deux
+        produits creux, sans boucle Python par ligne.
+        """
+        gram = fixed.T @ fixed + self.regularization * np.eye(self.factors, dtype=np.float32)
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        confidence = (self.alpha * np.abs(matrix.data)).astype(np.float32)
+        preference = (matrix.data > 0).astype(np.float32)
+        target = sparse.csr_matrix(((1.0 + confidence) * preference, matrix.indices, matrix.indptr), shape=matrix.shape) @ fixed
+
+        def apply(x):
+            # Produits scalaires xu·yi sur les seules entrées observées, par blocs
+            dots = np.empty(len(rows), dtype=np.float32)
+            for start in range(0, len(rows), self.batch_entries):
+                block = slice(start, start + self.batch_entries)
+                dots[block] = np.einsum('ij,ij->i', x[rows[block]], fixed[matrix.indices[block]])
+            weighted = sparse.csr_matrix((confidence * dots, matrix.indices, matrix.indptr), shape=matrix.shape)
+            return x @ gram + weighted @ fixed
+
+        x = current.copy()
+        residual = target - apply(x)
+        direction = residual.copy()
+        norm = np.einsum('ij,ij->i', residual, residual)
+        for _ in range(self.cg_steps):
+            step = apply(direction)
+            curvature = np.einsum('ij,ij->i', direction, step)
+            alpha = np.divide(norm, curvature, out=np.zeros_like(norm), where=curvature > 0)
+            x += alpha[:, None] * direction
+            residual -= alpha[:, None] * step
+            new_norm = np.einsum('ij,ij->i', residual, residual)
+            beta = np.divide(new_norm, norm, out=np.zeros_like(norm), where=norm > 0)
+            direction = residual + beta[:, None] * direction
+            norm = new_norm
+        return x
+
+    @timed('als_train')
+    def fit(self, user_ids, item_ids, ratings, sentiments) -> 'ImplicitALS':
+        """Entraîne sur des avis (un élément par avis, plusieurs avis par couple cumulés)"""
+        started = time.perf_counter()
+        users, user_rows = np.unique(np.asarray(user_ids, dtype=np.int64), return_inverse=True)
+        items, item_rows = np.unique(np.asarray(item_ids, dtype=np.int64), return_inverse=True)
+        signal = interaction_signal(ratings, sentiments)
+
+        matrix = sparse.csr_matrix((signal, (user_rows, item_rows)), shape=(len(users), len(items)))
+        matrix.sum_duplicates()
+        np.clip(matrix.data, -1, 1, out=matrix.data)
+        transposed = matrix.T.tocsr()
+
+        rng = np.random.default_rng(self.seed)
+        user_factors = (rng.standard_normal((len(users), self.factors)) * 0.01).astype(np.float32)
+        item_factors = (rng.standard_normal((len(items), self.factors)) * 0.01).astype(np.float32)
+        for _ in range(self.iterations):
+            user_factors = self._solve(matrix, item_factors, user_factors)
+            item_factors = self._solve(transposed, user_factors, item_factors)
+
+        self.user_ids, self.item_ids = users, items
+        self.user_factors = np.ascontiguousarray(user_factors)
+        self.item_factors = np.ascontiguousarray(item_factors)
+        self.user_items = matrix
+        self.trained_at = time.time()
+        self.train_seconds = time.perf_counter() - started
+        return self
+
+    def _user_row(self, user_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.user_ids, user_id))
+        if row < len(self.user_ids) and self.user_ids[row] == user_id:
+            return row
+        return None
+
+    def recommend(self, user_id: int, top_n: int = 10) -> List[tuple]:
+        """[(product_id, score)] des produits non notés les mieux classés ; [] si utilisateur inconnu"""
+        row = self._user_row(user_id)
+        if row is None or top_n <= 0:
+            return []
+        scores = self.item_factors @ self.user_factors[row]
+        seen = self.user_items.indices[self.user_items.indptr[row]:self.user_items.indptr[row + 1]]
+        scores[seen] = -np.inf
+
+        k = min(top_n, len(scores) - len(seen))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(self.item_ids[i]), float(scores[i])) for i in top]
+
+    @property
+    def nbytes(self) -> int:
+        return self.user_factors.nbytes + self.item_factors.nbytes
+
+    def save(self, path: str = None):
+        path = path or settings.ALS_MODEL_PATH
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # Écriture atomique dans un fichier temporaire propre à cet appel :
+        # un autre processus peut charger ou enregistrer le modèle en même temps
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                joblib.dump(self.__dict__, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str = None) -> 'ImplicitALS':
+        model = cls.__new__(cls)
+        model.__dict__.update(joblib.load(path or settings.ALS_MODEL_PATH))
+        return model
+
+
+def load_interactions(db: Session, chunk_size: int = 100_000):
+    """(utilisateurs, produits, notes, sentiments) de tous les avis signés, en tableaux
+
+    Lecture par blocs ordonnés par id (pagination par clé) : chaque bloc est
+    converti en tableau NumPy (None -> NaN) puis libéré, la mémoire ne
+    dépend pas du nombre total d'avis en tuples Python.
+    """
+    reviews = Review.__table__
+    chunks = []
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(reviews.c.id, reviews.c.user_id, reviews.c.product_id, reviews.c.rating, reviews.c.sentiment_score)
+            .where(reviews.c.user_id.isnot(None), reviews.c.id > last_id)
+            .order_by(reviews.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        chunks.append(np.array(rows, dtype=np.float64))
+        if len(rows) < chunk_size:
+            break
+    if not chunks:
+        return None
+    columns = np.concatenate(chunks)
+    return (
+        columns[:, 1].astype(np.int64),
+        columns[:, 2].astype(np.int64),
+        columns[:, 3],
+        columns[:, 4],
+    )
+
 
 class RecommendationEngine:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=1000)
-        self.product_features = {}
+    def __init__(self, collab_weight: float = None, content_weight: float = None, products: ProductSnapshotStore = None):
+        self.product_index = ProductIndex(max_features=1000)
+        # Colonnes produits partagées (mmap) : filtres et scores sans requête SQL
+        self.products = products or ProductSnapshotStore()
+        self.collab_weight = settings.HYBRID_COLLAB_WEIGHT if collab_weight is None else collab_weight
+        self.content_weight = settings.HYBRID_CONTENT_WEIGHT if content_weight is None else content_weight
+        # Un thread par requête hybride simultanée (branche collaborative)
+        self._executor = ThreadPoolExecutor(max_workers=settings.RECOMMENDER_THREADS, thread_name_prefix="recommender")
+        # Modèle ALS courant, remplacé en bloc par le thread d'entraînement
+        self.latent_model: Optional[ImplicitALS] = None
+        self._training = None
+        self._stop_training = threading.Event()
+        self._model_mtime = None
+    
+    def train_latent_model(self, db: Session = None, save: bool = True) -> Optional[ImplicitALS]:
+        """Entraîne un nouveau modèle ALS sur tous les avis puis le met en service"""
+        session = db or SessionLocal()
+        try:
+            interactions = load_interactions(session)
+        finally:
+            if db is None:
+                session.close()
+        if interactions is None:
+            return None
+        model = ImplicitALS().fit(*interactions)
+        self.latent_model = model
+        if save:
+            model.save()
+            self._model_mtime = os.path.getmtime(settings.ALS_MODEL_PATH)
+        return model
+    
+    def _load_saved_model(self) -> bool:
+        """Met en service le modèle enregistré s'il a moins de ALS_RETRAIN_INTERVAL secondes
+
+        Plusieurs workers (ou scripts/train_als.py) partagent ainsi un seul
+        entraînement par intervalle au lieu d'en lancer un chacun.
+        """
+        path = settings.ALS_MODEL_PATH
+        if not os.path.exists(path):
+            return False
+        saved_at = os.path.getmtime(path)
+        if saved_at != self._model_mtime:
+            try:
+                self.latent_model = ImplicitALS.load(path)
+            except Exception as e:
+                print(f"Erreur lors du chargement du modèle ALS: {e}")
+                return False
+            self._model_mtime = saved_at
+        interval = settings.ALS_RETRAIN_INTERVAL
+        return interval > 0 and time.time() - saved_at < interval
+    
+    def _load_or_train(self):
+        """Charge le modèle enregistré s'il est récent, sinon l'entraîne (un seul processus à la fois)
+
+        Au démarrage, tous les workers trouvent le même modèle absent ou
+        périmé : le verrou fcntl laisse un seul d'entre eux entraîner, les
+        autres attendent puis chargent le modèle qu'il vient d'enregistrer.
+        """
+        if self._load_saved_model():
+            return
+        path = settings.ALS_MODEL_PATH
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(f"{path}.lock", 'a+') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Enregistré par un autre worker pendant l'attente du verrou ?
+            if not self._load_saved_model():
+                self.train_latent_model()
     
+    def start_training(self):
+        """Entraînement périodique du modèle ALS dans un thread d'arrière-plan"""
+        if not settings.ALS_ENABLED or self._training is not None:
+            return self
+        
+        def run():
+            while not self._stop_training.is_set():
+                try:
+                    self._load_or_train()
+                except Exception as e:
+                    print(f"Erreur lors de l'entraînement ALS: {e}")
+                if settings.ALS_RETRAIN_INTERVAL <= 0:
+                    return
+                self._stop_training.wait(settings.ALS_RETRAIN_INTERVAL)
+        
+        self._training = threading.Thread(target=run, name="als-training", daemon=True)
+        self._training.start()
+        return self
+    
+    def stop_training(self):
+        self._stop_training.set()
+    
+    @timed('recommend_collaborative')
     def collaborative_filtering(self, db: Session, user_id: int, top_n: int = 10) -> List[Dict]:
         """Filtrage collaboratif basé sur les utilisateurs similaires"""
         # Récupérer les avis de l'utilisateur
@@ -59,6 +413,7 @@ class RecommendationEngine:
         
         return self._format_recommendations(db, sorted_recommendations, 'collaborative')
     
+    @timed('recommend_content')
     def content_based_filtering(self, db: Session, user_id: int, top_n: int = 10) -> List[Dict]:
         """Recommandation basée sur le contenu des produits"""
         # Récupérer les préférences de l'utilisateur
@@ -77,125 +432,126 @@ class RecommendationEngine:
         seen_products = {r.product_id for r in user_reviews}
         
         # Recommander des produits dans les catégories préférées
-        recommendations = db.query(Product).filter(
-            Product.category.in_(preferred_categories),
-            ~Product.id.in_(seen_products),
-            Product.sentiment_score > 0.3  # Seulement les produits bien notés
-        ).order_by(
-            Product.sentiment_score.desc(),
-            Product.total_reviews.desc()
-        ).limit(top_n).all()
-        
-        return [{
-            'product_id': p.id,
-            'product_name': p.name,
-            'score': p.sentiment_score,
-            'reason': f"Correspond à vos préférences ({p.category})",
-            'sentiment_score': p.sentiment_score,
-            'total_reviews': p.total_reviews
-        } for p in recommendations]
+        snapshot = self.products.get()
+        codes = [snapshot.category_code(category) for category in preferred_categories]
+        rows = np.flatnonzero(
+            np.isin(snapshot.category, codes)
+            & ~np.isin(snapshot.id, list(seen_products))
+            & (snapshot.sentiment_score > 0.3)  # Seulement les produits bien notés
+        )
+        # Tri par sentiment puis nombre d'avis décroissants (la dernière clé est la principale)
+        rows = rows[np.lexsort((-snapshot.total_reviews[rows], -snapshot.sentiment_score[rows]))[:top_n]]
+        
+        return [snapshot.recommendation(
+            row, snapshot.sentiment_score[row],
+            f"Correspond à vos préférences ({snapshot.categories[snapshot.category[row]]})"
+        ) for row in rows]
     
+    @timed('recommend_hybrid')
     def hybrid_recommendation(self, db: Session, user_id: int, top_n: int = 10) -> List[Dict]:
         """Recommandation hybride combinant filtrage collaboratif et contenu"""
-        # Obtenir les recommandations des deux méthodes
-        collab_recs = self.collaborative_filtering(db, user_id, top_n * 2)
+        # Le collaboratif tourne dans le pool avec sa propre session (une Session
+        # n'est pas thread-safe), le contenu dans le thread de la requête.
+        # Le contexte est propagé pour les métriques et le profilage.
+        collab_future = self._executor.submit(
+            contextvars.copy_context().run,
+            self._run_with_session, db, self.collaborative_filtering, user_id, top_n * 2
+        )
         content_recs = self.content_based_filtering(db, user_id, top_n * 2)
+        # Connexion de la requête rendue au pool avant d'attendre : sinon, sous charge,
+        # les requêtes occupent tout le pool et le collaboratif attend une connexion
+        db.commit()
+        # Le contenu ne retient que les produits bien notés ; le collaboratif
+        # écarte au moins ceux dont le sentiment moyen est négatif
+        collab_recs = [
+            rec for rec in collab_future.result()
+            if (rec['sentiment_score'] or 0.0) >= settings.HYBRID_MIN_SENTIMENT
+        ]
+        observe_batch('hybrid_fusion', len(collab_recs) + len(content_recs))
         
-        # Combiner les scores
-        combined_scores = {}
-        
-        # Poids pour chaque méthode
-        collab_weight = 0.6
-        content_weight = 0.4
-        
-        for rec in collab_recs:
-            product_id = rec['product_id']
-            combined_scores[product_id] = {
-                'score': rec['score'] * collab_weight,
-                'product': rec
-            }
-        
-        for rec in content_recs:
-            product_id = rec['product_id']
-            if product_id in combined_scores:
-                combined_scores[product_id]['score'] += rec['score'] * content_weight
-            else:
-                combined_scores[product_id] = {
-                    'score': rec['score'] * content_weight,
-                    'product': rec
-                }
-        
-        # Trier et retourner les top N
-        sorted_recs = sorted(
-            combined_scores.items(),
-            key=lambda x: x[1]['score'],
-            reverse=True
-        )[:top_n]
-        
-        results = []
-        for product_id, data in sorted_recs:
-            rec = data['product']
-            rec['score'] = data['score']
-            rec['reason'] = 'Recommandation personnalisée (hybride)'
-            results.append(rec)
-        
-        return results
+        return fuse_recommendations(
+            [collab_recs, content_recs],
+            [self.collab_weight, self.content_weight],
+            top_n,
+            reason='Recommandation personnalisée (hybride)'
+        )
+    
+    @timed('recommend_latent')
+    def latent_factor_recommendation(self, db: Session, user_id: int, top_n: int = 10) -> List[Dict]:
+        """Recommandation par facteurs latents (ALS) ; repli sur le collaboratif sans modèle"""
+        model = self.latent_model
+        if model is None or model._user_row(user_id) is None:
+            return self.collaborative_filtering(db, user_id, top_n)
+        ranked = model.recommend(user_id, top_n)
+        if not ranked:
+            return []
+        return self._from_snapshot(ranked, "Apprécié par des clients aux goûts proches")
+    
+    @staticmethod
+    def _run_with_session(db: Session, method, *args) -> List[Dict]:
+        """Exécute une méthode de recommandation dans une session dédiée"""
+        session = Session(bind=db.get_bind())
+        try:
+            with thread_profile():
+                return method(session, *args)
+        finally:
+            session.close()
+    
+    @timed('recommend_similar')
+    def similar_products(self, db: Session, product_id: int, top_n: int = 10) -> List[Dict]:
+        """Produits similaires par contenu textuel (nom + description)"""
+        self.product_index.ensure_built(db)
+        if not self.product_index.ensure_product(db, product_id):
+            return []
+        neighbours = self.product_index.similar_to(product_id, top_n)
+        neighbours = [(pid, similarity) for pid, similarity in neighbours if similarity > 0]
+        if not neighbours:
+            return []
+        return self._from_snapshot(neighbours, "Description similaire")
     
+    @timed('recommend_trending')
     def sentiment_weighted_recommendation(self, db: Session, category: str = None, top_n: int = 10) -> List[Dict]:
         """Recommandation pondérée par sentiment"""
-        query = db.query(Product).filter(Product.total_reviews >= 5)
-        
+        snapshot = self.products.get()
+        mask = snapshot.total_reviews >= 5
         if category:
-            query = query.filter(Product.category == category)
+            mask &= snapshot.category == snapshot.category_code(category)
+        rows = np.flatnonzero(mask)
+        if rows.size == 0 or top_n <= 0:
+            return []
         
-        # Calculer un score composite
-        products = query.all()
-        scored_products = []
+        # Score basé sur: sentiment + nombre d'avis + note moyenne
+        sentiment_weight = 0.5
+        reviews_weight = 0.3
+        rating_weight = 0.2
         
-        for product in products:
-            # Score basé sur: sentiment + nombre d'avis + note moyenne
-            sentiment_weight = 0.5
-            reviews_weight = 0.3
-            rating_weight = 0.2
-            
-            # Normaliser le nombre d'avis (max 100)
-            normalized_reviews = min(product.total_reviews / 100, 1.0)
-            
-            # Normaliser la note (0-5 vers 0-1)
-            normalized_rating = product.avg_rating / 5.0
-            
-            # Score composite
-            composite_score = (
-                (product.sentiment_score + 1) / 2 * sentiment_weight +  # Convertir -1,1 en 0,1
-                normalized_reviews * reviews_weight +
-                normalized_rating * rating_weight
-            )
-            
-            scored_products.append({
-                'product_id': product.id,
-                'product_name': product.name,
-                'score': composite_score,
-                'reason': f"{product.positive_reviews} avis positifs",
-                'sentiment_score': product.sentiment_score,
-                'total_reviews': product.total_reviews
-            })
+        # Score composite, calculé en float64 sur les colonnes filtrées
+        composite_scores = (
+            (snapshot.sentiment_score[rows].astype(np.float64) + 1) / 2 * sentiment_weight +  # Convertir -1,1 en 0,1
+            np.minimum(snapshot.total_reviews[rows] / 100, 1.0) * reviews_weight +  # Normaliser le nombre d'avis (max 100)
+            snapshot.avg_rating[rows] / 5.0 * rating_weight  # Normaliser la note (0-5 vers 0-1)
+        )
         
-        # Trier et retourner les top N
-        scored_products.sort(key=lambda x: x['score'], reverse=True)
-        return scored_products[:top_n]
+        # Top N par argpartition
+        k = min(top_n, rows.size)
+        top = np.argpartition(-composite_scores, k - 1)[:k]
+        top = top[np.argsort(-composite_scores[top], kind='stable')]
+        return [snapshot.recommendation(
+            rows[i], composite_scores[i], f"{snapshot.positive_reviews[rows[i]]} avis positifs"
+        ) for i in top]
+    
+    def _from_snapshot(self, ranked: List[tuple], reason: str) -> List[Dict]:
+        """[(product_id, score)] vers le format de réponse ; les produits absents de l'instantané sont ignorés"""
+        snapshot = self.products.get()
+        rows = snapshot.rows([pid for pid, _ in ranked])
+        return [
+            snapshot.recommendation(row, score, reason)
+            for row, (_, score) in zip(rows, ranked) if row >= 0
+        ]
     
     def _format_recommendations(self, db: Session, recommendations: List, method: str) -> List[Dict]:
         """Formate les recommandations"""
-        results = []
-        for product_id, data in recommendations:
-            product = db.query(Product).filter(Product.id == product_id).first()
-            if product:
-                results.append({
-                    'product_id': product.id,
-                    'product_name': product.name,
-                    'score': data['score'],
-                    'reason': f"Basé sur {method}",
-                    'sentiment_score': product.sentiment_score,
-                    'total_reviews': product.total_reviews
-                })
-        return results
+        return self._from_snapshot(
+            [(product_id, data['score']) for product_id, data in recommendations],
+            f"Basé sur {method}"
+        )
@@ -0,0 +1,209 @@
+"""
+Agrégats temporels de sentiment (jour / semaine) par produit, catégorie et langue
+
+Chaque avis ingéré incrémente quatre lignes de sentiment_rollups (jour et
+semaine, au niveau produit et au niveau catégorie) par un upsert dans la
+même transaction. Les courbes de tendance ne lisent que ces lignes.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+
+from models.database import Product, Review, SentimentRollup
+
+PERIODS = ('day', 'week')
+CATEGORY_SCOPE = 0  # product_id des lignes agrégées au niveau catégorie
+KEY_COLUMNS = ('period', 'bucket_start', 'product_id', 'category', 'language')
+COUNTERS = ('review_count', 'positive_reviews', 'neutral_reviews', 'negative_reviews', 'sentiment_sum', 'rating_sum')
+
+
+def bucket_start(day: date, period: str) -> date:
+    if isinstance(day, datetime):
+        day = day.date()
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _empty():
+    return dict.fromkeys(COUNTERS, 0)
+
+
+def _add_to_buckets(buckets, product_id, category, language, day, counters):
+    """Répartit les compteurs d'un jour sur les périodes et les deux niveaux"""
+    category = category or ''
+    language = language or ''
+    scopes = (product_id, CATEGORY_SCOPE) if product_id else (CATEGORY_SCOPE,)
+    for period in PERIODS:
+        start = bucket_start(day, period)
+        for scope in scopes:
+            target = buckets[(period, start, scope, category, language)]
+            for name, value in counters.items():
+                target[name] += value
+
+
+def _review_counters(sentiment, score, rating) -> Dict:
+    return {
+        'review_count': 1,
+        'positive_reviews': int(sentiment == 'Positif'),
+        'neutral_reviews': int(sentiment == 'Neutre'),
+        'negative_reviews': int(sentiment == 'Négatif'),
+        'sentiment_sum': score or 0.0,
+        'rating_sum': rating or 0.0,
+    }
+
+
+def _upsert_statement(dialect_name: str):
+    table = SentimentRollup.__table__
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS}
+    )
+
+
+def _apply(executor, buckets):
+    """Applique des incréments ; executor est une Session ou une Connection"""
+    if not buckets:
+        return
+    table = SentimentRollup.__table__
+    params = [dict(zip(KEY_COLUMNS, key), **counters) for key, counters in buckets.items()]
+    bind = executor.get_bind() if hasattr(executor, 'get_bind') else executor
+    stmt = _upsert_statement(bind.dialect.name)
+    if stmt is not None:
+        executor.execute(stmt, params)
+        return
+
+    # Dialecte sans upsert : mise à jour puis insertion si la ligne n'existe pas
+    for row in params:
+        key = and_(*(table.c[name] == row[name] for name in KEY_COLUMNS))
+        result = executor.execute(
+            update(table).where(key).values({name: table.c[name] + row[name] for name in COUNTERS})
+        )
+        if result.rowcount == 0:
+            executor.execute(insert(table).values(row))
+
+
+def record_reviews(executor, reviews: Iterable[Dict]):
+    """Incrémente les agrégats pour des avis nouvellement ingérés
+
+    Chaque avis est un dict avec product_id, category, language, sentiment,
+    sentiment_score, rating et created_at.
+    """
+    buckets = defaultdict(_empty)
+    for review in reviews:
+        _add_to_buckets(
+            buckets, review['product_id'], review.get('category'), review.get('language'),
+            review.get('created_at') or datetime.utcnow(),
+            _review_counters(review.get('sentiment'), review.get('sentiment_score'), review.get('rating'))
+        )
+    _apply(executor, buckets)
+
+
+def backfill(engine, chunk_size: int = 10_000) -> int:
+    """Reconstruit toute la table à partir des avis, par lots de chunk_size avis
+
+    La table est vidée par lots, puis chaque tranche d'identifiants d'avis est
+    agrégée par jour en SQL et ajoutée par upsert (les compteurs s'additionnent
+    d'une tranche à l'autre) : ni la table entière en mémoire, ni une seule
+    transaction géante.
+    """
+    table = SentimentRollup.__table__
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(
+                delete(table).where(table.c.id.in_(select(table.c.id).limit(chunk_size)))
+            ).rowcount
+        if not deleted:
+            break
+
+    reviews, products = Review.__table__, Product.__table__
+    day = func.date(reviews.c.created_at)
+    daily = (
+        select(
+            reviews.c.product_id, products.c.category, reviews.c.language, day,
+            func.count(),
+            func.sum(case((reviews.c.sentiment == 'Positif', 1), else_=0)),
+            func.sum(case((reviews.c.sentiment == 'Neutre', 1), else_=0)),
+            func.sum(case((reviews.c.sentiment == 'Négatif', 1), else_=0)),
+            func.coalesce(func.sum(reviews.c.sentiment_score), 0.0),
+            func.coalesce(func.sum(reviews.c.rating), 0.0),
+        )
+        .select_from(reviews.outerjoin(products, reviews.c.product_id == products.c.id))
+        .where(reviews.c.created_at.isnot(None))
+        .group_by(reviews.c.product_id, products.c.category, reviews.c.language, day)
+    )
+
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            # Borne haute de la tranche : le chunk_size-ième avis suivant (None : dernière tranche)
+            upper = conn.execute(
+                select(reviews.c.id).where(reviews.c.id > last_id)
+                .order_by(reviews.c.id).offset(chunk_size - 1).limit(1)
+            ).scalar()
+            query = daily.where(reviews.c.id > last_id)
+            if upper is not None:
+                query = query.where(reviews.c.id <= upper)
+
+            buckets = defaultdict(_empty)
+            for product_id, category, language, day_value, *values in conn.execute(query):
+                if isinstance(day_value, str):
+                    day_value = date.fromisoformat(day_value)
+                _add_to_buckets(buckets, product_id, category, language, day_value, dict(zip(COUNTERS, values)))
+            _apply(conn, buckets)
+        if upper is None:
+            break
+        last_id = upper
+
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def trend(
+    db,
+    period: str = 'week',
+    product_id: Optional[int] = None,
+    category: Optional[str] = None,
+    language: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> List[Dict]:
+    """Série temporelle d'un produit ou d'une catégorie, toutes langues ou une seule"""
+    table = SentimentRollup.__table__
+    query = (
+        select(table.c.bucket_start, *(func.sum(table.c[name]) for name in COUNTERS))
+        .where(table.c.period == period, table.c.product_id == (product_id or CATEGORY_SCOPE))
+        .group_by(table.c.bucket_start)
+        .order_by(table.c.bucket_start)
+    )
+    if category is not None:
+        query = query.where(table.c.category == category)
+    if language:
+        query = query.where(table.c.language == language)
+    if start is not None:
+        query = query.where(table.c.bucket_start >= bucket_start(start, period))
+    if end is not None:
+        query = query.where(table.c.bucket_start <= end)
+
+    points = []
+    for bucket, count, pos, neu, neg, score_sum, rating_sum in db.execute(query):
+        points.append({
+            'bucket_start': bucket,
+            'review_count': count,
+            'positive_reviews': pos,
+            'neutral_reviews': neu,
+            'negative_reviews': neg,
+            'avg_sentiment': score_sum / count if count else 0.0,
+            'avg_rating': rating_sum / count if count else 0.0,
+        })
+    return points
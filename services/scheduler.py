@@ -0,0 +1,157 @@
+"""
+Ordonnanceur d'inférence : priorités, files bornées et dégradation sur SLO
+
+Deux classes de priorité partagent le même SentimentAnalyzer : les
+requêtes interactives sont toujours servies avant les lots (bulk). Chaque
+file est bornée ; une file pleine lève Overloaded (429 + Retry-After côté
+API). Si l'attente mesurée dépasse le SLO de sa classe (INFERENCE_SLO_MS,
+INFERENCE_BULK_SLO_MS ; 0 : jamais), l'avis est analysé par
+_simple_sentiment_analysis (lexique) et marqué degraded=True pour être
+recalculé plus tard.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict
+
+from config import settings
+from services.metrics import Counter, Gauge, Histogram, registry
+
+PRIORITIES = ('interactive', 'bulk')
+EWMA_ALPHA = 0.2
+
+scheduler_requests = registry.register(Counter(
+    'feelya_inference_scheduler_total', "Analyses passées par l'ordonnanceur, par issue",
+    ('priority', 'outcome')
+))
+queue_wait = registry.register(Histogram(
+    'feelya_inference_queue_wait_seconds', "Attente en file avant inférence",
+    ('priority',)
+))
+
+
+class Overloaded(Exception):
+    """File pleine : la requête est rejetée"""
+
+    def __init__(self, priority: str, retry_after: int):
+        super().__init__(f"File {priority} pleine")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        analyzer,
+        workers: int = None,
+        queue_sizes: Dict[str, int] = None,
+        slo_ms: Dict[str, float] = None,
+        timeout: float = None
+    ):
+        self.analyzer = analyzer
+        self.workers = workers or settings.INFERENCE_SCHEDULER_WORKERS
+        self.queue_sizes = queue_sizes or {
+            'interactive': settings.INFERENCE_INTERACTIVE_QUEUE,
+            'bulk': settings.INFERENCE_BULK_QUEUE,
+        }
+        slo_ms = slo_ms or {
+            'interactive': settings.INFERENCE_SLO_MS,
+            'bulk': settings.INFERENCE_BULK_SLO_MS,
+        }
+        self.slo = {p: slo_ms[p] / 1000 if slo_ms[p] > 0 else math.inf for p in PRIORITIES}
+        self.timeout = settings.INFERENCE_TIMEOUT if timeout is None else timeout
+
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        # Moyennes glissantes de l'attente en file et du temps de service
+        self.wait_ewma = dict.fromkeys(PRIORITIES, 0.0)
+        self.service_ewma = 0.05
+        self._condition = threading.Condition()
+        self._threads = []
+
+        registry.register(Gauge(
+            'feelya_inference_queue_depth', "Requêtes en attente par priorité",
+            ('priority',), callback=lambda: {(p,): len(q) for p, q in self.queues.items()}
+        ))
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"inference-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def retry_after(self, priority: str) -> int:
+        """Estimation (secondes) du temps de vidage de la file"""
+        backlog = sum(len(self.queues[p]) for p in PRIORITIES[:PRIORITIES.index(priority) + 1])
+        return max(1, math.ceil(backlog * self.service_ewma / self.workers))
+
+    def _degraded(self, priority: str, text: str, language: str, raw_text: str) -> dict:
+        result = self.analyzer._simple_sentiment_analysis(raw_text or text, language)
+        result['degraded'] = True
+        if registry.enabled:
+            scheduler_requests.inc(priority, 'degraded')
+        return result
+
+    def analyze(self, text: str, language: str = 'fr', raw_text: str = None, priority: str = 'interactive') -> dict:
+        """Analyse via la file de la priorité donnée ; bloque jusqu'au résultat"""
+        if priority not in self.queues:
+            raise ValueError(f"Priorité inconnue: {priority}")
+
+        # SLO déjà dépassé en moyenne : inutile d'attendre le modèle
+        if self.wait_ewma[priority] > self.slo[priority]:
+            if not self.queues[priority]:
+                # File vide : la moyenne redescend pour rendre la main au modèle
+                self.wait_ewma[priority] *= 1 - EWMA_ALPHA
+            return self._degraded(priority, text, language, raw_text)
+
+        future = Future()
+        with self._condition:
+            if len(self.queues[priority]) >= self.queue_sizes[priority]:
+                if registry.enabled:
+                    scheduler_requests.inc(priority, 'shed')
+                raise Overloaded(priority, self.retry_after(priority))
+            self.queues[priority].append((text, language, raw_text, time.perf_counter(), future))
+            self._condition.notify()
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Avant Python 3.11, concurrent.futures.TimeoutError n'est pas le TimeoutError natif.
+            # Le worker ignorera la tâche annulée ; réponse de repli, à recalculer
+            future.cancel()
+            return self._degraded(priority, text, language, raw_text)
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                for priority in PRIORITIES:
+                    if self.queues[priority]:
+                        return priority, self.queues[priority].popleft()
+                self._condition.wait()
+
+    def _worker(self):
+        while True:
+            priority, (text, language, raw_text, enqueued, future) = self._next_job()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            waited = time.perf_counter() - enqueued
+            self.wait_ewma[priority] += EWMA_ALPHA * (waited - self.wait_ewma[priority])
+            if registry.enabled:
+                queue_wait.observe(priority, value=waited)
+
+            try:
+                if waited > self.slo[priority]:
+                    # Trop tard pour le modèle : réponse rapide, à recalculer
+                    future.set_result(self._degraded(priority, text, language, raw_text))
+                    continue
+                start = time.perf_counter()
+                result = self.analyzer.analyze(text, language, raw_text=raw_text)
+                self.service_ewma += EWMA_ALPHA * (time.perf_counter() - start - self.service_ewma)
+                if registry.enabled:
+                    scheduler_requests.inc(priority, 'served')
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
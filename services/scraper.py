@@ -1,72 +1,161 @@
 import requests
-from bs4 import BeautifulSoup
 import time
-from typing import List, Dict
+from collections import Counter
+from typing import Iterable, List, Dict, Optional, Tuple
 import random
+from config import settings
+from services.crawl_state import CrawlState, content_hash, review_fingerprint
+from services.html_parsers import get_parser, load_selectors
 
 class EcommerceScraper:
-    def __init__(self):
+    def __init__(self, state: CrawlState = None, delay: float = None, parser: str = None):
         self.headers = {
             'User-Agent': settings.SCRAPING_USER_AGENT
         }
-        self.delay = settings.SCRAPING_DELAY
+        self.delay = settings.SCRAPING_DELAY if delay is None else delay
+        # Connexions réutilisées d'une page à l'autre
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Sans état : chaque passage retélécharge et réanalyse tout
+        self.state = state
+        # Pages dont les avis nouveaux n'ont pas encore été ingérés : url -> état et empreintes
+        self.pending: Dict[str, Dict] = {}
+        self.stats = Counter()
+        # Backend HTML et sélecteurs CSS par site (services/html_parsers.py)
+        self.parser = get_parser(parser)
+        self.selectors = load_selectors()
+    
+    def _fetch(self, url: str, kind: str) -> Tuple[Optional[bytes], Optional[Dict]]:
+        """Télécharge une page ; (None, None) si elle n'a pas changé depuis le dernier passage
+
+        Le second élément est l'état de la page (validateurs HTTP, empreinte
+        du contenu), à enregistrer par _save_page une fois la page traitée :
+        enregistré avant, une erreur d'analyse la ferait ignorer au passage
+        suivant comme inchangée.
+        """
+        # Ajouter un délai pour éviter d'être bloqué
+        time.sleep(self.delay)
+        
+        headers = self.state.conditional_headers(url, kind) if self.state else {}
+        response = self.session.get(url, headers=headers)
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(response.content)
+        
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+            self.state.touch_page(url, kind)
+            return None, None
+        response.raise_for_status()
+        
+        if self.state is None:
+            return response.content, None
+        
+        # Site sans ETag / Last-Modified : comparaison du contenu
+        page = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash(response.content),
+        }
+        previous = self.state.get_page(url, kind)
+        if previous and previous['content_hash'] == page['content_hash']:
+            self.stats['unchanged'] += 1
+            # Validateurs éventuellement renouvelés par le site
+            self._save_page(url, kind, page)
+            return None, None
+        return response.content, page
+    
+    def _save_page(self, url: str, kind: str, page: Optional[Dict]):
+        if self.state is not None and page is not None:
+            self.state.save_page(url, page['etag'], page['last_modified'], page['content_hash'], kind)
+    
+    def commit_fingerprints(self, reviews: Iterable[Dict]):
+        """Marque des avis comme vus ; à appeler par l'ingestion une fois ces avis enregistrés
+
+        Tant que cet appel n'a pas eu lieu (échec de l'inférence ou de
+        l'insertion), le passage suivant renvoie de nouveau les mêmes avis.
+        L'état d'une page n'est enregistré qu'une fois tous ses avis
+        nouveaux ingérés.
+        """
+        if self.state is None:
+            return
+        by_url: Dict[str, List[str]] = {}
+        for review in reviews:
+            by_url.setdefault(review['product_url'], []).append(review['fingerprint'])
+        for url, fingerprints in by_url.items():
+            self.state.add_fingerprints(url, fingerprints)
+            pending = self.pending.get(url)
+            if pending is None:
+                continue
+            pending['fingerprints'].difference_update(fingerprints)
+            if not pending['fingerprints']:
+                self._save_page(url, 'reviews', pending['page'])
+                del self.pending[url]
     
     def scrape_jumia_reviews(self, product_url: str) -> List[Dict]:
-        """Scrape les avis depuis Jumia"""
+        """Scrape les avis depuis Jumia (avec état : seulement les avis nouveaux)"""
         reviews = []
         try:
-            # Ajouter un délai pour éviter d'être bloqué
-            time.sleep(self.delay)
+            content, page = self._fetch(product_url, 'reviews')
+            if content is None:
+                return reviews
             
-            response = requests.get(product_url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Seuls les conteneurs d'avis sont extraits (sélecteurs du site)
+            extracted = self.parser.reviews(content, self.selectors['jumia'])
+            self.stats['parsed'] += 1
             
-            # Trouver les avis (adapter selon la structure HTML de Jumia)
-            review_elements = soup.find_all('div', class_='review-item')
-            
-            for element in review_elements:
+            for raw_rating, text in extracted:
                 try:
-                    rating_elem = element.find('div', class_='rating')
-                    text_elem = element.find('p', class_='review-text')
+                    rating = float(raw_rating or 0)
                     
-                    if rating_elem and text_elem:
-                        rating = float(rating_elem.get('data-rating', 0))
-                        text = text_elem.text.strip()
-                        
-                        reviews.append({
-                            'rating': rating,
-                            'text': text,
-                            'platform': 'jumia'
-                        })
+                    reviews.append({
+                        'rating': rating,
+                        'text': text,
+                        'platform': 'jumia',
+                        'product_url': product_url,
+                        'fingerprint': review_fingerprint(product_url, rating, text)
+                    })
                 except Exception as e:
                     print(f"Erreur lors du parsing d'un avis: {e}")
                     continue
             
+            if self.state is not None:
+                # Avis déjà vus lors d'un passage précédent : ni réinsérés ni réanalysés
+                unseen = self.state.unseen(review['fingerprint'] for review in reviews)
+                self.stats['reviews_skipped'] += len(reviews) - len(unseen)
+                reviews = [review for review in reviews if review['fingerprint'] in unseen]
+                if reviews:
+                    # Empreintes et état de la page enregistrés par commit_fingerprints, après l'ingestion
+                    self.pending[product_url] = {
+                        'page': page, 'fingerprints': {review['fingerprint'] for review in reviews}
+                    }
+                else:
+                    self._save_page(product_url, 'reviews', page)
+            self.stats['reviews_new'] += len(reviews)
+        
         except Exception as e:
             print(f"Erreur lors du scraping: {e}")
         
         return reviews
     
-    def scrape_product_info(self, product_url: str) -> Dict:
-        """Scrape les informations d'un produit"""
+    def scrape_product_info(self, product_url: str, site: str = 'jumia') -> Optional[Dict]:
+        """Scrape les informations d'un produit (None : page inchangée)"""
         try:
-            time.sleep(self.delay)
-            response = requests.get(product_url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extraire les informations (adapter selon le site)
-            name = soup.find('h1', class_='product-title')
-            price = soup.find('span', class_='price')
-            description = soup.find('div', class_='description')
-            category = soup.find('span', class_='category')
+            content, page = self._fetch(product_url, 'product')
+            if content is None:
+                return None
+            # Extraire les informations (sélecteurs du site)
+            fields = self.parser.product(content, self.selectors[site])
+            self.stats['parsed'] += 1
             
-            return {
-                'name': name.text.strip() if name else '',
-                'price': float(price.text.replace('DH', '').strip()) if price else 0.0,
-                'description': description.text.strip() if description else '',
-                'category': category.text.strip() if category else '',
+            info = {
+                'name': fields.get('name', ''),
+                'price': float(fields['price'].replace('DH', '').strip()) if fields.get('price') else 0.0,
+                'description': fields.get('description', ''),
+                'category': fields.get('category', ''),
                 'url': product_url
             }
+            self._save_page(product_url, 'product', page)
+            return info
         except Exception as e:
             print(f"Erreur lors du scraping du produit: {e}")
             return {}
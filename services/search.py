@@ -0,0 +1,240 @@
+"""
+Recherche plein texte dans les avis avec facettes sentiment / langue
+
+Index inversé natif de la base : table FTS5 sans contenu sur SQLite
+(rowid = id de l'avis, classement bm25), table tsvector + index GIN sur
+PostgreSQL (classement ts_rank). Documents et requêtes sont normalisés par
+normalize_for_search (minuscules, arabe sans diacritiques,
+variantes d'alef unifiées) ; la configuration 'simple' de PostgreSQL
+n'ajoute pas de racinisation, les deux moteurs trouvent donc les mêmes
+avis. L'index est alimenté à chaque avis ingéré ; build_search_index.py le
+reconstruit entièrement dans une table à part, renommée à la fin.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, column, func, literal_column, select, table, text
+
+from models.database import Review
+from services.preprocessor import normalize_for_search
+
+SQLITE_TABLE = 'reviews_fts'
+POSTGRES_TABLE = 'review_search'
+FACETS = ('sentiment', 'language')
+
+
+def _normalize(value: str) -> str:
+    return normalize_for_search(value or '')
+
+
+def _dialect(executor) -> str:
+    bind = executor.get_bind() if hasattr(executor, 'get_bind') else executor
+    return bind.dialect.name
+
+
+def _create(conn, dialect: str, name: str):
+    if dialect == 'sqlite':
+        # Sans contenu : seul l'index inversé est stocké, le texte reste dans reviews
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+            "document, content='', tokenize='unicode61 remove_diacritics 2')"
+        ))
+    else:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} ("
+            "review_id INTEGER PRIMARY KEY REFERENCES reviews(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{name}_document ON {name} USING GIN (document)"))
+
+
+def init_index(engine, drop: bool = False):
+    """Crée la structure d'index si elle n'existe pas (drop=True : la vide d'abord)"""
+    dialect = engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        print(f"Recherche plein texte non disponible pour {dialect}")
+        return
+    name = SQLITE_TABLE if dialect == 'sqlite' else POSTGRES_TABLE
+    with engine.begin() as conn:
+        if drop:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        _create(conn, dialect, name)
+
+
+def supported(executor) -> bool:
+    return _dialect(executor) in ('sqlite', 'postgresql')
+
+
+def _index(executor, dialect: str, name: str, reviews: Iterable[Tuple[int, str]]) -> int:
+    params = [{'b_id': review_id, 'b_document': _normalize(value)} for review_id, value in reviews]
+    if not params:
+        return 0
+    if dialect == 'sqlite':
+        # Table sans contenu : INSERT OR REPLACE laisserait les termes de l'ancien texte dans
+        # l'index. Une entrée existante est d'abord retirée par la commande 'delete', qui
+        # exige le document indexé à l'origine, c'est-à-dire reviews.text normalisé.
+        indexed = executor.execute(
+            text(f"SELECT rowid FROM {name} WHERE rowid IN :b_ids").bindparams(bindparam('b_ids', expanding=True)),
+            {'b_ids': [p['b_id'] for p in params]}
+        ).scalars().all()
+        if indexed:
+            reviews_table = Review.__table__
+            previous = executor.execute(
+                select(reviews_table.c.id, reviews_table.c.text).where(reviews_table.c.id.in_(indexed))
+            ).all()
+            executor.execute(
+                text(f"INSERT INTO {name} ({name}, rowid, document) VALUES ('delete', :b_id, :b_document)"),
+                [{'b_id': review_id, 'b_document': _normalize(value)} for review_id, value in previous]
+            )
+        stmt = text(f"INSERT INTO {name} (rowid, document) VALUES (:b_id, :b_document)")
+    else:
+        stmt = text(
+            f"INSERT INTO {name} (review_id, document) "
+            "VALUES (:b_id, to_tsvector('simple', :b_document)) "
+            "ON CONFLICT (review_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+    executor.execute(stmt, params)
+    return len(params)
+
+
+def index_reviews(executor, reviews: Iterable[Tuple[int, str]]) -> int:
+    """Ajoute ou réindexe des avis [(id, texte)] ; executor est une Session ou une Connection
+
+    Un avis déjà indexé doit l'être avant la mise à jour de reviews.text (l'ancien
+    texte sert à retirer ses termes de l'index SQLite).
+    """
+    dialect = _dialect(executor)
+    if dialect == 'sqlite':
+        return _index(executor, dialect, SQLITE_TABLE, reviews)
+    if dialect == 'postgresql':
+        return _index(executor, dialect, POSTGRES_TABLE, reviews)
+    return 0
+
+
+def rebuild(engine, chunk_size: int = 10_000) -> int:
+    """Reconstruit tout l'index à partir de reviews.text (pagination par clé)
+
+    La construction se fait dans une table à part : l'index courant reste servi
+    jusqu'au renommage final.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        print(f"Recherche plein texte non disponible pour {dialect}")
+        return 0
+    name = SQLITE_TABLE if dialect == 'sqlite' else POSTGRES_TABLE
+    building = f"{name}_rebuild"
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {building}"))
+        _create(conn, dialect, building)
+
+    reviews = Review.__table__
+    last_id, total = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(reviews.c.id, reviews.c.text)
+                .where(reviews.c.id > last_id)
+                .order_by(reviews.c.id)
+                .limit(chunk_size)
+            ).all()
+            total += _index(conn, dialect, building, rows)
+        if len(rows) < chunk_size:
+            break
+        last_id = rows[-1][0]
+    if rows:
+        last_id = rows[-1][0]
+
+    with engine.begin() as conn:
+        # Avis insérés depuis le dernier lot, puis échange : aucune insertion entre les deux
+        if dialect == 'postgresql':
+            conn.execute(text(f"LOCK TABLE {reviews.name} IN SHARE MODE"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        rows = conn.execute(
+            select(reviews.c.id, reviews.c.text).where(reviews.c.id > last_id).order_by(reviews.c.id)
+        ).all()
+        total += _index(conn, dialect, building, rows)
+        conn.execute(text(f"ALTER TABLE {building} RENAME TO {name}"))
+        if dialect == 'postgresql':
+            conn.execute(text(f"ALTER INDEX {building}_pkey RENAME TO {name}_pkey"))
+            conn.execute(text(f"ALTER INDEX ix_{building}_document RENAME TO ix_{name}_document"))
+    return total
+
+
+def parse_query(query: str, dialect: str) -> Optional[str]:
+    """Requête utilisateur → expression MATCH (FTS5) ou tsquery ; tous les mots requis
+
+    Un mot terminé par * est recherché comme préfixe.
+    """
+    terms = []
+    for word in query.split():
+        tokens = _normalize(word).split()
+        terms.extend((token, False) for token in tokens[:-1])
+        if tokens:
+            terms.append((tokens[-1], word.endswith('*')))
+    if not terms:
+        return None
+    if dialect == 'sqlite':
+        return ' '.join(f'"{token}"' + ('*' if prefix else '') for token, prefix in terms)
+    return ' & '.join(token + (':*' if prefix else '') for token, prefix in terms)
+
+
+def _match(dialect: str, expression: str):
+    """(table d'index, colonne id, condition, score croissant avec la pertinence)"""
+    if dialect == 'sqlite':
+        index = table(SQLITE_TABLE, column('rowid'))
+        condition = literal_column(SQLITE_TABLE).op('MATCH')(bindparam('b_query', expression))
+        # bm25 est négatif, plus petit = plus pertinent
+        return index, index.c.rowid, condition, -func.bm25(literal_column(SQLITE_TABLE))
+    index = table(POSTGRES_TABLE, column('review_id'), column('document'))
+    tsquery = func.to_tsquery('simple', bindparam('b_query', expression))
+    return index, index.c.review_id, index.c.document.op('@@')(tsquery), func.ts_rank(index.c.document, tsquery)
+
+
+def search(
+    db,
+    query: str,
+    columns: List[str],
+    sentiment: Optional[str] = None,
+    language: Optional[str] = None,
+    product_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 20
+) -> Dict:
+    """Avis classés par pertinence, total et facettes sur l'ensemble des résultats"""
+    dialect = _dialect(db)
+    expression = parse_query(query, dialect)
+    if expression is None:
+        return {'total': 0, 'hits': [], 'facets': {name: {} for name in FACETS}}
+
+    reviews = Review.__table__
+    index, review_id, condition, score = _match(dialect, expression)
+    source = index.join(reviews, reviews.c.id == review_id)
+    filters = [condition]
+    if sentiment:
+        filters.append(reviews.c.sentiment == sentiment)
+    if language:
+        filters.append(reviews.c.language == language)
+    if product_id:
+        filters.append(reviews.c.product_id == product_id)
+
+    hits = db.execute(
+        select(*(reviews.c[name] for name in columns), score.label('score'))
+        .select_from(source)
+        .where(*filters)
+        .order_by(score.desc(), reviews.c.id.desc())
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+    facets = {}
+    for name in FACETS:
+        counts = db.execute(
+            select(reviews.c[name], func.count()).select_from(source).where(*filters).group_by(reviews.c[name])
+        ).all()
+        facets[name] = {value or 'unknown': count for value, count in counts}
+
+    return {
+        'total': sum(facets['sentiment'].values()),
+        'hits': [dict(zip([*columns, 'score'], row)) for row in hits],
+        'facets': facets,
+    }
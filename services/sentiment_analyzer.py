@@ -1,22 +1,76 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from transformers import pipeline
 import numpy as np
+from typing import List, Optional, Sequence
+from config import settings
+from services.lexicon import LexiconSentimentEngine
+from services.preprocessor import split_segments
+from services.metrics import timed, observe_batch, record_sentiment_backend
+
+BACKENDS = ('bert', 'lexicon', 'tiered', 'student')
+AGGREGATIONS = ('length', 'confidence')
+# Score agrégé des segments en deçà duquel l'avis est neutre
+SEGMENT_NEUTRAL_BAND = 0.25
+
+NEUTRAL_RESULT = {'sentiment': 'Neutre', 'sentiment_score': 0.0, 'confidence': 0.0}
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.device = 0 if torch.cuda.is_available() else -1
+    def __init__(
+        self,
+        backend: str = None,
+        lexicon_threshold: float = None,
+        segment_chars: int = None,
+        aggregation: str = None,
+        keep_segments: bool = None
+    ):
+        # Fixé au chargement des modèles : torch n'est importé que pour bert / tiered
+        self.device = -1
+        
+        # bert : transformers seul ; lexicon : lexique seul ;
+        # tiered : lexique d'abord, BERT si la confiance est insuffisante ;
+        # student : modèle distillé (services/distillation.py)
+        self.backend = backend or settings.SENTIMENT_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend de sentiment inconnu: {self.backend}")
+        self.lexicon_threshold = (
+            settings.LEXICON_CONFIDENCE_THRESHOLD if lexicon_threshold is None else lexicon_threshold
+        )
+        self.lexicon = LexiconSentimentEngine()
+        self.segment_chars = segment_chars or settings.SENTIMENT_SEGMENT_CHARS
+        self.aggregation = aggregation or settings.SENTIMENT_SEGMENT_AGGREGATION
+        if self.aggregation not in AGGREGATIONS:
+            raise ValueError(f"Agrégation de segments inconnue: {self.aggregation}")
+        self.keep_segments = settings.SENTIMENT_KEEP_SEGMENTS if keep_segments is None else keep_segments
         
         # Modèles pour différentes langues
         self.models = {}
         self.tokenizers = {}
+        self.student = None
+        
+        # Charger les modèles (inutile en mode lexique ou élève)
+        if self.backend in ('lexicon', 'student'):
+            self.models = {'fr': None, 'ar': None, 'darija': None}
+        else:
+            self._load_models()
         
-        # Charger les modèles
-        self._load_models()
+        if self.backend == 'student':
+            self._load_student()
+    
+    def _load_student(self):
+        """Charge le modèle élève distillé"""
+        from services.distillation import load_student
+        try:
+            self.student = load_student(settings.STUDENT_MODEL_PATH or None)
+        except Exception as e:
+            # Repli sur le lexique : résultats marqués degraded, comptés sous student_fallback
+            print(f"Erreur lors du chargement du modèle élève, repli sur le lexique: {e}")
+            self.student = None
     
     def _load_models(self):
         """Charge les modèles de sentiment"""
         try:
+            import torch
+            from transformers import pipeline
+            self.device = 0 if torch.cuda.is_available() else -1
+            
             # Modèle pour le français
             self.models['fr'] = pipeline(
                 "sentiment-analysis",
@@ -41,24 +95,47 @@ class SentimentAnalyzer:
             self.models['ar'] = None
             self.models['darija'] = None
     
-    def analyze(self, text: str, language: str = 'fr') -> dict:
-        """Analyse le sentiment d'un texte"""
+    @timed('analyze')
+    def analyze(self, text: str, language: str = 'fr', raw_text: str = None) -> dict:
+        """Analyse le sentiment d'un texte
+
+        raw_text (texte avant suppression des stopwords) permet au lexique
+        de voir les négations ; à défaut, text est utilisé.
+        """
         if not text or len(text.strip()) < 3:
-            return {
-                'sentiment': 'Neutre',
-                'sentiment_score': 0.0,
-                'confidence': 0.0
-            }
+            return dict(NEUTRAL_RESULT)
+        
+        if self.backend == 'student':
+            if self.student is not None:
+                record_sentiment_backend('student')
+                return self.student.predict([text], [language])[0]
+            # Modèle élève absent : réponse du lexique, à recalculer
+            record_sentiment_backend('student_fallback')
+            result = self._simple_sentiment_analysis(raw_text or text, language)
+            result['degraded'] = True
+            return result
         
+        if self.backend != 'bert':
+            result = self.lexicon.analyze(raw_text or text, language)
+            if self.backend == 'lexicon' or result['confidence'] >= self.lexicon_threshold:
+                record_sentiment_backend('lexicon')
+                return result
+        
+        record_sentiment_backend('bert')
         try:
             model = self.models.get(language, self.models['fr'])
             
             if model is None:
                 # Analyse simple basée sur des mots-clés
-                return self._simple_sentiment_analysis(text, language)
+                return self._simple_sentiment_analysis(raw_text or text, language)
+            
+            # Avis long : toutes ses phrases sont notées, en un seul lot
+            source = raw_text or text
+            if len(source) > self.segment_chars:
+                return self._analyze_segments(model, source, language)
             
             # Analyse avec le modèle
-            result = model(text[:512])[0]  # Limiter à 512 tokens
+            result = model(text, truncation=True)[0]
             
             # Convertir le label en sentiment
             sentiment, score = self._convert_label_to_sentiment(result['label'], result['score'])
@@ -71,7 +148,73 @@ class SentimentAnalyzer:
             
         except Exception as e:
             print(f"Erreur lors de l'analyse: {e}")
-            return self._simple_sentiment_analysis(text, language)
+            return self._simple_sentiment_analysis(raw_text or text, language)
+    
+    def analyze_batch(
+        self,
+        texts: Sequence[str],
+        languages: Sequence[str],
+        raw_texts: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """Analyse un lot de textes (vectorisé pour le backend élève)"""
+        observe_batch('analyze', len(texts))
+        raw_texts = raw_texts or [None] * len(texts)
+        
+        if self.backend != 'student' or self.student is None:
+            return [self.analyze(t, l, raw_text=r) for t, l, r in zip(texts, languages, raw_texts)]
+        
+        results = [dict(NEUTRAL_RESULT) for _ in texts]
+        valid = [i for i, t in enumerate(texts) if t and len(t.strip()) >= 3]
+        predictions = self.student.predict([texts[i] for i in valid], [languages[i] for i in valid])
+        for i, prediction in zip(valid, predictions):
+            results[i] = prediction
+        record_sentiment_backend('student', len(valid))
+        return results
+    
+    def _analyze_segments(self, model, text: str, language: str) -> dict:
+        """Note chaque segment (phrases regroupées) en un lot puis agrège
+
+        Les segments sont pris dans le texte brut : la ponctuation sert au
+        découpage et les négations restent visibles du modèle.
+        """
+        segments = split_segments(text, language, self.segment_chars)
+        observe_batch('segments', len(segments))
+        outputs = model(segments, batch_size=len(segments), truncation=True)
+        
+        scored = []
+        for segment, output in zip(segments, outputs):
+            sentiment, score = self._convert_label_to_sentiment(output['label'], output['score'])
+            scored.append({'text': segment, 'sentiment': sentiment, 'sentiment_score': score, 'confidence': output['score']})
+        
+        result = self.aggregate_segments(scored, self.aggregation)
+        if self.keep_segments:
+            result['segments'] = scored
+        return result
+    
+    @staticmethod
+    def aggregate_segments(scored: List[dict], aggregation: str = 'length') -> dict:
+        """Sentiment de l'avis : moyenne des segments pondérée par longueur ou par confiance"""
+        scores = np.array([s['sentiment_score'] for s in scored], dtype=np.float64)
+        confidences = np.array([s['confidence'] for s in scored], dtype=np.float64)
+        if aggregation == 'confidence':
+            weights = confidences
+        else:
+            weights = np.array([len(s['text']) for s in scored], dtype=np.float64)
+        if weights.sum() <= 0:
+            weights = np.ones_like(scores)
+        
+        score = float(np.average(scores, weights=weights))
+        if score > SEGMENT_NEUTRAL_BAND:
+            sentiment = 'Positif'
+        elif score < -SEGMENT_NEUTRAL_BAND:
+            sentiment = 'Négatif'
+        else:
+            sentiment = 'Neutre'
+        return {
+            'sentiment': sentiment,
+            'sentiment_score': score,
+            'confidence': float(np.average(confidences, weights=weights))
+        }
     
     def _convert_label_to_sentiment(self, label: str, confidence: float) -> tuple[str, float]:
         """Convertit le label du modèle en sentiment"""
@@ -84,38 +227,5 @@ class SentimentAnalyzer:
             return 'Négatif', -0.5 - (confidence * 0.5)
     
     def _simple_sentiment_analysis(self, text: str, language: str) -> dict:
-        """Analyse de sentiment simple basée sur des mots-clés"""
-        positive_words_fr = {
-            'excellent', 'super', 'génial', 'parfait', 'top', 'bien',
-            'bon', 'qualité', 'satisfait', 'recommande', 'incroyable'
-        }
-        negative_words_fr = {
-            'mauvais', 'nul', 'décevant', 'horrible', 'arnaque',
-            'médiocre', 'cassé', 'défectueux', 'déçu'
-        }
-        
-        positive_words_ar = {
-            'ممتاز', 'رائع', 'جيد', 'جميل', 'أنصح', 'ممتازة'
-        }
-        negative_words_ar = {
-            'سيء', 'سيئ', 'غير', 'راضي', 'خيبة'
-        }
-        
-        text_lower = text.lower()
-        
-        if language == 'fr':
-            pos_count = sum(1 for word in positive_words_fr if word in text_lower)
-            neg_count = sum(1 for word in negative_words_fr if word in text_lower)
-        else:
-            pos_count = sum(1 for word in positive_words_ar if word in text)
-            neg_count = sum(1 for word in negative_words_ar if word in text)
-        
-        if pos_count > neg_count:
-            score = min(0.8, pos_count * 0.3)
-            return {'sentiment': 'Positif', 'sentiment_score': score, 'confidence': 0.6}
-        elif neg_count > pos_count:
-            score = max(-0.8, -neg_count * 0.3)
-            return {'sentiment': 'Négatif', 'sentiment_score': score, 'confidence': 0.6}
-        else:
-            return {'sentiment': 'Neutre', 'sentiment_score': 0.0, 'confidence': 0.5}
-
+        """Analyse de sentiment simple basée sur le lexique"""
+        return self.lexicon.analyze(text, language)
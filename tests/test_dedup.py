@@ -0,0 +1,70 @@
+from services.dedup import DuplicateIndex
+
+POSITIVE = ("Ce téléphone est vraiment bon, la batterie tient toute la journée "
+            "et la livraison était rapide")
+NEGATIVE = ("Ce téléphone est pas vraiment bon, la batterie tient pas toute la journée "
+            "et la livraison était pas rapide")
+
+
+def canonical(sentiment):
+    return {'review_id': 1, 'product_id': 1, 'user_id': 1, 'sentiment': sentiment,
+            'sentiment_score': 0.8, 'confidence': 0.9}
+
+
+def test_negated_review_is_not_a_duplicate():
+    # Les stopwords NLTK retirent « pas » : les deux avis prétraités sont identiques
+    index = DuplicateIndex(threshold=0.8)
+    index.add(POSITIVE, canonical('Positif'))
+    assert index.find(NEGATIVE) is None
+
+
+def test_near_duplicate_is_found():
+    index = DuplicateIndex(threshold=0.8)
+    index.add(POSITIVE, canonical('Positif'))
+    assert index.find(POSITIVE.upper() + " !!")['sentiment'] == 'Positif'
+    assert index.find(POSITIVE + " Merci")['sentiment'] == 'Positif'
+
+
+def test_text_without_words_is_ignored():
+    index = DuplicateIndex(threshold=0.8)
+    assert index.add("😍😍", canonical('Positif')) is None
+    assert index.find("😡") is None
+
+
+def test_entries_are_shared_through_the_table(tmp_path):
+    from sqlalchemy import create_engine
+
+    from models.database import init_schema
+    from services.dedup import load_or_create
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'dedup.db'}")
+    init_schema(engine)
+    first, second = load_or_create(engine), load_or_create(engine)
+    first.add(POSITIVE, canonical('Positif'))
+    assert second.sync().find(POSITIVE)['user_id'] == 1
+    # Un nouveau processus retrouve l'entrée sans enregistrement à l'arrêt
+    assert load_or_create(engine).find(POSITIVE + " Merci")['sentiment'] == 'Positif'
+    assert first.sync().size == 1
+
+
+def test_running_worker_reloads_a_persisted_index(tmp_path):
+    from sqlalchemy import create_engine
+
+    from models.database import init_schema
+    from services.dedup import load_or_create
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'dedup.db'}")
+    init_schema(engine)
+    worker = load_or_create(engine)
+    for i in range(3):
+        worker.add(f"{POSITIVE} numéro {i}", canonical('Positif'))
+
+    # Reconstruction hors ligne (dedup_reviews.py --save) avec un seul avis canonique
+    rebuilt = DuplicateIndex(threshold=0.8)
+    rebuilt.add(NEGATIVE, canonical('Négatif'))
+    rebuilt.persist(engine)
+
+    worker.sync()
+    assert worker.size == 1
+    assert worker.find(NEGATIVE)['sentiment'] == 'Négatif'
+    assert worker.find(POSITIVE + " numéro 0") is None
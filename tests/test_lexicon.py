@@ -0,0 +1,25 @@
+import pytest
+
+from services.lexicon import LexiconSentimentEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return LexiconSentimentEngine()
+
+
+@pytest.mark.parametrize('text', ["pas cher et bon", "pas cher mais bon", "pas cher, bon"])
+def test_negation_stops_at_clause_boundary(engine, text):
+    assert engine.analyze(text, 'fr')['sentiment'] == 'Positif'
+
+
+def test_negation_still_applies_within_window(engine):
+    assert engine.analyze("pas du tout bon", 'fr')['sentiment'] == 'Négatif'
+    assert engine.analyze("ماشي غالي ولكن زوين", 'darija')['sentiment'] == 'Positif'
+
+
+def test_phrase_wins_over_intensifier(engine):
+    # « trop cher » est une entrée du lexique, pas « cher » intensifié
+    assert engine.analyze("produit trop cher pour la qualité", 'fr')['sentiment'] == 'Négatif'
+    positive, negative, hits = engine.score("trop cher", 'fr')
+    assert (positive, negative, hits) == (0.0, 1.5, 1)
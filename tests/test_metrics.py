@@ -0,0 +1,10 @@
+from services.metrics import Gauge, MetricsRegistry
+
+
+def test_gauge_registered_twice_is_exposed_once():
+    registry = MetricsRegistry()
+    registry.register(Gauge('feelya_queue_depth', "File", ('priority',), callback=lambda: {('bulk',): 1}))
+    registry.register(Gauge('feelya_queue_depth', "File", ('priority',), callback=lambda: {('bulk',): 2}))
+    lines = registry.render().splitlines()
+    assert lines.count('# TYPE feelya_queue_depth gauge') == 1
+    assert 'feelya_queue_depth{priority="bulk"} 2' in lines
@@ -0,0 +1,57 @@
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from models.database import Product, init_schema
+from services.product_index import ProductIndex
+
+PRODUCTS = [
+    (1, "Casque audio bluetooth", "casque sans fil réduction de bruit"),
+    (2, "Écouteurs bluetooth", "écouteurs sans fil étanches"),
+    (3, "Robe d'été", "robe légère en coton"),
+]
+
+
+def make_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    init_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Product.__table__), [
+            {'id': pid, 'name': name, 'description': description} for pid, name, description in PRODUCTS[:2]
+        ])
+    return engine
+
+
+def add_product(engine, product):
+    # Écrit par un autre processus (script, autre worker) : l'index n'est pas prévenu
+    pid, name, description = product
+    with engine.begin() as conn:
+        conn.execute(insert(Product.__table__).values(id=pid, name=name, description=description))
+
+
+def test_product_created_elsewhere_is_found(tmp_path):
+    engine = make_engine(tmp_path)
+    index = ProductIndex(refresh=3600)
+    with Session(engine) as db:
+        index.ensure_built(db)
+        add_product(engine, (4, "Casque gamer", "casque audio filaire"))
+        assert index.ensure_product(db, 4)
+        assert not index.ensure_product(db, 99)
+    assert index.similar_to(4, 1)[0][0] == 1
+
+
+def test_index_is_rebuilt_when_products_change(tmp_path):
+    engine = make_engine(tmp_path)
+    index = ProductIndex(refresh=0)
+    with Session(engine) as db:
+        index.ensure_built(db)
+        add_product(engine, PRODUCTS[2])
+        time.sleep(0.01)
+        index.ensure_built(db)
+    deadline = time.monotonic() + 5
+    while 3 not in index.id_to_row and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.size == 3
+    # Vocabulaire réappris : « robe » est connu du nouvel index
+    assert 'robe' in index.vectorizer.vocabulary_
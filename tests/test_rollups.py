@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+
+from models.database import Product, Review, SentimentRollup, init_schema
+from services import rollups
+
+REVIEWS = [
+    (1, 'Positif', 0.9, 5.0, datetime(2024, 3, 4)),
+    (1, 'Négatif', -0.7, 1.0, datetime(2024, 3, 5)),
+    (2, 'Neutre', 0.1, 3.0, datetime(2024, 3, 5)),
+    (2, 'Positif', 0.8, 4.0, datetime(2024, 3, 12)),
+    (1, 'Positif', 0.6, 4.0, datetime(2024, 3, 12)),
+]
+
+
+def rollup_rows(engine):
+    table = SentimentRollup.__table__
+    with engine.connect() as conn:
+        return sorted(tuple(row) for row in conn.execute(
+            select(*(table.c[name] for name in (*rollups.KEY_COLUMNS, *rollups.COUNTERS)))
+        ))
+
+
+def test_chunked_backfill_matches_incremental_rollups(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    init_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Product.__table__), [
+            {'id': 1, 'name': 'Casque', 'category': 'Audio'},
+            {'id': 2, 'name': 'Enceinte', 'category': 'Audio'},
+        ])
+        conn.execute(insert(Review.__table__), [
+            {'product_id': product_id, 'user_id': 1, 'rating': rating, 'text': 'avis', 'language': 'fr',
+             'sentiment': sentiment, 'sentiment_score': score, 'created_at': created_at}
+            for product_id, sentiment, score, rating, created_at in REVIEWS
+        ])
+        rollups.record_reviews(conn, [
+            {'product_id': product_id, 'category': 'Audio', 'language': 'fr', 'sentiment': sentiment,
+             'sentiment_score': score, 'rating': rating, 'created_at': created_at}
+            for product_id, sentiment, score, rating, created_at in REVIEWS
+        ])
+    incremental = rollup_rows(engine)
+
+    # Tranches de deux avis, deux fois de suite : la table est bien vidée avant
+    rollups.backfill(engine, chunk_size=2)
+    assert rollups.backfill(engine, chunk_size=2) == len(incremental)
+    assert rollup_rows(engine) == incremental
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import dependencies
+from api.routes import ml_router
+from services.dedup import DuplicateIndex
+from services.sentiment_analyzer import SentimentAnalyzer
+
+POSITIVE = "Ce produit est bon"
+NEGATIVE = "Ce produit est pas bon"
+
+
+class StopwordPreprocessor:
+    """Comme TextPreprocessor : stopwords NLTK retirés, « pas » compris"""
+
+    def preprocess(self, text):
+        words = [w for w in text.lower().split() if w not in {'ce', 'est', 'pas'}]
+        return ' '.join(words), 'fr'
+
+
+@pytest.fixture
+def client():
+    providers = {
+        dependencies.get_preprocessor: StopwordPreprocessor(),
+        dependencies.get_sentiment_analyzer: SentimentAnalyzer(backend='lexicon'),
+        dependencies.get_scheduler: None,
+        dependencies.get_dedup_index: DuplicateIndex(threshold=0.8),
+    }
+    saved = {provider: (provider.instance, provider.loaded) for provider in providers}
+    for provider, instance in providers.items():
+        provider.override(instance)
+    app = FastAPI()
+    app.include_router(ml_router)
+    yield TestClient(app)
+    for provider, (instance, loaded) in saved.items():
+        provider.instance, provider.loaded = instance, loaded
+
+
+def test_analyze_does_not_reuse_the_negated_canonical(client):
+    index = dependencies.get_dedup_index()
+    index.add(POSITIVE, {'review_id': 1, 'product_id': 1, 'user_id': 1, 'sentiment': 'Positif',
+                         'sentiment_score': 0.8, 'confidence': 0.9})
+
+    assert client.post('/analyze-sentiment/', json={'text': NEGATIVE}).json()['sentiment'] == 'Négatif'
+    assert client.post('/analyze-sentiment/', json={'text': POSITIVE}).json()['sentiment_score'] == 0.8
+    # Analyse ponctuelle : aucune entrée canonique ajoutée
+    assert len(index.entries) == 1
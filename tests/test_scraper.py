@@ -0,0 +1,107 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.crawl_state import CrawlState
+from services.scraper import EcommerceScraper
+
+
+class StubSite:
+    """Page produit au format Jumia, avec ou sans ETag"""
+
+    def __init__(self, validators=True):
+        self.validators = validators
+        self.reviews = [(5.0, "Très bon produit"), (2.0, "Livraison lente"), (4.0, "Bon rapport qualité prix")]
+        self.requests = []
+
+    def render(self) -> bytes:
+        items = ''.join(
+            f'<div class="review-item"><div class="rating" data-rating="{rating}"></div>'
+            f'<p class="review-text">{text}</p></div>'
+            for rating, text in self.reviews
+        )
+        return f'<html><body><h1 class="product-title">Produit</h1>{items}</body></html>'.encode('utf-8')
+
+
+@pytest.fixture
+def site():
+    return StubSite()
+
+
+@pytest.fixture
+def url(site):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = site.render()
+            etag = f'"{len(site.reviews)}"'
+            site.requests.append(self.headers.get('If-None-Match'))
+            if site.validators and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            if site.validators:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/product/1'
+    server.shutdown()
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    return EcommerceScraper(state=CrawlState(str(tmp_path / 'state.db')), delay=0)
+
+
+def crawl(scraper, url):
+    reviews = scraper.scrape_jumia_reviews(url)
+    scraper.commit_fingerprints(reviews)
+    return reviews
+
+
+def test_not_modified_page_is_skipped(scraper, url, site):
+    assert len(crawl(scraper, url)) == 3
+    assert crawl(scraper, url) == []
+    assert site.requests[-1] == '"3"'
+    assert scraper.stats['not_modified'] == 1
+
+
+def test_unchanged_content_is_skipped_without_validators(scraper, url, site):
+    site.validators = False
+    assert len(crawl(scraper, url)) == 3
+    assert crawl(scraper, url) == []
+    assert scraper.stats['unchanged'] == 1
+    assert scraper.stats['parsed'] == 1
+
+
+def test_only_unseen_reviews_are_returned(scraper, url, site):
+    crawl(scraper, url)
+    site.reviews.append((1.0, "Produit cassé à la livraison"))
+    reviews = crawl(scraper, url)
+    assert [review['text'] for review in reviews] == ["Produit cassé à la livraison"]
+    assert scraper.stats['reviews_skipped'] == 3
+
+
+def test_uncommitted_reviews_are_returned_again(scraper, url):
+    # Ingestion en échec : ni empreintes ni état de page enregistrés
+    assert len(scraper.scrape_jumia_reviews(url)) == 3
+    assert len(crawl(scraper, url)) == 3
+    assert crawl(scraper, url) == []
+
+
+def test_parse_error_does_not_mark_page_unchanged(scraper, url, monkeypatch):
+    def broken(content, selectors):
+        raise ValueError("HTML inattendu")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(scraper.parser, 'reviews', broken)
+        assert scraper.scrape_jumia_reviews(url) == []
+    assert len(crawl(scraper, url)) == 3
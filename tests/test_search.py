@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, insert, text
+
+from models.database import Review, init_schema
+from services import search
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    init_schema(engine)
+    search.init_index(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Review.__table__), [
+            {'id': 1, 'product_id': 1, 'user_id': 1, 'rating': 4, 'text': 'livraison rapide'},
+            {'id': 2, 'product_id': 1, 'user_id': 1, 'rating': 1, 'text': 'produit cassé'},
+        ])
+        search.index_reviews(conn, [(1, 'livraison rapide'), (2, 'produit cassé')])
+    return engine
+
+
+def matches(engine, query):
+    with engine.connect() as conn:
+        return conn.execute(
+            text(f"SELECT rowid FROM {search.SQLITE_TABLE} WHERE {search.SQLITE_TABLE} MATCH :q"), {'q': query}
+        ).scalars().all()
+
+
+def test_reindexing_removes_previous_terms(engine):
+    with engine.begin() as conn:
+        search.index_reviews(conn, [(2, 'produit neuf')])
+        conn.execute(text("UPDATE reviews SET text = 'produit neuf' WHERE id = 2"))
+        conn.execute(text(f"INSERT INTO {search.SQLITE_TABLE} ({search.SQLITE_TABLE}) VALUES ('integrity-check')"))
+    assert matches(engine, 'casse') == []
+    assert matches(engine, 'neuf') == [2]
+
+
+def test_rebuild_swaps_in_a_complete_index(engine):
+    assert search.rebuild(engine, chunk_size=1) == 2
+    assert matches(engine, 'livraison') == [1]
+    assert matches(engine, 'produit') == [2]
+    with engine.connect() as conn:
+        tables = conn.execute(text("SELECT name FROM sqlite_master WHERE name LIKE '%_rebuild%'")).all()
+    assert tables == []